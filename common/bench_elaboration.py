@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+#
+# Elaboration benchmark of the workshop designs (no vendor tools).
+#
+# Each design is built in a fresh interpreter (PYTHONHASHSEED=0), phase by
+# phase, the way the build flow does before Quartus runs:
+#  - import:   the step script and the board platform,
+#  - init:     the design's __init__,
+#  - finalize: get_fragment() (module and SoC finalization) and platform.finalize(),
+#  - verilog:  platform.get_verilog(),
+#  - csr:      csr.csv and csr.json contents (SoCs only).
+# Times are the min/median of --repeat runs. One more run under tracemalloc
+# records each phase's peak traced memory (above the memory in use when it
+# starts) and the memory blocks it left allocated, and the process peak RSS. --json saves the results; --baseline
+# compares them to a previous run and flags phases whose median time or peak
+# memory grew by more than --threshold (exit status 1).
+#
+# The SoCs are built without a CPU by default (--cpu-type): the CPU's Verilog
+# comes from a pythondata package, only its wrapper is elaborated.
+#
+# ./bench_elaboration.py [--repeat 5] [-k step2] [--json elaboration.json]
+# ./bench_elaboration.py --baseline elaboration.json --threshold 0.2
+
+import io
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import resource
+import importlib
+import statistics
+import subprocess
+import tracemalloc
+import contextlib
+
+import designs
+
+PLATFORM = "litex_boards.platforms.qmtech_ep4ce15_starter_kit"
+PHASES   = ["import", "init", "finalize", "verilog", "csr"]
+
+def _script(*path):
+    return os.path.join(designs.root, *path)
+
+# Designs: (script, constructor(script module, platform, cpu_type)); the SoCs create their own platform.
+DESIGNS = {
+    "step0.Tuto":           (_script("step0", "step0.py"),             lambda m, p, cpu: m.Tuto(p)),
+    "step1.Step1":          (_script("step1", "solution", "step1.py"), lambda m, p, cpu: m.Step1(p)),
+    "step2.BaseSoC":        (_script("step2", "step2.py"),             lambda m, p, cpu: m.BaseSoC(cpu_type=cpu)),
+    "step2.BaseSoC_all":    (_script("step2", "step2.py"),             lambda m, p, cpu: m.BaseSoC(cpu_type=cpu,
+        with_stream  = True,
+        with_perfmon = True)),
+    "step2.BaseSoC_fb":     (_script("step2", "step2.py"),             lambda m, p, cpu: m.BaseSoC(cpu_type=cpu,
+        with_framebuffer = True)),
+    "step2_bis.BaseSoC":    (_script("step2", "step2_bis.py"),         lambda m, p, cpu: m.BaseSoC(cpu_type=cpu,
+        with_jtagbone = True)),
+}
+
+# Child: one build of one design -------------------------------------------------------------------
+
+def elaborate(name, cpu_type=None, memory=False):
+    """{phase: {time_s[, peak_kib, blocks]}} of one build of `name`, plus the output sizes."""
+    script, build = DESIGNS[name]
+    phases = {}
+    def phase(label, function):
+        gc.collect()
+        if memory:
+            tracemalloc.reset_peak()
+            traced = tracemalloc.get_traced_memory()[0]
+        blocks = sys.getallocatedblocks()
+        start  = time.perf_counter()
+        r      = function()
+        phases[label] = {"time_s": time.perf_counter() - start}
+        if memory:
+            phases[label]["peak_kib"] = (tracemalloc.get_traced_memory()[1] - traced)/1024
+            phases[label]["blocks"]   = sys.getallocatedblocks() - blocks
+        return r
+
+    if memory:
+        tracemalloc.start()
+    # The designs print and log while they are built.
+    with contextlib.redirect_stdout(io.StringIO()):
+        module, board = phase("import", lambda: (
+            designs.load(script, os.path.splitext(os.path.basename(script))[0]),
+            importlib.import_module(PLATFORM)))
+        def init():
+            platform = board.Platform()
+            design   = build(module, platform, cpu_type)
+            return design, getattr(design, "platform", platform)
+        design, platform = phase("init", init)
+        def finalize():
+            fragment = design.get_fragment()
+            platform.finalize(fragment)
+            return fragment
+        fragment = phase("finalize", finalize)
+        verilog = phase("verilog", lambda: str(platform.get_verilog(fragment, name="top")))
+        csr     = None
+        if hasattr(design, "csr_regions"):
+            from litex.soc.integration import export
+            csr = phase("csr", lambda: [f(
+                csr_regions = design.csr_regions,
+                constants   = design.constants,
+                mem_regions = design.mem_regions) for f in [export.get_csr_csv, export.get_csr_json]])
+    return {
+        "phases":        phases,
+        "verilog_bytes": len(verilog),
+        "csr_bytes":     len(csr[0]) if csr is not None else None,
+        "maxrss_kib":    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+# Parent -------------------------------------------------------------------------------------------
+
+def run_child(name, cpu_type, memory):
+    cmd = [sys.executable, "-W", "ignore", os.path.abspath(__file__), "--child", name, "--cpu-type", str(cpu_type)]
+    if memory:
+        cmd.append("--memory")
+    env = dict(os.environ, PYTHONHASHSEED="0")
+    out = subprocess.run(cmd, check=True, env=env, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+def measure(name, cpu_type, repeat):
+    runs   = [run_child(name, cpu_type, memory=False) for _ in range(repeat)]
+    mem    = run_child(name, cpu_type, memory=True)
+    result = {"phases": {}}
+    for label in PHASES:
+        times = [run["phases"][label]["time_s"] for run in runs if label in run["phases"]]
+        if not times:
+            continue
+        result["phases"][label] = {
+            "min_s":    min(times),
+            "median_s": statistics.median(times),
+            "peak_kib": mem["phases"][label]["peak_kib"],
+            "blocks":   mem["phases"][label]["blocks"],
+        }
+    result["total_s"] = sum(p["median_s"] for p in result["phases"].values())
+    for key in ["verilog_bytes", "csr_bytes"]:
+        result[key] = runs[0][key]
+    result["maxrss_kib"] = max(run["maxrss_kib"] for run in runs)
+    return result
+
+def environment(cpu_type):
+    versions = {}
+    for package in ["migen", "litex", "litex_boards"]:
+        try:
+            from importlib.metadata import version
+            versions[package] = version(package)
+        except Exception:
+            versions[package] = None
+    return {"python": platform.python_version(), "machine": platform.machine(), "cpu_type": cpu_type, **versions}
+
+def compare(results, baseline, threshold, min_delta=5e-3):
+    """(design, phase, what, ratio) of the phases that regressed against `baseline`."""
+    regressions = []
+    for name, result in results.items():
+        for label, p in result["phases"].items():
+            b = baseline.get(name, {}).get("phases", {}).get(label)
+            if b is None:
+                continue
+            if p["median_s"] > b["median_s"]*(1 + threshold) and p["median_s"] - b["median_s"] > min_delta:
+                regressions.append((name, label, "time", p["median_s"]/b["median_s"]))
+            if b["peak_kib"] and p["peak_kib"] > b["peak_kib"]*(1 + threshold):
+                regressions.append((name, label, "peak memory", p["peak_kib"]/b["peak_kib"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Elaboration benchmark of the workshop designs.")
+    parser.add_argument("-k",          default=None,                 help="Only the designs containing this substring.")
+    parser.add_argument("--repeat",    default=5, type=int,          help="Timed builds per design.")
+    parser.add_argument("--cpu-type",  default=None,                 help="CPU of the SoCs (default: none).")
+    parser.add_argument("--json",      default=None,                 help="Save the results to a JSON file.")
+    parser.add_argument("--baseline",  default=None,                 help="Previous --json results to compare to.")
+    parser.add_argument("--threshold", default=0.2, type=float,      help="Flag phases more than this fraction slower/larger.")
+    parser.add_argument("--child",     default=None,                 help=argparse.SUPPRESS)
+    parser.add_argument("--memory",    action="store_true",          help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    cpu_type = None if args.cpu_type in [None, "None", "none"] else args.cpu_type
+
+    if args.child is not None:
+        print(json.dumps(elaborate(args.child, cpu_type, args.memory)))
+        return
+
+    results = {}
+    print(f"{'design':22s} " + " ".join(f"{label:>9s}" for label in PHASES) + f" {'total':>9s} {'peak':>9s} {'verilog':>9s}")
+    for name in DESIGNS:
+        if args.k is not None and args.k not in name:
+            continue
+        result = results[name] = measure(name, cpu_type, args.repeat)
+        phases = result["phases"]
+        times  = " ".join(f"{1e3*phases[label]['median_s']:7.1f}ms" if label in phases else f"{'-':>9s}" for label in PHASES)
+        peak   = max(p["peak_kib"] for p in phases.values())
+        print(f"{name:22s} {times} {1e3*result['total_s']:7.1f}ms {peak/1024:6.1f}MiB {result['verilog_bytes']/1024:6.0f}KiB")
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["designs"], args.threshold)
+        for name, label, what, ratio in regressions:
+            print(f"regression: {name} {label} {what} x{ratio:.2f}")
+        if not regressions:
+            print(f"No regression against {args.baseline} (threshold {args.threshold:.0%}).")
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(cpu_type), "designs": results}, f, indent=1)
+
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
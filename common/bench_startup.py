@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+#
+# Startup benchmark for the step0/step1 entry points.
+#
+# Each subcommand is run in a fresh interpreter and stopped right before it
+# touches the programmer (load), the simulator (sim) or the build flow (build),
+# so the measured wall time is interpreter startup + imports + elaboration.
+#
+# ./bench_startup.py [--repeat 5] [--json startup.json]
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+scripts = {
+    "step0": os.path.join(root, "step0", "step0.py"),
+    "step1": os.path.join(root, "step1", "solution", "step1.py"),
+}
+
+commands = ["load", "sim", "build"]
+
+# Functions where each subcommand stops: (module, class or None, function).
+_stops = [
+    ("litex.build.generic_programmer", "GenericProgrammer", "load_bitstream"),
+    ("litex.build.altera.programmer",  "USBBlaster",        "load_bitstream"),
+    ("sim",                            None,                "simulate"),
+    ("buildcache",                     None,                "cached_build"),
+]
+
+# Runs the script as __main__ with the stop functions replaced, as soon as their
+# module is imported, by a function exiting the interpreter.
+_runner = """
+import os, sys, runpy, importlib.abc, importlib.machinery
+
+stops = {stops!r}
+
+def stop(*args, **kwargs):
+    sys.stdout.flush()
+    os._exit(0)
+
+class Loader(importlib.abc.Loader):
+    def __init__(self, loader):
+        self.loader = loader
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        for name, cls, func in stops:
+            target = getattr(module, cls, None) if cls else module
+            if name == module.__name__ and target is not None:
+                setattr(target, func, stop)
+
+class Finder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in [name for name, _, _ in stops]:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is not None:
+            spec.loader = Loader(spec.loader)
+        return spec
+
+sys.meta_path.insert(0, Finder())
+sys.argv = [{script!r}, {command!r}]
+sys.path.insert(0, os.path.dirname({script!r}))
+runpy.run_path({script!r}, run_name="__main__")
+"""
+
+# Benchmark ----------------------------------------------------------------------------------------
+
+def measure(script, command, repeat=5):
+    code = _runner.format(stops=_stops, script=script, command=command)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True,
+            cwd=os.path.dirname(script), stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of the load/sim/build subcommands.")
+    parser.add_argument("--repeat", default=5, type=int, help="Runs per subcommand.")
+    parser.add_argument("--json",   default=None,        help="Write the results to a JSON file.")
+    args = parser.parse_args()
+
+    results = {}
+    for name, script in scripts.items():
+        for command in commands:
+            times = measure(script, command, args.repeat)
+            results[f"{name}.{command}"] = {
+                "min_ms":    round(1e3*min(times), 1),
+                "median_ms": round(1e3*statistics.median(times), 1),
+            }
+            print(f"{name:6s} {command:6s} min {1e3*min(times):8.1f} ms  median {1e3*statistics.median(times):8.1f} ms")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
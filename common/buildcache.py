@@ -0,0 +1,153 @@
+#
+# Incremental gateware builds keyed on the generated sources.
+#
+# The build files are always generated: generation finalizes the design, so the
+# Verilog, constraints, scripts and memory init files (with a SoC, the ROM/BIOS
+# image and the CSR map) and, through a SoC Builder, the headers, software and
+# csr.csv are up to date. The toolchain only runs when the key changed or the
+# bitstream is missing. The key, recorded in <build_dir>/buildcache.json with
+# the per-file hashes, hashes the generated sources (without the generation
+# dates) and the platform/toolchain settings.
+# On a miss, the modules whose structural hash changed (statements of each
+# module of the elaborated design, before finalization) and the generated files
+# that changed are reported.
+
+import os
+import re
+import sys
+import json
+import hashlib
+import subprocess
+
+from migen import *
+
+from designs import walk, signal_name
+
+# Design hashing -----------------------------------------------------------------------------------
+
+_skip_attrs = {"backtrace", "duid", "finalized", "_submodules", "_clock_domains", "_specials"}
+
+class _Serializer:
+    def __init__(self):
+        self.signals = {}
+        self.visited = set()
+
+    def __call__(self, obj):
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return repr(obj)
+        if isinstance(obj, Signal):
+            if obj not in self.signals:
+                self.signals[obj] = len(self.signals)
+            return f"S{self.signals[obj]}:{signal_name(obj)}:{len(obj)}:{obj.signed}:{obj.reset.value}"
+        if isinstance(obj, Module):
+            return f"<{type(obj).__name__}>"
+        if isinstance(obj, (list, tuple)):
+            return "[" + ",".join(self(o) for o in obj) + "]"
+        if isinstance(obj, (set, frozenset)):
+            return "{" + ",".join(sorted(self(o) for o in obj)) + "}"
+        if isinstance(obj, dict):
+            return "{" + ",".join(sorted(f"{self(k)}:{self(v)}" for k, v in obj.items())) + "}"
+        if id(obj) in self.visited:
+            return f"<{type(obj).__name__}>"
+        self.visited.add(id(obj))
+        attrs = getattr(obj, "__dict__", {})
+        fields = ",".join(f"{k}={self(v)}" for k, v in sorted(attrs.items()) if k not in _skip_attrs)
+        return f"{type(obj).__name__}({fields})"
+
+def module_hashes(design):
+    """Per-module hashes (own statements only) of a not yet finalized design."""
+    hashes = {}
+    for path, module in walk(design):
+        fragment  = module._fragment
+        serialize = _Serializer()
+        h = hashlib.sha256(type(module).__name__.encode())
+        h.update(serialize(fragment.comb).encode())
+        h.update(serialize(fragment.sync).encode())
+        h.update(serialize(fragment.specials).encode())
+        h.update(serialize([cd.name for cd in fragment.clock_domains]).encode())
+        hashes[path] = h.hexdigest()[:16]
+    return hashes
+
+def settings_hash(platform, settings):
+    h = hashlib.sha256()
+    h.update(f"{type(platform).__module__}.{type(platform).__name__}".encode())
+    h.update(str(getattr(platform, "device", "")).encode())
+    h.update(type(getattr(platform, "toolchain", None)).__name__.encode())
+    h.update(str(getattr(platform, "default_clk_period", "")).encode())
+    h.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+_source_exts = (".v", ".sv", ".vh", ".vhd", ".qsf", ".qpf", ".sdc", ".tcl", ".init", ".hex", ".sh", ".bat")
+
+_date_re = re.compile(rb"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d")  # Banners of the generated files.
+
+def source_hashes(build_dir):
+    """{path relative to build_dir: hash} of the generated sources."""
+    hashes = {}
+    for root, dirs, files in sorted(os.walk(build_dir)):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(_source_exts):
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    hashes[os.path.relpath(path, build_dir)] = hashlib.sha256(_date_re.sub(b"", f.read())).hexdigest()[:16]
+    return hashes
+
+# Toolchain ----------------------------------------------------------------------------------------
+
+def run_toolchain(build_dir, build_name):
+    """Run the build script generated by platform.build(..., run=False)."""
+    if sys.platform in ["win32", "cygwin"]:
+        cmd = ["cmd", "/c", f"build_{build_name}.bat"]
+    else:
+        cmd = ["bash", f"build_{build_name}.sh"]
+    subprocess.run(cmd, cwd=build_dir, check=True)
+
+# Cached build -------------------------------------------------------------------------------------
+
+def cached_build(platform, design, build_dir="gateware", build_name="top",
+    bitstream = None,
+    settings  = {},
+    generate  = None,
+    toolchain = run_toolchain,
+    **kwargs):
+    """Build `design`, running the toolchain only if its inputs changed. Returns True on a cache hit.
+
+    `generate` writes the build files without running the toolchain (defaults to
+    platform.build(design, run=False)), it runs on hits too; `toolchain` runs the
+    vendor tools.
+    """
+    if bitstream is None:
+        bitstream = os.path.join(build_dir, f"{build_name}.sof")
+    if generate is None:
+        generate = lambda: platform.build(design, build_dir=build_dir, build_name=build_name, run=False, **kwargs)
+
+    manifest_path = os.path.join(build_dir, "buildcache.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    modules = module_hashes(design)  # Before generate() finalizes the design.
+    generate()
+    files = source_hashes(build_dir)
+    key   = hashlib.sha256(json.dumps([files, settings_hash(platform, dict(settings, **kwargs))],
+        sort_keys=True).encode()).hexdigest()[:16]
+
+    hit = os.path.exists(bitstream) and manifest.get("key") == key
+    if hit:
+        print(f"[buildcache] generated sources {key} unchanged, using {bitstream}")
+    else:
+        for kind, old, new in [("module", manifest.get("modules", {}), modules), ("file", manifest.get("files", {}), files)]:
+            for path in sorted(set(old) | set(new)) if old else []:
+                if path not in new:
+                    print(f"[buildcache] removed {kind}: {path}")
+                elif path not in old:
+                    print(f"[buildcache] added {kind}:   {path}")
+                elif old[path] != new[path]:
+                    print(f"[buildcache] changed {kind}: {path}")
+        toolchain(build_dir, build_name)
+
+    with open(manifest_path, "w") as f:
+        json.dump({"key": key, "files": files, "modules": modules}, f, indent=4)
+    return hit
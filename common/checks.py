@@ -0,0 +1,312 @@
+#
+# Self-checking simulation tests of the workshop designs (run by regress.py).
+#
+# A check is a function taking an elaborated design and returning its
+# testbench: a generator, or {domain: generator} for multi-clock designs. It
+# asserts on the design's outputs. @check registers it with the DESIGNS entry
+# it runs on and the clocks it needs, so the runner builds each design once and
+# runs all of its checks on copies of the same fragment.
+
+import os
+import random
+import tempfile
+
+from migen import *
+
+import designs
+from display import SEGMENTS, SevenSegmentDisplay
+from timer import Prescaler, Timer
+from simsnap import FastForward, Snapshot, Restore
+
+# Designs ------------------------------------------------------------------------------------------
+
+# step1 has a fixed 2 ms refresh: 100 kHz makes it 200 cycles. The others take a
+# refresh time: 10 MHz (1 us prescaler of 10 cycles) and 20 us, 200 cycles too.
+SLOW_PERIOD_NS = 10e3
+PERIOD_NS      = 100
+REFRESH_TIME   = 0.02
+
+def _step2_script(name):
+    return designs.load(os.path.join(designs.root, "step2", f"{name}.py"), f"step2_{name}")
+
+def _step2_controller(**kwargs):
+    return designs.step2_controller().SevenSegmentsController(PERIOD_NS, refresh_time=REFRESH_TIME, **kwargs)
+
+def _step2_disp():
+    dut = _step2_controller(clock_domain="disp")
+    # sys cycle counter timestamping both sides of the crossing (see sim_cdc.py).
+    dut.now = Signal(32)
+    dut.sync += dut.now.eq(dut.now + 1)
+    return dut
+
+def _step2_framebuffer():
+    dut = _step2_controller(with_framebuffer=True)
+    # Timestamps of the flips and of the displayed frames (see sim_framebuffer.py).
+    dut.now = Signal(32)
+    dut.sync += dut.now.eq(dut.now + 1)
+    return dut
+
+class _Prescalers(Module):
+    def __init__(self, period_ns=10):
+        self.prescalers = []  # (n, binary, johnson)
+        for n in range(1, 10):
+            binary  = Prescaler(n*period_ns, period_ns)
+            johnson = Prescaler(n*period_ns, period_ns, johnson=True)
+            self.submodules += binary, johnson
+            self.prescalers.append((n, binary, johnson))
+        self.submodules.timer = Timer(15*4*period_ns, period_ns, self.prescalers[3][2])
+
+def _perfmon():
+    perfmon = _step2_script("sim_perfmon")
+    dut     = perfmon.PerfMonitor(list(perfmon.LOCS))
+    dut.masters = [perfmon.wishbone.Interface(), perfmon.wishbone.Interface()]
+    dut.csr_bus = perfmon.wishbone.Interface()
+    dut.connect(dut.masters, dut.csr_bus, perfmon.LOCS, paging=perfmon.PAGING)
+    return dut
+
+DESIGNS = {
+    "step0.blink":              lambda: designs.step0().Blink(3),
+    "step1.seven_segment":      lambda: designs.step1().SevenSegment(),
+    "step1.controller":         lambda: designs.step1().SevenSegmentsController(SLOW_PERIOD_NS),
+    "step2.seven_segment":      lambda: designs.step2_controller().SevenSegment(),
+    "step2.controller":         lambda: _step2_controller(),
+    "step2.controller_lp":      lambda: _step2_controller(low_power=True),
+    "step2.controller_stream":  lambda: _step2_controller(with_stream=True, fifo_depth=16),
+    "step2.controller_disp":    _step2_disp,
+    "step2.controller_fb":      _step2_framebuffer,
+    "step2.framebuffer":        lambda: _step2_script("framebuffer").Framebuffer(8),
+    "step2.perfmon":            _perfmon,
+    "display.3":                lambda: SevenSegmentDisplay(PERIOD_NS, refresh_time=REFRESH_TIME),
+    "display.8_inverted":       lambda: SevenSegmentDisplay(PERIOD_NS, ndigits=8, refresh_time=REFRESH_TIME,
+        segments_active_low=False, digits_active_low=True, with_dp=True),
+    "timer.prescalers":         _Prescalers,
+}
+
+# Registry -----------------------------------------------------------------------------------------
+
+class Check:
+    def __init__(self, name, design, function, clocks):
+        self.name     = name
+        self.design   = design
+        self.function = function
+        self.clocks   = clocks
+
+CHECKS = {}
+
+def check(design, clocks={"sys": 10}):
+    def register(function):
+        name = f"{design}::{function.__name__}"
+        CHECKS[name] = Check(name, design, function, clocks)
+        return function
+    return register
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def display_bench(dut, value, period, ndigits=3, lag=0, values=[0x123, 0xabc, 0x000, 0xfff],
+    digits_invert   = 0,
+    segments_invert = 0):
+    """Each of `values` for 2 full rotations: one-hot digits rotating every `period`
+    cycles, each showing its nibble (digit[0] the most significant) at most `lag`
+    cycles after a value change."""
+    changes    = []
+    last_digit = None
+    cycle      = 0
+    for v in values:
+        yield value.eq(v)
+        for stable in range(2*ndigits*period):
+            yield
+            cycle += 1
+            digit = (yield dut.digit) ^ digits_invert
+            assert digit in [1 << i for i in range(ndigits)], f"cycle {cycle}: digit {digit:b} is not one-hot"
+            if digit != last_digit:
+                if last_digit is not None:
+                    changes.append(cycle)
+                last_digit = digit
+            if stable > lag:
+                nibble  = (v >> 4*(ndigits - digit.bit_length())) & 0xf
+                abcdefg = (yield dut.abcdefg) ^ segments_invert
+                assert abcdefg == SEGMENTS[nibble], \
+                    f"cycle {cycle}: digit {digit:b} of {v:x} shows {abcdefg:07b}, expected {SEGMENTS[nibble]:07b}"
+    periods = {b - a for a, b in zip(changes, changes[1:])}
+    assert periods == {period}, f"digit periods {sorted(periods)}, expected {period}"
+
+# step0 --------------------------------------------------------------------------------------------
+
+@check("step0.blink")
+def toggles_every_8_cycles(dut):
+    changes = []
+    last    = yield dut.out
+    for cycle in range(100):
+        yield
+        out = yield dut.out
+        if out != last:
+            changes.append(cycle)
+        last = out
+    assert len(changes) >= 10, f"out toggled {len(changes)} times in 100 cycles"
+    assert {b - a for a, b in zip(changes, changes[1:])} == {8}, f"out toggles at {changes}"
+
+# Seven segment decoders ---------------------------------------------------------------------------
+
+def decode_table(dut):
+    for v in range(16):
+        yield dut.value.eq(v)
+        yield
+        abcdefg = yield dut.abcdefg
+        assert abcdefg == SEGMENTS[v], f"{v:x} decoded as {abcdefg:07b}, expected {SEGMENTS[v]:07b}"
+
+check("step1.seven_segment")(decode_table)
+check("step2.seven_segment")(decode_table)
+
+# Controllers --------------------------------------------------------------------------------------
+
+@check("step1.controller")
+def step1_display(dut):
+    yield from display_bench(dut, dut.value, dut.refresh_count + 1)
+
+@check("step2.controller")
+def step2_display(dut):
+    yield from display_bench(dut, dut.value.storage, dut.refresh_count + 1)
+
+@check("step2.controller")
+def fast_forward_rotation(dut):
+    # Sampled every digit period, with the prescaler and refresh counters skipped in between.
+    v      = 0xabc
+    period = dut.refresh_count + 1
+    digits = []
+    yield dut.value.storage.eq(v)
+    yield FastForward(2)
+    for _ in range(7):
+        yield FastForward(period)
+        digit   = yield dut.digit
+        abcdefg = yield dut.abcdefg
+        assert digit in [1, 2, 4], f"digit {digit:b} is not one-hot"
+        assert abcdefg == SEGMENTS[(v >> 4*(3 - digit.bit_length())) & 0xf], f"digit {digit:b} shows {abcdefg:07b}"
+        digits.append(digit)
+    assert len(set(digits[:3])) == 3 and digits[3:] == digits[:4], f"digits {digits} do not rotate"
+
+@check("step2.controller")
+def snapshot_restore(dut):
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "snapshot.json")
+        yield dut.value.storage.eq(0x123)
+        yield FastForward(dut.refresh_count//2)
+        yield Snapshot(filename)
+        yield
+        before = [(yield dut.digit), (yield dut.value.storage)]
+        yield dut.value.storage.eq(0x456)
+        yield FastForward(5*dut.refresh_count)
+        yield Restore(filename)
+        yield
+        after = [(yield dut.digit), (yield dut.value.storage)]
+    assert after == before, f"restored {after}, expected {before}"
+
+@check("step2.controller_lp")
+def step2_low_power_display(dut):
+    # abcdefg is registered: loaded the cycle after a value change.
+    yield from display_bench(dut, dut.value.storage, dut.refresh.cycles, lag=1)
+
+@check("step2.controller_stream")
+def stream_in_order_without_underflow(dut):
+    stats = {"cycles": 0}
+    yield from _step2_script("bench_stream").bench(dut, frames=40, burst=16, latency=50, rate=9, depth=16, stats=stats)
+    assert stats["underflows"] == 0, f"{stats['underflows']} underflows"
+
+@check("step2.controller_stream")
+def stream_off_shows_value(dut):
+    yield from display_bench(dut, dut.value.storage, dut.refresh_count + 1)
+
+@check("step2.controller_stream")
+def stream_underflows_counted(dut):
+    # One frame per 50 cycles transaction, played every 10 cycles: most ticks underflow.
+    stats = {"cycles": 0}
+    yield from _step2_script("bench_stream").bench(dut, frames=10, burst=1, latency=50, rate=9, depth=16, stats=stats)
+    assert stats["underflows"] > 0, "No underflow counted"
+
+@check("step2.controller_disp", clocks={"sys": 10, "disp": 37})
+def value_crossing(dut):
+    cdc = _step2_script("sim_cdc")
+    written, seen, errors = [], [], []
+    def bench():
+        yield from cdc.writer(dut, 60, 0, written)
+        cdc.check_crossing(written, seen, errors)
+        assert not errors, "; ".join(errors[:3])
+    return {"sys": bench(), "disp": cdc.reader(dut, seen, errors)}
+
+# Framebuffer --------------------------------------------------------------------------------------
+
+@check("step2.framebuffer")
+def burst_write_read_flip(dut):
+    errors = []
+    yield from _step2_script("sim_framebuffer").burst_bench(dut, errors)
+    assert not errors, "; ".join(errors[:3])
+
+@check("step2.controller_fb")
+def flips_between_frames(dut):
+    fbsim = _step2_script("sim_framebuffer")
+    frames, flips, log = fbsim.make_frames(6, 0), [], []
+    def bench():
+        yield from fbsim.writer(dut, frames, flips)
+        errors = []
+        fbsim.check_frames(log, frames, flips, 3*(dut.refresh_count + 1), errors)
+        assert not errors, "; ".join(errors[:3])
+    return [bench(), fbsim.monitor(dut, log)]
+
+# Perf counters ------------------------------------------------------------------------------------
+
+@check("step2.perfmon")
+def counts_match_trace(dut):
+    perfmon  = _step2_script("sim_perfmon")
+    trace    = perfmon.make_trace(60, 0)
+    expected = perfmon.expected_counts(trace)
+    results  = {}
+    yield from perfmon.bench(dut, dut.masters, dut.csr_bus, trace, results)
+    for name, count in results["counts"].items():
+        assert count == expected[name], f"{name}: {count}, expected {expected[name]}"
+        assert results["cleared"][name] == 0, f"{name} not cleared by reset"
+
+# Display generator --------------------------------------------------------------------------------
+
+@check("display.3")
+def display_3_digits(dut):
+    yield from display_bench(dut, dut.value, dut.timer.cycles)
+
+@check("display.8_inverted")
+def display_8_digits_inverted(dut):
+    values = [0x12345678, 0x9abcdef0]
+    yield from display_bench(dut, dut.value, dut.timer.cycles, ndigits=8, values=values,
+        digits_invert=0xff, segments_invert=0x7f)
+
+@check("display.8_inverted")
+def display_dp(dut):
+    rng = random.Random(0)
+    for _ in range(4):
+        dp_in = rng.randrange(256)
+        yield dut.dp_in.eq(dp_in)
+        for _ in range(8*dut.timer.cycles):
+            yield
+            index = (~(yield dut.digit) & 0xff).bit_length() - 1
+            assert (yield dut.dp) == (dp_in >> index) & 1, f"dp {(yield dut.dp)} for digit {index} of {dp_in:08b}"
+
+# Timers -------------------------------------------------------------------------------------------
+
+@check("timer.prescalers")
+def prescaler_periods(dut):
+    last = {}
+    for cycle in range(200):
+        yield
+        for n, binary, johnson in dut.prescalers:
+            ce = yield binary.ce
+            assert (yield johnson.ce) == ce, f"n={n}: Johnson ce differs from binary at cycle {cycle}"
+            if ce:
+                assert n not in last or cycle - last[n] == n, f"n={n}: ce after {cycle - last[n]} cycles"
+                last[n] = cycle
+    assert len(last) == len(dut.prescalers), "Some prescalers never pulsed"
+
+@check("timer.prescalers")
+def timer_on_prescaler(dut):
+    ticks = []
+    for cycle in range(300):
+        yield
+        if (yield dut.timer.tick):
+            ticks.append(cycle)
+    assert {b - a for a, b in zip(ticks, ticks[1:])} == {dut.timer.cycles}, f"ticks at {ticks}"
@@ -0,0 +1,48 @@
+#
+# Access to the workshop designs from the common tools.
+#
+# The step scripts are not packages: load them by path as uniquely named modules.
+
+import os
+import sys
+import importlib.util
+
+from migen import Module
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def load(path, name):
+    sys.path.insert(0, os.path.dirname(path))
+    spec   = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def step0():
+    return load(os.path.join(root, "step0", "step0.py"), "step0")
+
+def step1():
+    return load(os.path.join(root, "step1", "solution", "step1.py"), "step1_solution")
+
+def step2_controller():
+    return load(os.path.join(root, "step2", "controller.py"), "step2_controller")
+
+# Module tree --------------------------------------------------------------------------------------
+
+def signal_name(sig):
+    name = getattr(sig, "name_override", None)
+    if name is None and getattr(sig, "backtrace", None):
+        name = sig.backtrace[-1][0]
+    return name or "anonymous"
+
+def walk(module, path="top"):
+    """Yield (path, module) for a not yet finalized design (finalization flattens the tree)."""
+    yield path, module
+    unnamed = 0
+    for name, submodule in getattr(module, "_submodules", []):
+        if not isinstance(submodule, Module):
+            continue
+        if name is None:
+            name = f"{type(submodule).__name__.lower()}{unnamed}"
+            unnamed += 1
+        yield from walk(submodule, f"{path}.{name}")
@@ -0,0 +1,65 @@
+#
+# N-digit seven segment display controller generator.
+#
+# Same behaviour as step1's SevenSegmentsController (digit[0] shows the most
+# significant nibble, digits rotate every refresh_count + 1 cycles) with:
+#  - any number of digits (value is 4*ndigits bits),
+#  - segment and digit polarities (the decode table is active low),
+#  - optional decimal points (one dp input bit per digit),
+#  - a refresh Timer (timer.py) sized from the clock period instead of Signal(32),
+#  - a binary digit index driving a nibble mux and a decode ROM instead of a
+#    Case on the one-hot digit.
+
+from migen import *
+
+from timer import Timer
+
+# Hex digit -> ABCDEFG (active low, segment A is bit 0).
+SEGMENTS = [
+    0b1000000, 0b1111001, 0b0100100, 0b0110000,
+    0b0011001, 0b0010010, 0b0000010, 0b1111000,
+    0b0000000, 0b0010000, 0b0001000, 0b0000011,
+    0b1000110, 0b0100001, 0b0000110, 0b0001110,
+]
+
+# SevenSegmentDisplay ------------------------------------------------------------------------------
+
+class SevenSegmentDisplay(Module):
+    def __init__(self, period_ns, ndigits=3, refresh_time=2,
+        segments_active_low = True,
+        digits_active_low   = False,
+        with_dp             = False):
+        self.value   = value   = Signal(4*ndigits)
+        self.digit   = digit   = Signal(ndigits, reset=0b1 ^ (2**ndigits - 1 if digits_active_low else 0))
+        self.abcdefg = abcdefg = Signal(7)
+        if with_dp:
+            self.dp_in = dp_in = Signal(ndigits)  # dp_in[i] lights the point of digit[i].
+            self.dp    = dp    = Signal()
+
+        # # #
+
+        # Refresh timer: counter sized from the clock period (refresh_time in ms).
+        self.refresh_count = refresh_count = int((refresh_time*1e6)/period_ns)
+        self.submodules.timer = timer = Timer((refresh_count + 1)*period_ns, period_ns)
+        index      = Signal(max=max(ndigits, 2))
+        next_index = Signal(max=max(ndigits, 2))
+
+        self.comb += next_index.eq(Mux(index == (ndigits - 1), 0, index + 1))
+
+        # Digit select: registered one-hot anodes, updated with the binary index.
+        digits = Array(Constant(1 << i, ndigits) for i in range(ndigits))
+        invert = 2**ndigits - 1 if digits_active_low else 0
+
+        self.sync += [
+            If(timer.tick,
+                index.eq(next_index),
+                digit.eq(digits[next_index] ^ invert),
+            )
+        ]
+
+        # Nibble mux and decode ROM.
+        nibbles  = Array(value[4*(ndigits - 1 - i):4*(ndigits - i)] for i in range(ndigits))
+        segments = Array(Constant(s, 7) for s in SEGMENTS)
+        self.comb += abcdefg.eq(segments[nibbles[index]] ^ (0 if segments_active_low else 0x7f))
+        if with_dp:
+            self.comb += dp.eq(Array(dp_in[i] for i in range(ndigits))[index] ^ (1 if segments_active_low else 0))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+#
+# Resource/timing report for the display controllers, synthesized with Yosys.
+#
+# Compares step1's SevenSegmentsController (3 digits) with SevenSegmentDisplay
+# for N = 3, 8 and 16 digits: 4-input LUTs, flip-flops and logic depth
+# (longest topological path between registers/ports, in LUT levels).
+#
+# ./display_report.py [--ndigits 3 8 16] [--csv report.csv]
+
+import os
+import re
+import csv
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from migen.fhdl import verilog
+
+from display import SevenSegmentDisplay
+import designs
+
+# Yosys --------------------------------------------------------------------------------------------
+
+_script = """
+read_verilog {filename}
+synth -top top -flatten -lut 4
+stat
+ltp -noff
+"""
+
+def synthesize(dut, ios):
+    if shutil.which("yosys") is None:
+        raise OSError("Unable to find Yosys, please make sure it is installed and in your PATH.")
+    with tempfile.TemporaryDirectory() as build_dir:
+        filename = os.path.join(build_dir, "top.v")
+        verilog.convert(dut, ios=ios, name="top").write(filename)
+        script = "; ".join(line for line in _script.format(filename=filename).splitlines() if line)
+        output = subprocess.run(["yosys", "-p", script], capture_output=True, text=True, check=True).stdout
+    cells = dict((name, int(n)) for n, name in re.findall(r"^\s+(\d+)\s+(\$\S+)\s*$", output, re.M))
+    cells.update((name, int(n)) for name, n in re.findall(r"^\s+(\$\S+)\s+(\d+)\s*$", output, re.M))
+    depth = re.search(r"Longest topological path in \S+ \(length=(\d+)\)", output)
+    return {
+        "luts":  sum(n for name, n in cells.items() if name == "$lut"),
+        "ffs":   sum(n for name, n in cells.items() if "DFF" in name),
+        "depth": int(depth.group(1)) if depth else None,
+    }
+
+# Report -------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Display controllers resource/timing report (Yosys).")
+    parser.add_argument("--ndigits",   default=[3, 8, 16], type=int, nargs="+", help="Digit counts.")
+    parser.add_argument("--period-ns", default=1e9/50e6,   type=float,          help="Clock period.")
+    parser.add_argument("--csv",       default=None,                            help="Write the report to a CSV file.")
+    args = parser.parse_args()
+
+    rows = []
+
+    step1 = designs.step1()
+    dut   = step1.SevenSegmentsController(args.period_ns)
+    rows.append(dict(design="SevenSegmentsController (step1)", ndigits=3,
+        **synthesize(dut, {dut.digit, dut.value, dut.abcdefg})))
+
+    for ndigits in args.ndigits:
+        dut = SevenSegmentDisplay(args.period_ns, ndigits=ndigits)
+        rows.append(dict(design="SevenSegmentDisplay", ndigits=ndigits,
+            **synthesize(dut, {dut.digit, dut.value, dut.abcdefg})))
+
+    baseline = rows[0]
+    print(f"{'design':34s} {'N':>3s} {'LUT4':>6s} {'FF':>6s} {'depth':>6s}")
+    for row in rows:
+        delta = ""
+        if row["ndigits"] == 3 and row is not baseline:
+            delta = f"  ({row['luts'] - baseline['luts']:+d} LUT, {row['ffs'] - baseline['ffs']:+d} FF vs step1)"
+        print(f"{row['design']:34s} {row['ndigits']:3d} {row['luts']:6d} {row['ffs']:6d} {str(row['depth']):>6s}{delta}")
+
+    if args.csv is not None:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+#
+# Formal verification of SevenSegmentsController with SymbiYosys (sby, yosys,
+# yosys-smtbmc and an SMT solver, all local: no network, no vendor tools).
+#
+# Each controller is converted to Verilog and wrapped in a generated harness
+# asserting, on every cycle and for any displayed value:
+#  - digit is one-hot,
+#  - digit rotates (digit[0] -> digit[1] -> digit[2] -> digit[0]) and each
+#    digit is shown for exactly refresh_count + 1 cycles,
+#  - abcdefg is the decode table entry (display.SEGMENTS) of the nibble of the
+#    displayed value selected by digit.
+# step1's controller takes the value as a free input; step2's (CSR variant)
+# gets it through a CSR bank, from free CSR bus writes. The properties are
+# proved by k-induction, for a small refresh_count (--refresh-count) as the
+# depth grows with it.
+#
+# Migen emits combinational logic as always @(*) blocks assigning dummy_d from
+# dummy_s in translate_off sections: they are removed from the Verilog read by
+# yosys. The decode Case is read with `proc -norom`: as a ROM, its content
+# would only be constrained in the initial state and be free in the induction
+# step, which then fails. sby and the yowasp-sby/yowasp-yosys wheels (pip) are
+# both supported; the solver is yices if installed, else z3.
+#
+# Results are cached in <build dir>/proofs.json by design hash (buildcache's
+# per-module hashes, the harness and the sby options): unchanged designs are
+# not proved again, and on a change the modules that changed are reported.
+#
+# ./formal.py                       # Both controllers.
+# ./formal.py -k step2 --force      # Prove again even if cached.
+# ./formal.py --generate            # Only write the sby projects.
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+import contextlib
+
+from migen import *
+from migen.fhdl import verilog
+
+import designs
+from buildcache import module_hashes
+from display import SEGMENTS
+
+# Designs ------------------------------------------------------------------------------------------
+
+class Target:
+    """Controller wrapped with its clock domain: inputs are free, value is the displayed value."""
+    def __init__(self, dut, inputs, value, submodules=[]):
+        self.top = top = Module()
+        top.submodules.dut = dut
+        for submodule in submodules:
+            top.submodules += submodule
+        top.clock_domains.cd_sys = ClockDomain()
+        self.dut    = dut
+        self.inputs = inputs
+        self.value  = value
+
+def _step1_controller(refresh_count):
+    # step1 has a fixed 2 ms refresh time: refresh_count comes from the clock period.
+    with contextlib.redirect_stdout(io.StringIO()):
+        dut = designs.step1().SevenSegmentsController(2e6/refresh_count)
+    return Target(dut, [dut.value], dut.value)
+
+def _step2_controller(refresh_count):
+    from litex.soc.interconnect import csr_bus
+    dut  = designs.step2_controller().SevenSegmentsController(1e6, refresh_time=refresh_count)
+    bank = csr_bus.CSRBank(dut.get_csrs(), bus=csr_bus.Interface(data_width=32))
+    return Target(dut, [bank.bus.adr, bank.bus.we, bank.bus.dat_w], dut.value.storage, [bank])
+
+DESIGNS = {
+    "step1.SevenSegmentsController": _step1_controller,
+    "step2.SevenSegmentsController": _step2_controller,
+}
+
+# Harness ------------------------------------------------------------------------------------------
+
+def harness(target, ns):
+    dut   = target.dut
+    R     = dut.refresh_count
+    ports = [("clk", target.top.cd_sys.clk), ("rst", target.top.cd_sys.rst)]
+    ports += [(ns.get_name(s), s) for s in target.inputs]
+    ports += [("digit", dut.digit), ("abcdefg", dut.abcdefg)]
+    if any(s is target.value for s in target.inputs):
+        shown = f"    assign shown = {ns.get_name(target.value)};\n"
+    else:
+        shown = ""
+        ports.append(("shown", target.value))
+    inputs  = "".join(f"    input [{len(s) - 1}:0] {ns.get_name(s)},\n" for s in target.inputs)
+    connect = ",\n".join(f"        .{ns.get_name(s)}({wire})" for wire, s in ports)
+    decode  = "\n".join(f"            4'h{i:x}: decode = 7'b{p:07b};" for i, p in enumerate(SEGMENTS))
+    width   = (R + 1).bit_length()
+    return f"""\
+// Properties of SevenSegmentsController (refresh_count = {R}), generated by formal.py.
+module harness(
+{inputs}    input clk
+);
+    wire [2:0]  digit;
+    wire [6:0]  abcdefg;
+    wire [{len(target.value) - 1}:0] shown;  // Displayed value.
+
+    // Reset on the first cycle: the output registers have no initial value.
+    reg rst = 1;
+    always @(posedge clk)
+        rst <= 0;
+
+    controller dut(
+{connect}
+    );
+{shown}
+    // Digit of the previous cycle and for how many cycles it was shown (after reset: digit[0], from the first cycle).
+    reg [2:0] last;
+    reg [{width - 1}:0] held;
+    always @(posedge clk) begin
+        if (rst) begin
+            last <= 3'b001;
+            held <= 0;
+        end else begin
+            last <= digit;
+            held <= (digit == last) ? held + 1 : 1;
+        end
+    end
+
+    // Hex digit -> abcdefg (active low).
+    function [6:0] decode(input [3:0] nibble);
+        case (nibble)
+{decode}
+        endcase
+    endfunction
+
+    wire [3:0] nibble = digit[0] ? shown[11:8] : digit[1] ? shown[7:4] : shown[3:0];
+
+    always @(*) begin
+        if (!rst) begin
+            assert (digit == 3'b001 || digit == 3'b010 || digit == 3'b100);
+            // Strengthening invariants: the induction step starts from states where they hold.
+            assert (last == 3'b001 || last == 3'b010 || last == 3'b100);
+            assert (held <= {R + 1});
+            if (digit != last) begin
+                assert (digit == {{last[1:0], last[2]}});
+                assert (held == {R + 1});
+            end else
+                assert (held <= {R});
+            assert (abcdefg == decode(nibble));
+        end
+    end
+endmodule
+"""
+
+def sby(name, depth, engine):
+    return f"""\
+[options]
+mode prove
+depth {depth}
+
+[engines]
+{engine}
+
+[script]
+read -formal controller.v
+read -formal harness.sv
+hierarchy -top harness
+proc -norom
+prep -top harness
+
+[files]
+controller.v
+harness.sv
+"""
+
+# Flow ---------------------------------------------------------------------------------------------
+
+def sby_command():
+    """sby command line (sby, or the yowasp-sby wheel with its yosys tools), None if not installed."""
+    if shutil.which("sby") is not None:
+        return ["sby"]
+    if shutil.which("yowasp-sby") is not None:
+        return ["yowasp-sby", "--yosys", "yowasp-yosys", "--smtbmc", "yowasp-yosys-smtbmc",
+            "--witness", "yowasp-yosys-witness"]
+    return None
+
+def default_engine():
+    return "smtbmc yices" if shutil.which("yices-smt2") is not None else "smtbmc z3"
+
+def tool_versions(command):
+    versions = {}
+    yosys = "yowasp-yosys" if command[0] == "yowasp-sby" else "yosys"
+    for tool, flag in [(yosys, "-V"), (command[0], "--version")]:
+        try:
+            out = subprocess.run([tool, flag], capture_output=True, text=True).stdout
+            versions[tool] = out.strip().splitlines()[0] if out.strip() else "unknown"
+        except OSError:
+            versions[tool] = None
+    return versions
+
+def generate(name, target, work_dir, depth, engine):
+    """Writes the sby project of `target`; returns its design key and module hashes."""
+    modules = module_hashes(target.top)
+    ios     = {target.top.cd_sys.clk, target.top.cd_sys.rst, target.dut.digit, target.dut.abcdefg, target.value}
+    conv    = verilog.convert(target.top, ios=ios | set(target.inputs), name="controller",
+        create_clock_domains=False)
+    # Simulation only (dummy_s/dummy_d of the always @(*) blocks).
+    controller = re.sub(r"// synthesis translate_off\n.*?// synthesis translate_on\n", "", str(conv), flags=re.S)
+    files = {
+        "controller.v":  controller,
+        "harness.sv":    harness(target, conv.ns),
+        f"{name}.sby":   sby(name, depth, engine),
+    }
+    os.makedirs(work_dir, exist_ok=True)
+    for filename, content in files.items():
+        with open(os.path.join(work_dir, filename), "w") as f:
+            f.write(content)
+    key = hashlib.sha256(json.dumps([modules, files["harness.sv"], files[f"{name}.sby"]],
+        sort_keys=True).encode()).hexdigest()[:16]
+    return key, modules
+
+def prove(command, name, work_dir):
+    """Runs sby; returns (PASS/FAIL/UNKNOWN/ERROR, counterexample traces)."""
+    subprocess.run(command + ["-f", f"{name}.sby"], cwd=work_dir, capture_output=True)
+    status = "ERROR"
+    result = os.path.join(work_dir, name)
+    if os.path.exists(os.path.join(result, "status")):
+        with open(os.path.join(result, "status")) as f:
+            status = f.read().split()[0]
+    traces = []
+    for root, _, files in os.walk(result):
+        traces += [os.path.join(root, f) for f in sorted(files) if f.endswith(".vcd")]
+    return status, traces
+
+def main():
+    parser = argparse.ArgumentParser(description="Formal verification of SevenSegmentsController (SymbiYosys).")
+    parser.add_argument("-k",              default=None,                 help="Only the designs containing this substring.")
+    parser.add_argument("--refresh-count", default=4, type=int,          help="Refresh count of the proved controllers.")
+    parser.add_argument("--engine",        default=None,                 help="sby engine line (default: smtbmc yices, or z3).")
+    parser.add_argument("--build-dir",     default="build/formal",       help="sby projects and proof cache.")
+    parser.add_argument("--force",         action="store_true",          help="Prove even if the cached proof matches.")
+    parser.add_argument("--generate",      action="store_true",          help="Only write the sby projects.")
+    args = parser.parse_args()
+
+    cache_path = os.path.join(args.build_dir, "proofs.json")
+    cache = {"variants": {}, "proofs": {}}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    # Each digit transition is checked against a whole rotation: the induction depth must cover two digits.
+    depth     = 2*(args.refresh_count + 1) + 2
+    engine    = args.engine or default_engine()
+    command   = sby_command()
+    tools     = tool_versions(command) if command is not None else {}
+    failed    = False
+    unproved  = False
+    for name, build in DESIGNS.items():
+        if args.k is not None and args.k not in name:
+            continue
+        target   = build(args.refresh_count)
+        work_dir = os.path.join(args.build_dir, name)
+        key, modules = generate(name, target, work_dir, depth, engine)
+        cached = cache["proofs"].get(key)
+        if args.generate:
+            print(f"[formal] {name}: {work_dir}/{name}.sby written (design {key})")
+            continue
+        if cached is not None and not args.force:
+            print(f"[formal] {name}: {cached['status']} (cached, design {key} unchanged)")
+            failed |= cached["status"] != "PASS"
+            continue
+
+        previous = cache["proofs"].get(cache["variants"].get(name), {}).get("modules", {})
+        for path in sorted(set(previous) | set(modules)):
+            if previous.get(path) != modules.get(path):
+                print(f"[formal] {name}: {'added' if path not in previous else 'removed' if path not in modules else 'changed'}: {path}")
+        if command is None:
+            print(f"[formal] {name}: not proved, sby not found (SymbiYosys or pip install yowasp-yosys, project in {work_dir})")
+            unproved = True
+            continue
+
+        start = time.perf_counter()
+        status, traces = prove(command, name, work_dir)
+        elapsed = time.perf_counter() - start
+        print(f"[formal] {name}: {status} in {elapsed:.1f}s (refresh_count={target.dut.refresh_count}, depth {depth})")
+        for trace in traces:
+            print(f"  counterexample: {trace}")
+        failed |= status != "PASS"
+        if status in ["PASS", "FAIL"]:
+            cache["variants"][name] = key
+            cache["proofs"][key] = {"design": name, "status": status, "modules": modules, "tools": tools,
+                "time_s": round(elapsed, 2), "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+            with open(cache_path, "w") as f:
+                json.dump(cache, f, indent=1)
+
+    if failed:
+        sys.exit(1)
+    if unproved:
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
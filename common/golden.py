@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+#
+# NumPy golden model of SevenSegment / SevenSegmentsController and a bulk
+# equivalence checker against simulation traces.
+#
+# The model is vectorized: expected outputs are computed for whole arrays of
+# values and cycle counts at once (broadcasting), and traces are compared as
+# arrays, so checking every 12-bit value over full refresh cycles costs a few
+# milliseconds, not a Python loop per cycle.
+#
+# Needs NumPy (pip install numpy), on top of the workshop's Migen/LiteX.
+#
+# ./golden.py [--fast]
+
+import sys
+import time
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("golden.py needs NumPy: pip install numpy")
+
+import designs
+import display
+
+# Reference table ----------------------------------------------------------------------------------
+
+# Hex digit -> ABCDEFG: the table of the regression and formal checks (display.SEGMENTS).
+SEGMENTS = np.array(display.SEGMENTS, dtype=np.uint8)
+
+# Golden model -------------------------------------------------------------------------------------
+
+def seven_segment(values):
+    return SEGMENTS[np.asarray(values) & 0xf]
+
+def digit(cycles, refresh_count, ndigits=3):
+    """One-hot digit after `cycles` clock edges: rotates every refresh_count + 1 cycles."""
+    rotations = np.asarray(cycles) // (refresh_count + 1)
+    return (1 << (rotations % ndigits)).astype(np.uint8)
+
+def nibble(values, digits, ndigits=3):
+    """Nibble displayed for one-hot `digits`: digit[0] shows the most significant one."""
+    index = np.log2(np.asarray(digits)).astype(np.int64)
+    return (np.asarray(values) >> (4*(ndigits - 1 - index))) & 0xf
+
+def controller(values, cycles, refresh_count, ndigits=3):
+    """Expected (digit, abcdefg); values and cycles broadcast against each other."""
+    d = digit(cycles, refresh_count, ndigits)
+    return np.broadcast_to(d, np.broadcast(values, d).shape), seven_segment(nibble(values, d, ndigits))
+
+# Traces -------------------------------------------------------------------------------------------
+
+def trace_controller(dut, values, cycles_per_value, storage=None, fast=False):
+    """Simulate `dut` for each value and return the (cycle, value, digit, abcdefg) arrays."""
+    from sim import simulate
+    value = dut.value if storage is None else storage
+    trace = np.zeros((4, len(values)*cycles_per_value), dtype=np.int64)
+    def bench():
+        n = 0
+        for v in values:
+            yield value.eq(int(v))
+            for _ in range(cycles_per_value):
+                yield
+                trace[:, n] = [n + 1, (yield value), (yield dut.digit), (yield dut.abcdefg)]
+                n += 1
+    ios = None if storage is not None else {dut.digit, dut.value, dut.abcdefg}
+    simulate(dut, bench(), ios=ios, fast=fast, vcd_name=None)
+    return trace
+
+def check_controller(name, trace, refresh_count, ndigits=3):
+    start = time.perf_counter()
+    cycles, values, digits, abcdefg = trace
+    expected_digits, expected_abcdefg = controller(values, cycles, refresh_count, ndigits)
+    digit_errors  = int(np.count_nonzero(expected_digits != digits))
+    decode_errors = int(np.count_nonzero(expected_abcdefg != abcdefg))
+    elapsed = time.perf_counter() - start
+
+    ok = digit_errors == 0 and decode_errors == 0
+    print(f"{name}: {trace.shape[1]} cycles, {digit_errors} digit / {decode_errors} decode mismatches, "
+          f"compared in {elapsed*1e3:.1f} ms -> {'OK' if ok else 'FAIL'}")
+    return ok
+
+def check_seven_segment(name, dut, fast=False):
+    from sim import simulate
+    outputs = []
+    def bench():
+        for v in range(16):
+            yield dut.value.eq(v)
+            yield
+            outputs.append((yield dut.abcdefg))
+    simulate(dut, bench(), ios={dut.value, dut.abcdefg}, fast=fast, vcd_name=None)
+    errors = int(np.count_nonzero(np.array(outputs) != SEGMENTS))
+    print(f"{name}: 16 values, {errors} mismatches -> {'OK' if errors == 0 else 'FAIL'}")
+    return errors == 0
+
+# Checks -------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the seven segment designs against the golden model.")
+    parser.add_argument("--fast",   action="store_true", help="Use the Verilator backend (Signal variant only).")
+    parser.add_argument("--values", default=4096, type=int, help="Number of 12-bit values to check.")
+    args = parser.parse_args()
+
+    step1 = designs.step1()
+    step2 = designs.step2_controller()
+
+    values = np.arange(args.values) & 0xfff
+    ok = True
+
+    ok &= check_seven_segment("step1 SevenSegment", step1.SevenSegment(), fast=args.fast)
+    ok &= check_seven_segment("step2 SevenSegment", step2.SevenSegment(), fast=args.fast)
+
+    # 1 us clock period: refresh_count = 2, so a full refresh cycle is 9 clocks.
+    dut = step1.SevenSegmentsController(1e3*1e3)
+    n   = 3*(dut.refresh_count + 1)
+    ok &= check_controller("step1 SevenSegmentsController",
+        trace_controller(dut, values, n, fast=args.fast), dut.refresh_count)
+
+    dut = step2.SevenSegmentsController(1e3*1e3)
+    ok &= check_controller("step2 SevenSegmentsController (CSR)",
+        trace_controller(dut, values, n, storage=dut.value.storage), dut.refresh_count)
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+#
+# Parallel regression runner for the self-checking simulations of checks.py.
+#
+# Checks are grouped by design: a worker elaborates a design once and runs all
+# of its checks on copies of the elaborated fragment. Groups are spread over
+# --jobs worker processes and can be split across machines with --shard K/N
+# (group i runs in shard i % N + 1). Each check reports its simulated cycles
+# per second; --json saves the results and --baseline compares them to a
+# previous run, flagging checks that got slower than --slowdown.
+#
+# The test scripts (common/test_*.py, step2/test_*.py: build caches, sweep
+# orchestration) are run too, one group per script, their tests reported as
+# <script>::<test>.
+#
+# ./regress.py                          # All checks, one worker per core.
+# ./regress.py -k step2 --jobs 4
+# ./regress.py --shard 1/2 --json shard1.json
+# ./regress.py --baseline results.json  # Flags simulation slowdowns.
+
+import io
+import os
+import re
+import sys
+import glob
+import json
+import time
+import fnmatch
+import argparse
+import traceback
+import contextlib
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from migen.fhdl.structure import _Fragment
+
+# Design cache -------------------------------------------------------------------------------------
+
+_designs = {}
+
+def elaborate(name):
+    """(dut, fragment, elaboration time) of a DESIGNS entry, built once per process."""
+    from checks import DESIGNS
+    if name not in _designs:
+        start    = time.perf_counter()
+        dut      = DESIGNS[name]()
+        fragment = dut.get_fragment()
+        _designs[name] = dut, fragment, time.perf_counter() - start
+    return _designs[name]
+
+def copy_fragment(f):
+    # The simulator lowers specials and adds clock domains in place.
+    return _Fragment(list(f.comb), {cd: list(s) for cd, s in f.sync.items()}, set(f.specials), list(f.clock_domains))
+
+# Worker -------------------------------------------------------------------------------------------
+
+def run_check(check):
+    from sim import simulate
+    dut, fragment, _ = elaborate(check.design)
+    result = dict(name=check.name, design=check.design, status="ok", cycles=0, time_s=0.0)
+    try:
+        cycles, elapsed = simulate(copy_fragment(fragment), check.function(dut),
+            clocks   = check.clocks,
+            vcd_name = None,
+            verbose  = False)
+        result.update(cycles=cycles, time_s=elapsed, cycles_per_s=cycles/elapsed if elapsed else 0)
+    except AssertionError as e:
+        result["status"] = f"FAIL: {e}"
+    except Exception as e:
+        result["status"] = f"ERROR: {type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    return result
+
+# Test scripts -------------------------------------------------------------------------------------
+
+ROOT    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRIPTS = [os.path.join("common", "test_*.py"), os.path.join("step2", "test_*.py")]
+
+def test_scripts():
+    """{script: [test names]}, scripts relative to the repository root."""
+    scripts = {}
+    for pattern in SCRIPTS:
+        for filename in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            script = os.path.relpath(filename, ROOT)
+            with open(filename) as f:
+                scripts[script] = [f"{script}::{test}" for test in re.findall(r"^def (test_\w+)\(", f.read(), re.M)]
+    return scripts
+
+def run_script(script, names):
+    # The scripts print "<test>: ok" or "<test>: FAIL <reason>" per test.
+    start   = time.perf_counter()
+    process = subprocess.run([sys.executable, os.path.basename(script)], cwd=os.path.join(ROOT, os.path.dirname(script)),
+        capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    status  = dict(re.findall(r"^(test_\w+): (.*)$", process.stdout, re.M))
+    results = []
+    for name in names:
+        # Time of the whole script, shared by its tests.
+        result = dict(name=name, design=script, status="ok", cycles=0, time_s=elapsed/len(names))
+        line   = status.get(name.split("::")[1])
+        if line is None:
+            result["status"]    = f"ERROR: {script} exited with {process.returncode}"
+            result["traceback"] = process.stderr
+        elif line != "ok":
+            result["status"] = "FAIL: " + line[len("FAIL "):]
+        results.append(result)
+    return results
+
+def run_group(design, names):
+    if design in test_scripts():
+        return run_script(design, names)
+    from checks import CHECKS
+    # The designs print on elaboration (step1): keep the report readable.
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            _, _, elaboration = elaborate(design)
+        except Exception as e:
+            return [dict(name=name, design=design, status=f"ERROR: elaboration: {e}", cycles=0, time_s=0.0)
+                for name in names]
+        results = [run_check(CHECKS[name]) for name in names]
+    for result in results:
+        result["elaboration_s"] = elaboration
+    return results
+
+# Runner -------------------------------------------------------------------------------------------
+
+def select(pattern=None, shard=(1, 1)):
+    """{design: [check names]} of this shard."""
+    from checks import CHECKS
+    tests  = [(name, check.design) for name, check in CHECKS.items()]
+    tests += [(name, script) for script, names in test_scripts().items() for name in names]
+    groups = {}
+    for name, design in tests:
+        if pattern is None or pattern in name or fnmatch.fnmatch(name, pattern):
+            groups.setdefault(design, []).append(name)
+    k, n = shard
+    return {design: names for i, (design, names) in enumerate(sorted(groups.items())) if i % n == k - 1}
+
+def run(groups, jobs):
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_group, design, names) for design, names in groups.items()]
+        for future in futures:
+            for result in future.result():
+                speed = f"{result['cycles_per_s']:8.0f} cycles/s" if "cycles_per_s" in result else ""
+                print(f"{result['name']:60s} {result['status'][:32]:32s} {result['cycles']:7d} cycles "
+                      f"{result['time_s']:6.2f}s {speed}")
+                results.append(result)
+    return results
+
+def compare(results, baseline, slowdown):
+    """Checks simulating slower than `slowdown` x their baseline speed."""
+    previous = {r["name"]: r for r in baseline if "cycles_per_s" in r}
+    slower   = []
+    for result in results:
+        if "cycles_per_s" in result and result["name"] in previous:
+            ratio = result["cycles_per_s"]/previous[result["name"]]["cycles_per_s"]
+            if ratio < slowdown:
+                slower.append((result["name"], ratio))
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description="Workshop designs regression (Migen simulation).")
+    parser.add_argument("-k",          default=None,                 help="Only the checks matching this substring/pattern.")
+    parser.add_argument("--jobs",      default=os.cpu_count(), type=int, help="Worker processes.")
+    parser.add_argument("--shard",     default="1/1",                help="K/N: run the K-th of N shards.")
+    parser.add_argument("--json",      default=None,                 help="Save the results to a JSON file.")
+    parser.add_argument("--baseline",  default=None,                 help="Previous --json results to compare speeds to.")
+    parser.add_argument("--slowdown",  default=0.8, type=float,      help="Flag checks below this fraction of their baseline speed.")
+    parser.add_argument("--list",      action="store_true",          help="List the selected checks and exit.")
+    args = parser.parse_args()
+
+    k, n   = [int(x) for x in args.shard.split("/")]
+    groups = select(args.k, (k, n))
+    if args.list:
+        for design, names in groups.items():
+            print("\n".join(names))
+        return
+
+    start   = time.perf_counter()
+    results = run(groups, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r["status"] != "ok"]
+    cycles = sum(r["cycles"] for r in results)
+    scripts = sum(design.endswith(".py") for design in groups)
+    print(f"{len(results) - len(failed)}/{len(results)} checks passed, {len(groups) - scripts} designs, "
+          f"{scripts} test scripts, "
+          f"{cycles} cycles in {elapsed:.2f}s with {args.jobs} jobs")
+    for result in failed:
+        print(f"{result['name']}: {result['status']}")
+        if "traceback" in result:
+            print(result["traceback"])
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            slower = compare(results, json.load(f), args.slowdown)
+        for name, ratio in slower:
+            print(f"slower: {name} at {ratio:.0%} of its baseline cycles/s")
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
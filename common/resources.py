@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+#
+# Elaboration-time resource estimation.
+#
+# Walks the module tree of a design before finalization and reports, for each
+# module's own logic: flip-flops (bits assigned in sync statements, plus the
+# CSRStorage/CSRStatus registers of its AutoCSR attributes, which are not
+# submodules and are only finalized by the CSR bank), adder and comparator
+# widths and memory bits. Counters that are incremented and compared
+# to a constant are checked against the width the constant actually needs, so
+# oversized counters show up before Quartus runs.
+#
+# ./resources.py
+
+from migen import *
+from migen.fhdl.structure import _Operator
+from migen.fhdl.visit import NodeVisitor
+from migen.fhdl.tools import list_targets
+from migen.fhdl.bitcontainer import value_bits_sign, bits_for
+from migen.fhdl.specials import Memory
+
+from litex.soc.interconnect.csr import CSRStatus, CSRStorage
+
+import designs
+
+# Estimator ----------------------------------------------------------------------------------------
+
+class _Estimator(NodeVisitor):
+    def __init__(self):
+        self.adders      = []
+        self.comparators = []
+        self.increments  = set()
+        self.limits      = {}
+
+    def visit_Assign(self, node):
+        r = node.r
+        if isinstance(node.l, Signal) and isinstance(r, _Operator) and r.op == "+" and any(o is node.l for o in r.operands):
+            self.increments.add(node.l)
+        NodeVisitor.visit_Assign(self, node)
+
+    def visit_Operator(self, node):
+        if node.op in ["+", "-"]:
+            self.adders.append(value_bits_sign(node)[0])
+        elif node.op in ["==", "!=", "<", "<=", ">", ">="]:
+            self.comparators.append(max(value_bits_sign(o)[0] for o in node.operands))
+            a, b = node.operands
+            for sig, const in [(a, b), (b, a)]:
+                if isinstance(sig, Signal) and isinstance(const, Constant):
+                    self.limits[sig] = max(self.limits.get(sig, 0), const.value)
+        NodeVisitor.visit_Operator(self, node)
+
+def csr_bits(module):
+    """Register bits of the module's own CSRs (storage of CSRStorage, status of CSRStatus)."""
+    bits = 0
+    for value in vars(module).values():
+        if isinstance(value, CSRStorage):
+            bits += len(value.storage)
+        elif isinstance(value, CSRStatus):
+            bits += len(value.status)
+    return bits
+
+def estimate_module(module):
+    fragment  = module._fragment
+    estimator = _Estimator()
+    estimator.visit(fragment.comb)
+    flip_flops = set()
+    for statements in fragment.sync.values():
+        estimator.visit(statements)
+        flip_flops |= list_targets(statements)
+    memory_bits = sum(s.width*s.depth for s in fragment.specials if isinstance(s, Memory))
+    oversized = []
+    for sig in sorted(estimator.increments & set(estimator.limits), key=lambda s: s.duid):
+        needed = bits_for(estimator.limits[sig])
+        if sig in flip_flops and len(sig) > needed:
+            oversized.append((sig, needed))
+    csr_ffs = csr_bits(module)
+    return {
+        "ffs":         sum(len(s) for s in flip_flops) + csr_ffs,
+        "csr_ffs":     csr_ffs,
+        "adders":      sorted(estimator.adders, reverse=True),
+        "comparators": sorted(estimator.comparators, reverse=True),
+        "memory_bits": memory_bits,
+        "oversized":   oversized,
+    }
+
+def estimate(design):
+    report = {}
+    for path, module in designs.walk(design):
+        report[path] = estimate_module(module)
+    return report
+
+def print_report(name, design):
+    print(f"{name}:")
+    total = 0
+    for path, r in estimate(design).items():
+        total += r["ffs"]
+        adders = ",".join(str(w) for w in r["adders"]) or "-"
+        print(f"  {path:40s} FF {r['ffs']:4d}  adders [{adders}]  compare [{len(r['comparators'])}]"
+              + (f"  csr {r['csr_ffs']} FFs" if r["csr_ffs"] else "")
+              + (f"  mem {r['memory_bits']} bits" if r["memory_bits"] else ""))
+        for sig, needed in r["oversized"]:
+            print(f"    ! counter {designs.signal_name(sig)} is {len(sig)} bits, {needed} needed")
+    print(f"  {'total':40s} FF {total:4d}")
+
+# Designs ------------------------------------------------------------------------------------------
+
+def main():
+    from display import SevenSegmentDisplay
+    from litex_boards.platforms import qmtech_ep4ce15_starter_kit
+
+    step0 = designs.step0()
+    print_report("step0 Tuto", step0.Tuto(qmtech_ep4ce15_starter_kit.Platform()))
+
+    step1 = designs.step1()
+    print_report("step1 Step1", step1.Step1(qmtech_ep4ce15_starter_kit.Platform()))
+
+    step2 = designs.step2_controller()
+    print_report("step2 SevenSegmentsController", step2.SevenSegmentsController(1e9/50e6))
+
+    print_report("SevenSegmentDisplay (8 digits)", SevenSegmentDisplay(1e9/50e6, ndigits=8))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#
+# Simulation entry point shared by the workshop designs.
+#
+# Runs a testbench with Migen's Python simulator or, with fast=True, with the
+# Verilator backend (see vsim.py) and reports the simulated cycles per second.
+# Multi-clock designs pass {domain: generator} and a period per domain in
+# `clocks` (Migen only); cycles are counted in sys. A domain can also run a
+# list of generators (Migen only): the first one is the bench, counting the
+# cycles, the others are usually passive monitors.
+# Migen runs use simsnap.SnapshotSimulator: testbenches can yield
+# FastForward(n) to skip idle counting stretches, and the design state can be
+# saved at the end of a run (`snapshot`) and loaded at the start of another
+# (`restore`). They trace through vcd.TraceWriter (signal filter, cycle window,
+# decimation, gzip/FST output) and can be profiled (simprof.py): time spent in
+# setup (finalization), testbench, sync/comb evaluation and tracing, per-signal
+# evaluation counts, and a flame graph profile (folded stacks) in `profile`.
+
+import argparse
+import time
+
+from migen import *
+from migen.fhdl.tools import list_signals
+
+from vcd import TraceWriter
+from simsnap import FastForward, SnapshotSimulator
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def _count_cycles(generator, counter, expand=False):
+    reply = None
+    while True:
+        try:
+            cmd = generator.send(reply)
+        except StopIteration:
+            return
+        if cmd is None:
+            counter[0] += 1
+        elif isinstance(cmd, FastForward):
+            counter[0] += cmd.cycles
+            if expand:
+                # Backend without fast-forward: wait cycle by cycle.
+                for _ in range(cmd.cycles):
+                    yield
+                reply = None
+                continue
+        reply = yield cmd
+
+def _counted(generators, counter, expand=False):
+    if isinstance(generators, list):
+        return [_count_cycles(generators[0], counter, expand)] + generators[1:]
+    return _count_cycles(generators, counter, expand)
+
+def _window(arg):
+    start, _, stop = arg.partition(":")
+    return (int(start or 0), int(stop) if stop else None)
+
+def sim_options(argv):
+    parser = argparse.ArgumentParser(description="Simulation options.")
+    parser.add_argument("--fast",     action="store_true",    help="Use the Verilator backend.")
+    parser.add_argument("--vcd",      default="sim.vcd",      help="Trace file (.vcd, .vcd.gz or .fst), \"none\" to disable.")
+    parser.add_argument("--trace",    default=None,           help="Comma separated names (or patterns) of the signals to record.")
+    parser.add_argument("--window",   default=None,           help="Cycle window to record, START:STOP.")
+    parser.add_argument("--decimate", default=1, type=int,    help="Record every Nth cycle.")
+    parser.add_argument("--profile",  default=None,           help="Profile the simulation, write folded stacks to this file.")
+    parser.add_argument("--snapshot", default=None,           help="Save the design state at the end of the simulation.")
+    parser.add_argument("--restore",  default=None,           help="Start the simulation from a saved design state.")
+    parser.add_argument("--no-fast-forward", action="store_true", help="Simulate FastForward(n) waits cycle by cycle.")
+    args, _ = parser.parse_known_args(argv)
+    return dict(
+        fast         = args.fast,
+        vcd_name     = None if args.vcd == "none" else args.vcd,
+        trace        = args.trace.split(",") if args.trace else None,
+        window       = _window(args.window) if args.window else None,
+        decimate     = args.decimate,
+        profile      = args.profile,
+        snapshot     = args.snapshot,
+        restore      = args.restore,
+        fast_forward = not args.no_fast_forward,
+    )
+
+# Simulate -----------------------------------------------------------------------------------------
+
+def simulate(dut, generator, ios=None, fast=False, vcd_name="sim.vcd",
+    trace        = None,
+    window       = None,
+    decimate     = 1,
+    clocks       = {"sys": 10},
+    profile      = None,
+    snapshot     = None,
+    restore      = None,
+    fast_forward = True,
+    verbose      = True):
+    cycles = [0]
+    if fast and isinstance(generator, (dict, list)):
+        raise ValueError("The Verilator backend only runs single generator testbenches.")
+    if isinstance(generator, dict):
+        names     = {cd: getattr(g, "__name__", "bench") for cd, g in generator.items()}
+        generator = dict(generator, sys=_counted(generator["sys"], cycles))
+    else:
+        names     = {"sys": getattr(generator, "__name__", "bench")}
+        generator = _counted(generator, cycles, expand=fast)
+    if fast and (profile, snapshot, restore) != (None, None, None):
+        raise ValueError("Only Migen simulations can be profiled, saved or restored.")
+    if fast:
+        from vsim import VerilatorSim
+        backend = "verilator"
+        vsim = VerilatorSim(dut, ios)
+        start = time.perf_counter()
+        vsim.run(generator)
+    else:
+        backend = "migen"
+        writer  = None
+        start = time.perf_counter()
+        if profile is not None:
+            from simprof import ProfiledSimulator
+            s = ProfiledSimulator(dut, generator, names=names, clocks=clocks, fast_forward=fast_forward)
+        else:
+            s = SnapshotSimulator(dut, generator, clocks=clocks, fast_forward=fast_forward)
+        with s:
+            if restore is not None:
+                restored = s.restore(restore)
+            if vcd_name is not None:
+                signals = list_signals(s.fragment)
+                for cd in s.fragment.clock_domains:
+                    signals |= {s for s in [cd.clk, cd.rst] if s is not None}
+                s.vcd = writer = TraceWriter(vcd_name, signals,
+                    period   = clocks["sys"],
+                    trace    = trace,
+                    window   = window,
+                    decimate = decimate)
+            s.run()
+            if snapshot is not None:
+                s.snapshot(snapshot)
+    elapsed = time.perf_counter() - start
+    if not verbose:
+        return cycles[0], elapsed
+    print(f"[{backend}] {cycles[0]} cycles in {elapsed:.3f}s ({cycles[0]/elapsed:.0f} cycles/s)")
+    if not fast:
+        if restore is not None:
+            print(f"[snapshot] Started from {restore} (taken on cycle {restored})")
+        if snapshot is not None:
+            print(f"[snapshot] State after {s.cycles} cycles written to {snapshot}")
+        if s.skipped:
+            print(f"[fast-forward] {s.skipped} of {s.cycles} cycles skipped")
+    if not fast and writer is not None:
+        print(f"[vcd] {writer.nbytes} bytes written to {vcd_name}, "
+              f"{writer.trace_time:.3f}s of {elapsed:.3f}s spent tracing")
+    if profile is not None:
+        print(s.profile.report())
+        s.profile.write(profile)
+        print(f"[profile] Folded stacks written to {profile}")
+    return cycles[0], elapsed
@@ -0,0 +1,120 @@
+#
+# Profiling layer for Migen simulations (sim.simulate(..., profile=...)).
+#
+# ProfiledSimulator is the simulator of sim.simulate (simsnap.SnapshotSimulator)
+# with the steps of its main loop timed by category:
+#  - setup:       design finalization (do_finalize, finalize-time logic), then
+#                 memory/special lowering and evaluator setup; the design's
+#                 constructor runs before sim.simulate and is not included,
+#  - testbench:   the bench generators (including their signal reads/writes),
+#  - sync:        clocked statements, per clock domain,
+#  - comb:        combinatorial propagation after each clock edge,
+#  - vcd:         trace writer calls,
+#  - fast_forward: idle cycle detection and skipping.
+# It also counts the assignments of every signal (how often the evaluator
+# computes it) and the comb propagation passes. The profile is printed and
+# written as folded stacks ("simulate;run;comb 1234", microseconds), the input
+# format of flamegraph.pl / speedscope / inferno.
+#
+#   ./step1.py sim --profile sim.folded
+#   flamegraph.pl sim.folded > sim.svg
+
+import time
+import collections
+
+from migen.fhdl.structure import Signal, _Fragment
+from migen.fhdl.namer import build_namespace
+
+from simsnap import SnapshotSimulator
+
+# Profile ------------------------------------------------------------------------------------------
+
+class Profile:
+    def __init__(self):
+        self.times       = collections.Counter()  # Folded stack -> seconds.
+        self.assignments = collections.Counter()  # Signal -> assignments.
+        self.comb_passes = 0
+        self.cycles      = 0  # Simulated (not skipped) sys cycles.
+
+    def folded(self):
+        return "".join(f"{stack} {int(t*1e6)}\n" for stack, t in sorted(self.times.items()) if int(t*1e6))
+
+    def report(self, top=10):
+        total = sum(self.times.values())
+        lines = [f"[profile] {total:.3f}s"]
+        for stack, t in sorted(self.times.items(), key=lambda x: -x[1]):
+            lines.append(f"  {stack.replace('simulate;', ''):40s} {t:8.3f}s {t/total:6.1%}")
+        signals = list(self.assignments)
+        ns      = build_namespace(signals)
+        evals   = sum(self.assignments.values())
+        lines.append(f"[profile] {evals} signal assignments, {self.comb_passes} comb passes"
+                     + (f" ({self.comb_passes/self.cycles:.1f}/simulated cycle)" if self.cycles else ""))
+        for signal, n in self.assignments.most_common(top):
+            lines.append(f"  {ns.get_name(signal):40s} {n:10d}")
+        return "\n".join(lines)
+
+    def write(self, filename):
+        with open(filename, "w") as f:
+            f.write(self.folded())
+
+# Simulator ----------------------------------------------------------------------------------------
+
+class ProfiledSimulator(SnapshotSimulator):
+    def __init__(self, fragment_or_module, generators, names={}, **kwargs):
+        self.profile = profile = Profile()
+        self.names   = names
+        if not isinstance(fragment_or_module, _Fragment):
+            fragment_or_module = self._timed("simulate;setup;finalize", fragment_or_module.get_fragment)
+        self._timed("simulate;setup;simulator", SnapshotSimulator.__init__, self, fragment_or_module, generators,
+            **kwargs)
+
+        # Count the assignments to each signal (slices and concatenations end on signals).
+        assign = self.evaluator.assign
+        def counting_assign(node, value):
+            if isinstance(node, Signal):
+                profile.assignments[node] += 1
+            assign(node, value)
+        self.evaluator.assign = counting_assign
+
+    def _timed(self, stack, function, *args, **kwargs):
+        start = time.perf_counter()
+        r = function(*args, **kwargs)
+        self.profile.times[stack] += time.perf_counter() - start
+        return r
+
+    # Timed loop steps (simsnap.SnapshotSimulator.run) ---------------------------------------------
+
+    def _delay(self, dt):
+        self._timed("simulate;run;vcd", SnapshotSimulator._delay, self, dt)
+
+    def _execute_sync(self, cd):
+        self._timed(f"simulate;run;sync;{cd}", SnapshotSimulator._execute_sync, self, cd)
+
+    def _execute_comb(self):
+        self.profile.comb_passes += 1
+        SnapshotSimulator._execute_comb(self)
+
+    def _comb_propagate(self):
+        return self._timed("simulate;run;comb", SnapshotSimulator._comb_propagate, self)
+
+    def _trace(self, signals):
+        self._timed("simulate;run;vcd", SnapshotSimulator._trace, self, signals)
+
+    def _process_generators(self, cd):
+        self._timed(f"simulate;run;testbench;{cd};{self.names.get(cd, 'bench')}",
+            SnapshotSimulator._process_generators, self, cd)
+
+    def _sys_edge(self):
+        self.profile.cycles += 1
+        self._timed("simulate;run;fast_forward", SnapshotSimulator._sys_edge, self)
+
+    def run(self):
+        start = time.perf_counter()
+        SnapshotSimulator.run(self)
+        # Time not spent in the timed categories: clock ticks, loop overhead.
+        run = time.perf_counter() - start
+        self.profile.times["simulate;run;other"] += run - sum(t for stack, t in self.profile.times.items()
+            if stack.startswith("simulate;run;"))
+
+    def close(self):
+        self._timed("simulate;close;vcd", SnapshotSimulator.close, self)
@@ -0,0 +1,269 @@
+#
+# Snapshot/restore and fast-forward for long Migen simulations (used by sim.simulate).
+#
+# Testbench commands, yielded like signals and statements:
+#  - FastForward(n): wait n cycles, like n bare `yield`s. While every generator
+#    waits, stretches where only free-running counters change are skipped: the
+#    counters jump straight to their next compare value.
+#  - Snapshot(filename): write the design state (all signals, memories) to disk.
+#  - Restore(filename): load it back, on a later cycle or in another run of the
+#    same design.
+#
+# A free-running counter is a sync signal only ever incremented by one, loaded
+# and compared (==, !=) to constants (Timer, Prescaler, step1's count). After a
+# cycle where only such counters changed, each by +1, the next cycles behave
+# the same until one of them reaches a compare value (or wraps): that many
+# cycles are skipped at once. Skipped cycles do not appear in the trace, the
+# counters jump in it. Fast-forward needs a single clock domain.
+#
+#   yield dut.value.eq(0x123)
+#   yield FastForward(dut.refresh_count + 1)   # Next digit, in a few cycles of wall time.
+#   yield Snapshot("rotation.json")
+
+import json
+import collections
+
+from migen.fhdl.structure import Signal, Constant, _Operator
+from migen.fhdl.tools import list_signals, list_targets
+from migen.fhdl.visit import NodeVisitor
+from migen.fhdl.namer import build_namespace
+from migen.sim.core import Simulator
+
+# Commands -----------------------------------------------------------------------------------------
+
+class FastForward:
+    def __init__(self, cycles):
+        self.cycles = cycles
+
+class Snapshot:
+    def __init__(self, filename):
+        self.filename = filename
+
+class Restore:
+    def __init__(self, filename):
+        self.filename = filename
+
+# Counters -----------------------------------------------------------------------------------------
+
+class _Counters(NodeVisitor):
+    """{counter: sorted compare values} of the free-running counters of a fragment."""
+    def __init__(self, fragment):
+        self.incremented = set()
+        self.compared    = collections.defaultdict(set)
+        self.used        = set()
+        self.visit(fragment.comb)
+        for statements in fragment.sync.values():
+            self.visit(statements)
+        counters = self.incremented - self.used - list_targets(fragment.comb)
+        self.counters = {c: sorted(self.compared[c]) for c in counters if not c.signed}
+
+    def visit_Assign(self, node):
+        l, r = node.l, node.r
+        if not isinstance(l, Signal):
+            self.visit(l)
+        elif (isinstance(r, _Operator) and r.op == "+" and r.operands[0] is l and
+              isinstance(r.operands[1], Constant) and r.operands[1].value == 1):
+            self.incremented.add(l)
+            return
+        self.visit(r)
+
+    def visit_Operator(self, node):
+        if node.op in ["==", "!="]:
+            a, b = node.operands
+            if isinstance(a, Constant):
+                a, b = b, a
+            if isinstance(a, Signal) and isinstance(b, Constant):
+                self.compared[a].add(b.value)
+                return
+        NodeVisitor.visit_Operator(self, node)
+
+    def visit_Signal(self, node):
+        self.used.add(node)
+
+# Simulator ----------------------------------------------------------------------------------------
+
+class SnapshotSimulator(Simulator):
+    def __init__(self, fragment_or_module, generators, fast_forward=True, **kwargs):
+        Simulator.__init__(self, fragment_or_module, generators, **kwargs)
+        self.fast_forward = fast_forward
+        self.counters     = _Counters(self.fragment).counters
+        self.clocks       = {cd.clk for cd in self.fragment.clock_domains}
+        self.waits        = {}    # Generator -> cycles before it resumes.
+        self.previous     = None  # Counter values at the previous sys edge.
+        self.modified     = set()
+        self.cycles       = 0
+        self.skipped      = 0
+
+    # State ----------------------------------------------------------------------------------------
+
+    def _state_signals(self):
+        """{name: signal} of the design state (clocks excluded), names as in traces."""
+        signals = list_signals(self.fragment)
+        for cd in self.fragment.clock_domains:
+            if cd.rst is not None:
+                signals.add(cd.rst)
+        for memory_array in self.evaluator.replaced_memories.values():
+            signals |= set(memory_array)
+        signals = sorted(signals - self.clocks, key=lambda s: s.duid)
+        ns      = build_namespace(signals)
+        return {ns.get_name(s): s for s in signals}
+
+    def snapshot(self, filename):
+        # State after this edge: pending sync results and testbench writes included.
+        values = dict(self.evaluator.signal_values)
+        values.update(self.evaluator.modifications)
+        state = {
+            "cycles"  : self.cycles,
+            "signals" : {name: values.get(s, s.reset.value) for name, s in self._state_signals().items()},
+        }
+        with open(filename, "w") as f:
+            json.dump(state, f, indent=1)
+
+    def restore(self, filename):
+        """Loads a snapshot, applied on this edge; returns the cycle it was taken on."""
+        with open(filename) as f:
+            state = json.load(f)
+        signals = self._state_signals()
+        if set(state["signals"]) != set(signals):
+            raise ValueError(f"{filename} is not a snapshot of this design.")
+        for name, value in state["signals"].items():
+            self.evaluator.modifications[signals[name]] = value
+        self.previous = None
+        return state["cycles"]
+
+    # Fast-forward ---------------------------------------------------------------------------------
+
+    def _fast_forward(self):
+        generators = [g for cd_generators in self.generators.values() for g in cd_generators]
+        if not self.fast_forward or len(self.time.clocks) != 1 or any(g not in self.waits for g in generators):
+            self.previous = None
+            return
+        values   = self.evaluator.signal_values
+        previous = self.previous
+        self.previous = {c: values.get(c, c.reset.value) for c in self.counters}
+        if previous is None:
+            return
+
+        # Only counters changed (or nothing): skip until the first of them reaches a compare value.
+        changed = self.modified - self.clocks
+        if not changed <= self.counters.keys():
+            return
+        jump = min(self.waits[g] for g in generators) - 1
+        for c in changed:
+            old, new = previous[c], self.previous[c]
+            if new != old + 1 or old in self.counters[c]:
+                return
+            stop = min([k for k in self.counters[c] if k >= new] + [2**len(c) - 1])
+            jump = min(jump, stop - new)
+        if jump <= 0:
+            return
+
+        # Trace the changes of this edge, then the counters after the skipped cycles.
+        self.vcd.delay(jump*2*self.time.clocks["sys"].half_period)
+        for c in changed:
+            values[c] += jump
+            self.previous[c] += jump
+            self.vcd.set(c, values[c])
+        for g in generators:
+            self.waits[g] -= jump
+        self.cycles  += jump
+        self.skipped += jump
+
+    # Simulation loop ------------------------------------------------------------------------------
+
+    # The loop steps are methods, so that subclasses (simprof.ProfiledSimulator) can wrap them.
+
+    def _delay(self, dt):
+        self.vcd.delay(dt)
+
+    def _execute_sync(self, cd):
+        self.evaluator.execute(self.fragment.sync[cd])
+
+    def _execute_comb(self):
+        self.evaluator.execute(self.fragment.comb)
+
+    def _comb_propagate(self):
+        """Commits the pending assignments and propagates them through comb; returns the modified signals."""
+        all_modified = set()
+        modified = self.evaluator.commit()
+        all_modified |= modified
+        while modified:
+            self._execute_comb()
+            modified = self.evaluator.commit()
+            all_modified |= modified
+        return all_modified
+
+    def _trace(self, signals):
+        for signal in signals:
+            self.vcd.set(signal, self.evaluator.signal_values[signal])
+
+    def _commit_and_comb_propagate(self):
+        self.modified = self._comb_propagate()
+        self._trace(self.modified)
+
+    def _process_generators(self, cd):
+        exhausted = []
+        for generator in self.generators[cd]:
+            if generator in self.waits:
+                self.waits[generator] -= 1
+                if self.waits[generator]:
+                    continue
+                del self.waits[generator]
+            reply = None
+            while True:
+                try:
+                    request = generator.send(reply)
+                except StopIteration:
+                    exhausted.append(generator)
+                    break
+                reply = None
+                if request is None:
+                    break  # Next cycle.
+                elif isinstance(request, FastForward):
+                    if request.cycles > 0:
+                        self.waits[generator] = request.cycles
+                        break
+                elif isinstance(request, Snapshot):
+                    self.snapshot(request.filename)
+                elif isinstance(request, Restore):
+                    self.restore(request.filename)
+                elif isinstance(request, str):
+                    if request == "passive":
+                        self.passive_generators.add(generator)
+                    elif request == "active":
+                        self.passive_generators.discard(generator)
+                    else:
+                        raise ValueError(f"Unknown simulator command: '{request}'")
+                else:
+                    reply = self._evalexec_nested_lists(request)
+        for generator in exhausted:
+            self.generators[cd].remove(generator)
+
+    def _sys_edge(self):
+        self.cycles += 1
+        if self.waits:
+            self._fast_forward()
+        else:
+            self.previous = None
+
+    def run(self):
+        self._execute_comb()
+        self._commit_and_comb_propagate()
+
+        while True:
+            dt, rising, falling = self.time.tick()
+            self._delay(dt)
+            for cd in rising:
+                self.evaluator.assign(self.fragment.clock_domains[cd].clk, 1)
+                if cd in self.fragment.sync:
+                    self._execute_sync(cd)
+                if cd in self.generators:
+                    self._process_generators(cd)
+            for cd in falling:
+                self.evaluator.assign(self.fragment.clock_domains[cd].clk, 0)
+            self._commit_and_comb_propagate()
+            if "sys" in rising:
+                self._sys_edge()
+
+            if not self._continue_simulation():
+                break
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+#
+# Content-addressed cache of the LiteX software packages (libraries and BIOS).
+#
+# cached_software(builder) makes a Builder compile each software package (make
+# in <software_dir>/<package>) only when its key is not in the cache. The key
+# of a package hashes:
+#  - variables.mak (CPU type/variant/flags, toolchain triple, BIOS options),
+#    without the build directory,
+#  - the cross compiler version,
+#  - the generated headers (soc.h, csr.h, mem.h...),
+#  - the package sources and the common LiteX software headers/makefiles,
+#  - the key of the previous package (the BIOS links the libraries).
+# On a hit, the package's output directory is copied from the cache, so builds
+# in other directories (sweep variants) and builds where only the gateware
+# changed (the display controller's parameters) reuse the compiled software.
+# The cache is shared (SWCACHE_DIR, default ~/.cache/litex-swcache) and kept
+# under a size cap by evicting the least recently used packages.
+#
+#   builder = Builder(soc)
+#   cached_software(builder)
+#   builder.build()
+#
+# ./swcache.py [--max-size 256] [--clear]   # Cache content and hit/miss totals.
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+
+DEFAULT_DIR      = os.environ.get("SWCACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "litex-swcache"))
+DEFAULT_MAX_SIZE = 256*2**20  # Bytes.
+
+# Hashing ------------------------------------------------------------------------------------------
+
+_tree_hashes = {}  # Shared by the builds of a process (sweep).
+
+def tree_hash(path):
+    """Hash of the names and contents of the files under `path` (or of the file `path`)."""
+    if path not in _tree_hashes:
+        h = hashlib.sha256()
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                h.update(f.read())
+        for root, dirs, files in sorted(os.walk(path)):
+            dirs.sort()
+            for name in sorted(files):
+                filename = os.path.join(root, name)
+                h.update(os.path.relpath(filename, path).encode())
+                with open(filename, "rb") as f:
+                    h.update(f.read())
+        _tree_hashes[path] = h.hexdigest()
+    return _tree_hashes[path]
+
+_compilers = {}
+
+def compiler_version(triple):
+    if triple not in _compilers:
+        try:
+            out = subprocess.run([f"{triple}-gcc", "--version"], capture_output=True, text=True).stdout
+            _compilers[triple] = out.splitlines()[0] if out else "none"
+        except OSError:
+            _compilers[triple] = "none"
+    return _compilers[triple]
+
+# Cache --------------------------------------------------------------------------------------------
+
+class SoftwareCache:
+    def __init__(self, cache_dir=DEFAULT_DIR, max_size=DEFAULT_MAX_SIZE, verbose=True):
+        self.cache_dir = cache_dir
+        self.max_size  = max_size
+        self.verbose   = verbose
+        self.hits      = []  # Packages of this build.
+        self.misses    = []
+        self.evicted   = 0
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, "objects", key)
+
+    def entries(self):
+        """[(key, entry.json content, last use)], least recently used first."""
+        entries = []
+        objects = os.path.join(self.cache_dir, "objects")
+        for key in os.listdir(objects):
+            try:
+                with open(os.path.join(objects, key, "entry.json")) as f:
+                    entries.append((key, json.load(f), os.path.getmtime(os.path.join(objects, key))))
+            except (OSError, ValueError):
+                continue  # Being stored, or a leftover of an interrupted store.
+        return sorted(entries, key=lambda e: e[2])
+
+    # Keys -----------------------------------------------------------------------------------------
+
+    def common_key(self, builder):
+        """Hash of what every package of `builder` depends on."""
+        from litex.soc.integration.builder import soc_directory
+        variables = builder._get_variables_contents().replace(builder.include_dir, "@INCLUDE_DIR@")
+        triple    = re.search(r"^TRIPLE=(.*)$", variables, re.M)
+        h = hashlib.sha256(variables.encode())
+        h.update(compiler_version(triple.group(1) if triple else "").encode())
+        for name in sorted(os.listdir(builder.generated_dir)):
+            if name != "variables.mak":
+                with open(os.path.join(builder.generated_dir, name), "rb") as f:
+                    h.update(name.encode())
+                    h.update(f.read())
+        h.update(tree_hash(os.path.join(soc_directory, "software", "include")).encode())
+        h.update(tree_hash(os.path.join(soc_directory, "software", "common.mak")).encode())
+        return h.hexdigest()
+
+    def package_key(self, previous, name, src_dir):
+        h = hashlib.sha256(previous.encode())
+        h.update(name.encode())
+        h.update(tree_hash(src_dir).encode())
+        return h.hexdigest()[:32]
+
+    # Entries --------------------------------------------------------------------------------------
+
+    @staticmethod
+    def _relocate(directory, paths):
+        """Replaces the paths (dict) in the make dependency files of `directory`."""
+        for root, dirs, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".d"):
+                    filename = os.path.join(root, name)
+                    with open(filename) as f:
+                        content = f.read()
+                    for old, new in sorted(paths.items(), key=lambda p: -len(p[0])):
+                        content = content.replace(old, new)
+                    with open(filename, "w") as f:
+                        f.write(content)
+
+    @staticmethod
+    def _touch(entry):
+        # Last use, from the fine grained clock (file times may be coarser).
+        now = time.time()
+        os.utime(entry, (now, now))
+
+    def restore(self, key, dst_dir, paths):
+        entry = self._entry(key)
+        if not os.path.exists(os.path.join(entry, "entry.json")):
+            return False
+        # New modification times: make sees the outputs as up to date.
+        shutil.copytree(os.path.join(entry, "files"), dst_dir, dirs_exist_ok=True, copy_function=shutil.copy)
+        self._relocate(dst_dir, {v: k for k, v in paths.items()})
+        self._touch(entry)
+        return True
+
+    def store(self, key, name, dst_dir, paths):
+        entry = self._entry(key)
+        if os.path.exists(entry):
+            return
+        tmp = f"{entry}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        shutil.copytree(dst_dir, os.path.join(tmp, "files"))
+        self._relocate(os.path.join(tmp, "files"), paths)
+        size = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(tmp) for f in files)
+        with open(os.path.join(tmp, "entry.json"), "w") as f:
+            json.dump({"package": name, "size": size, "created": time.time()}, f)
+        try:
+            os.rename(tmp, entry)
+            self._touch(entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # Stored meanwhile by another build.
+        self.evict()
+
+    def evict(self, max_size=None):
+        """Removes the least recently used entries until the cache fits in max_size bytes."""
+        max_size = self.max_size if max_size is None else max_size
+        entries  = self.entries()
+        size     = sum(e[1]["size"] for e in entries)
+        for key, entry, _ in entries:
+            if size <= max_size:
+                break
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            size         -= entry["size"]
+            self.evicted += 1
+
+    # Stats ----------------------------------------------------------------------------------------
+
+    def totals(self):
+        try:
+            with open(os.path.join(self.cache_dir, "stats.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0, "evictions": 0}
+
+    def report(self):
+        totals = self.totals()
+        totals["hits"]      += len(self.hits)
+        totals["misses"]    += len(self.misses)
+        totals["evictions"] += self.evicted
+        with open(os.path.join(self.cache_dir, "stats.json"), "w") as f:
+            json.dump(totals, f)
+        size = sum(e[1]["size"] for e in self.entries())
+        if self.verbose:
+            print(f"[swcache] {len(self.hits)} hits, {len(self.misses)} misses"
+                  + (f" ({' '.join(self.misses)})" if self.misses else "")
+                  + f", {self.evicted} evicted, cache {size/2**20:.1f}/{self.max_size/2**20:.0f} MiB")
+
+# Builder ------------------------------------------------------------------------------------------
+
+def cached_software(builder, cache_dir=DEFAULT_DIR, max_size=DEFAULT_MAX_SIZE, verbose=True):
+    """Compiles `builder`'s software packages through a SoftwareCache (returned)."""
+    cache = SoftwareCache(cache_dir, max_size, verbose)
+
+    def generate_rom_software(compile_bios=True):
+        if not builder.compile_software:
+            return
+        paths = {builder.software_dir: "@SOFTWARE_DIR@", builder.include_dir: "@INCLUDE_DIR@"}
+        key   = cache.common_key(builder)
+        for name, src_dir in builder.software_packages:
+            if name == "bios" and not compile_bios:
+                continue
+            dst_dir = os.path.join(builder.software_dir, name)
+            key     = cache.package_key(key, name, src_dir)
+            if cache.restore(key, dst_dir, paths):
+                cache.hits.append(name)
+            else:
+                subprocess.check_call(["make", "-C", dst_dir, "-f", os.path.join(src_dir, "Makefile")])
+                cache.store(key, name, dst_dir, paths)
+                cache.misses.append(name)
+        cache.report()
+
+    builder._generate_rom_software = generate_rom_software
+    return cache
+
+# Cache maintenance --------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX software cache content and statistics.")
+    parser.add_argument("--dir",      default=DEFAULT_DIR,          help="Cache directory (SWCACHE_DIR).")
+    parser.add_argument("--max-size", default=None, type=float,     help="Evict down to this size (MiB).")
+    parser.add_argument("--clear",    action="store_true",          help="Remove every entry.")
+    args = parser.parse_args()
+
+    cache = SoftwareCache(args.dir)
+    if args.clear:
+        cache.evict(0)
+    elif args.max_size is not None:
+        cache.evict(int(args.max_size*2**20))
+    entries = cache.entries()
+    for key, entry, used in entries:
+        print(f"{key} {entry['package']:16s} {entry['size']/2**10:9.0f} KiB  "
+              f"used {time.strftime('%Y-%m-%d %H:%M', time.localtime(used))}")
+    totals = cache.totals()
+    total  = totals["hits"] + totals["misses"]
+    print(f"{len(entries)} packages, {sum(e[1]['size'] for e in entries)/2**20:.1f} MiB in {args.dir}")
+    print(f"{totals['hits']} hits, {totals['misses']} misses"
+          + (f" ({totals['hits']/total:.0%} hit rate)" if total else "") + f", {totals['evictions']} evictions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+#
+# Cache hits and misses of buildcache.cached_build (no Quartus).
+#
+# Designs are generated for the QMTECH EP4CE15 platform (platform.build(...,
+# run=False)) and a stubbed toolchain writes the bitstream and counts its runs:
+#  - first build: miss, toolchain run,
+#  - same design again: hit, files generated again, toolchain skipped,
+#  - changed module, changed finalize-time content, changed settings and
+#    missing bitstream: miss, the changed module/files reported.
+#
+# ./test_buildcache.py
+
+import io
+import os
+import sys
+import tempfile
+import contextlib
+
+from migen import *
+
+from buildcache import cached_build
+
+# Helpers ------------------------------------------------------------------------------------------
+
+class Blink(Module):
+    """LED blinking from bit `bit` of a counter, selected at finalization (as SoCs add CSRs/ROM there)."""
+    def __init__(self, platform, width=24, bit=23):
+        self.led     = platform.request("led", 0)
+        self.counter = Signal(width)
+        self.bit     = bit
+        self.sync += self.counter.eq(self.counter + 1)
+
+    def do_finalize(self):
+        self.comb += self.led.eq(self.counter[self.bit])
+
+class StubToolchain:
+    def __init__(self):
+        self.runs = 0
+
+    def __call__(self, build_dir, build_name):
+        self.runs += 1
+        with open(os.path.join(build_dir, f"{build_name}.sof"), "w") as f:
+            f.write(f"bitstream {self.runs}\n")
+
+def build(build_dir, toolchain, settings={}, **kwargs):
+    """(cache hit, cached_build output) of a Blink(**kwargs) build."""
+    from litex_boards.platforms import qmtech_ep4ce15_starter_kit
+    platform = qmtech_ep4ce15_starter_kit.Platform()
+    output   = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        hit = cached_build(platform, Blink(platform, **kwargs), build_dir=build_dir, settings=settings,
+            toolchain=toolchain)
+    return hit, output.getvalue()
+
+# Tests --------------------------------------------------------------------------------------------
+
+def test_hit_after_miss():
+    with tempfile.TemporaryDirectory() as d:
+        toolchain = StubToolchain()
+        hit, _ = build(d, toolchain)
+        assert not hit and toolchain.runs == 1
+        os.remove(os.path.join(d, "top.v"))
+        hit, output = build(d, toolchain)
+        assert hit and toolchain.runs == 1, output
+        assert os.path.exists(os.path.join(d, "top.v")), "Build files not generated on a hit"
+
+def test_changed_module():
+    with tempfile.TemporaryDirectory() as d:
+        toolchain = StubToolchain()
+        build(d, toolchain)
+        hit, output = build(d, toolchain, width=26)
+        assert not hit and toolchain.runs == 2
+        assert "changed module: top" in output and "changed file: top.v" in output, output
+
+def test_changed_at_finalization():
+    # Same module statements before finalization, different Verilog.
+    with tempfile.TemporaryDirectory() as d:
+        toolchain = StubToolchain()
+        build(d, toolchain)
+        hit, output = build(d, toolchain, bit=22)
+        assert not hit and toolchain.runs == 2
+        assert "changed module" not in output and "changed file: top.v" in output, output
+
+def test_changed_settings():
+    with tempfile.TemporaryDirectory() as d:
+        toolchain = StubToolchain()
+        build(d, toolchain, settings={"seed": 1})
+        hit, _ = build(d, toolchain, settings={"seed": 2})
+        assert not hit and toolchain.runs == 2
+
+def test_missing_bitstream():
+    with tempfile.TemporaryDirectory() as d:
+        toolchain = StubToolchain()
+        build(d, toolchain)
+        os.remove(os.path.join(d, "top.sof"))
+        hit, _ = build(d, toolchain)
+        assert not hit and toolchain.runs == 2
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    failed = 0
+    for name, test in [(k, v) for k, v in globals().items() if k.startswith("test_")]:
+        try:
+            test()
+            print(f"{name}: ok")
+        except AssertionError as e:
+            print(f"{name}: FAIL {e}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
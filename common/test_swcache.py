@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+#
+# Software cache (swcache.py) hits, misses, relocation and eviction (no cross compiler).
+#
+# A stub `make` (first in PATH) "compiles" a package by writing an object, a
+# make dependency file holding the build paths and, for the BIOS, bios.bin; it
+# logs each run. The builders are stubs with the attributes cached_software()
+# uses (software/include directories, generated headers, variables.mak):
+#  - first build: every package missed, compiled and stored,
+#  - build in another directory: every package restored (bios.bin included),
+#    make not run, dependency files relocated to the new directory,
+#  - changed generated header: packages missed again,
+#  - size cap: the least recently used packages are evicted.
+#
+# ./test_swcache.py
+
+import os
+import sys
+import stat
+import tempfile
+
+from swcache import SoftwareCache, cached_software
+
+# Helpers ------------------------------------------------------------------------------------------
+
+STUB_MAKE = """\
+#!{python}
+import os, sys
+args    = sys.argv[1:]
+out_dir = args[args.index("-C") + 1]
+src_dir = os.path.dirname(args[args.index("-f") + 1])
+name    = os.path.basename(out_dir)
+with open(os.path.join(out_dir, name + ".o"), "w") as f:
+    f.write(name + " object\\n")
+with open(os.path.join(out_dir, name + ".d"), "w") as f:
+    f.write(f"{{out_dir}}/{{name}}.o: {{src_dir}}/main.c {{os.environ['STUB_INCLUDE_DIR']}}/generated/csr.h\\n")
+if name == "bios":
+    with open(os.path.join(out_dir, "bios.bin"), "wb") as f:
+        f.write(bytes(range(256)))
+with open(os.environ["STUB_MAKE_LOG"], "a") as f:
+    f.write(name + "\\n")
+"""
+
+class StubBuilder:
+    """What cached_software() uses of a LiteX Builder."""
+    def __init__(self, output_dir, src_root, csr_h="#define CSR_BASE 0xf0000000\n"):
+        self.software_dir     = os.path.join(output_dir, "software")
+        self.include_dir      = os.path.join(self.software_dir, "include")
+        self.generated_dir    = os.path.join(self.include_dir, "generated")
+        self.compile_software = True
+        self.software_packages = [(name, os.path.join(src_root, name)) for name in ["libc", "libbase", "bios"]]
+        os.makedirs(self.generated_dir)
+        for name, src_dir in self.software_packages:
+            os.makedirs(os.path.join(self.software_dir, name))
+        with open(os.path.join(self.generated_dir, "csr.h"), "w") as f:
+            f.write(csr_h)
+        with open(os.path.join(self.generated_dir, "variables.mak"), "w") as f:
+            f.write(self._get_variables_contents())
+
+    def _get_variables_contents(self):
+        return f"TRIPLE=riscv64-unknown-elf\nCPU=vexriscv\nBUILDINC_DIRECTORY={self.include_dir}\n"
+
+class Environment:
+    """Temporary directory with the package sources, the stub make in PATH and a cache."""
+    def __init__(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root     = self.tmp.name
+        self.src = os.path.join(root, "src")
+        for name in ["libc", "libbase", "bios"]:
+            os.makedirs(os.path.join(self.src, name))
+            with open(os.path.join(self.src, name, "main.c"), "w") as f:
+                f.write(f"/* {name} */\n")
+        bin_dir = os.path.join(root, "bin")
+        os.makedirs(bin_dir)
+        make = os.path.join(bin_dir, "make")
+        with open(make, "w") as f:
+            f.write(STUB_MAKE.format(python=sys.executable))
+        os.chmod(make, os.stat(make).st_mode | stat.S_IEXEC)
+        self.log   = os.path.join(root, "make.log")
+        self.cache = os.path.join(root, "cache")
+        self.env   = {"PATH": bin_dir + os.pathsep + os.environ["PATH"], "STUB_MAKE_LOG": self.log}
+
+    def build(self, name, **kwargs):
+        """(builder, cache, packages made) of a build in <tmp>/<name>."""
+        builder = StubBuilder(os.path.join(self.tmp.name, name), self.src, **kwargs)
+        saved   = {k: os.environ.get(k) for k in list(self.env) + ["STUB_INCLUDE_DIR"]}
+        os.environ.update(self.env, STUB_INCLUDE_DIR=builder.include_dir)
+        try:
+            open(self.log, "w").close()
+            cache = cached_software(builder, cache_dir=self.cache, verbose=False)
+            builder._generate_rom_software()
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+        with open(self.log) as f:
+            return builder, cache, f.read().split()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.tmp.cleanup()
+
+# Tests --------------------------------------------------------------------------------------------
+
+def test_miss_then_store():
+    with Environment() as env:
+        _, cache, made = env.build("a")
+        assert made == ["libc", "libbase", "bios"], made
+        assert cache.misses == made and cache.hits == []
+        assert sorted(e[1]["package"] for e in cache.entries()) == ["bios", "libbase", "libc"]
+
+def test_hit_restores_outputs():
+    with Environment() as env:
+        a, _, _ = env.build("a")
+        b, cache, made = env.build("b")
+        assert made == [] and cache.hits == ["libc", "libbase", "bios"], (made, cache.hits)
+        with open(os.path.join(b.software_dir, "bios", "bios.bin"), "rb") as f:
+            assert f.read() == bytes(range(256)), "bios.bin not restored"
+
+def test_dependency_files_relocated():
+    with Environment() as env:
+        a, _, _ = env.build("a")
+        b, _, _ = env.build("b")
+        with open(os.path.join(b.software_dir, "bios", "bios.d")) as f:
+            deps = f.read()
+        assert a.software_dir not in deps, deps
+        assert f"{b.software_dir}/bios/bios.o:" in deps and f"{b.include_dir}/generated/csr.h" in deps, deps
+
+def test_changed_header_misses():
+    with Environment() as env:
+        env.build("a")
+        _, cache, made = env.build("b", csr_h="#define CSR_BASE 0x80000000\n")
+        assert made == ["libc", "libbase", "bios"] and cache.hits == [], made
+
+def test_lru_eviction():
+    with Environment() as env:
+        cache = SoftwareCache(env.cache, verbose=False)
+        work  = os.path.join(env.tmp.name, "work")
+        os.makedirs(work)
+        with open(os.path.join(work, "data"), "wb") as f:
+            f.write(bytes(1000))
+        for key in ["k1", "k2"]:
+            cache.store(key, key, work, {})
+        # k1 used after k2: k2 is the least recently used one when k3 does not fit.
+        assert cache.restore("k1", os.path.join(env.tmp.name, "out"), {})
+        cache.max_size = 2500
+        cache.store("k3", "k3", work, {})
+        keys = sorted(e[0] for e in cache.entries())
+        assert keys == ["k1", "k3"] and cache.evicted == 1, keys
+        cache.evict(0)
+        assert cache.entries() == []
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    failed = 0
+    for name, test in [(k, v) for k, v in globals().items() if k.startswith("test_")]:
+        try:
+            test()
+            print(f"{name}: ok")
+        except AssertionError as e:
+            print(f"{name}: FAIL {e}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
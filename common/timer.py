@@ -0,0 +1,84 @@
+#
+# Timer and prescaler with minimum width counters.
+#
+# Timer(period, period_ns) pulses `tick` for one cycle every `period` ns of a
+# clock of `period_ns` ns, with a counter of exactly bits_for(cycles - 1) bits.
+# Several timers can share a Prescaler: they then count its `ce` pulses instead
+# of clock cycles, so each of them only needs a few bits.
+#
+# Prescaler(..., johnson=True) uses a Johnson (twisted ring) counter of
+# ceil(cycles/2) flip-flops: exactly one of them toggles per cycle, against two
+# on average for a binary counter, and ce is a 2-input decode (low activity
+# designs).
+#
+#   self.submodules.prescaler = prescaler = Prescaler(1e3, period_ns)       # 1 us
+#   self.submodules.refresh   = refresh   = Timer(2e6, period_ns, prescaler) # 2 ms
+#   self.submodules.blink     = blink     = Timer(500e6, period_ns, prescaler)
+
+from migen import *
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def cycles(period, period_ns):
+    n = int(round(period/period_ns))
+    if n < 1:
+        raise ValueError(f"Period {period} ns is shorter than the clock period ({period_ns} ns).")
+    return n
+
+# Prescaler ----------------------------------------------------------------------------------------
+
+class Prescaler(Module):
+    def __init__(self, period, period_ns, johnson=False):
+        self.ce     = ce = Signal()
+        self.period = period
+        self.cycles = n  = cycles(period, period_ns)
+
+        # # #
+
+        if n == 1:
+            self.comb += ce.eq(1)
+        elif johnson:
+            # Shift in ~msb (2k states); for odd cycles, 10..0 skips 00..0 (2k - 1 states).
+            k     = (n + 1)//2
+            count = Signal(k, reset=n % 2)
+            if k == 1:
+                self.comb += ce.eq(count[0])
+                self.sync += count.eq(~count[0])
+            else:
+                msb = count[k - 1]
+                self.comb += ce.eq(msb & ~count[k - 2])
+                self.sync += count.eq(Cat(~(msb & count[k - 2]) if n % 2 else ~msb, count[:k - 1]))
+        else:
+            count = Signal(max=n)
+            self.comb += ce.eq(count == (n - 1))
+            self.sync += If(ce, count.eq(0)).Else(count.eq(count + 1))
+
+# Timer --------------------------------------------------------------------------------------------
+
+class Timer(Module):
+    def __init__(self, period, period_ns, prescaler=None):
+        self.tick   = tick = Signal()
+        self.period = period
+
+        # # #
+
+        if prescaler is None:
+            self.cycles = n = cycles(period, period_ns)
+            ce = 1
+        else:
+            n  = cycles(period, prescaler.period)
+            self.cycles = n*prescaler.cycles
+            ce = prescaler.ce
+
+        if n == 1:
+            self.comb += tick.eq(ce)
+        else:
+            count = Signal(max=n)
+            self.comb += tick.eq(ce & (count == (n - 1)))
+            self.sync += If(ce,
+                If(tick,
+                    count.eq(0)
+                ).Else(
+                    count.eq(count + 1)
+                )
+            )
@@ -0,0 +1,162 @@
+#
+# Compact VCD writer for Migen's simulator.
+#
+# Drop-in replacement for migen.sim.vcd.VCDWriter (set/delay/close) that:
+#  - records only the signals whose name matches one of `trace` (fnmatch patterns,
+#    "digit" also matches hierarchical names ending in "_digit"),
+#  - records only the cycles in `window` (start, stop) and, inside it, every
+#    `decimate`-th cycle (values are the latest ones at the sampled cycle),
+#  - streams the output: ".vcd.gz" is gzip compressed on the fly and ".fst" is
+#    converted with vcd2fst (GTKWave) on close.
+# It also measures the bytes written and the time spent tracing.
+#
+# toggle_counts() reads a VCD back and counts the bit toggles of each signal
+# (switching activity, e.g. to compare the dynamic power of two designs).
+
+import os
+import gzip
+import time
+import shutil
+import fnmatch
+import subprocess
+
+from migen.fhdl.namer import build_namespace
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def _codes():
+    n = 0
+    while True:
+        code, i = "", n
+        while True:
+            code += chr(33 + i % 94)
+            i //= 94
+            if not i:
+                break
+        yield code
+        n += 1
+
+def _match(name, patterns):
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(name, "*_" + p) for p in patterns)
+
+# TraceWriter --------------------------------------------------------------------------------------
+
+class TraceWriter:
+    def __init__(self, filename, signals, period=10, trace=None, window=None, decimate=1):
+        self.filename   = filename
+        self.period     = period
+        self.window     = window or (0, None)
+        self.decimate   = decimate
+        self.t          = 0
+        self.trace_time = 0.0
+        self.nbytes     = 0
+        self.values     = {}
+        self.pending    = {}
+
+        start = time.perf_counter()
+
+        signals = sorted(signals, key=lambda s: s.duid)
+        ns      = build_namespace(signals)
+        names   = {s: ns.get_name(s) for s in signals}
+        if trace:
+            signals = [s for s in signals if _match(names[s], trace)]
+        codes = _codes()
+        self.codes = {s: next(codes) for s in signals}
+
+        if filename.endswith(".fst"):
+            self.vcd_filename = filename[:-len(".fst")] + ".vcd"
+        else:
+            self.vcd_filename = filename
+        if self.vcd_filename.endswith(".gz"):
+            self.file = gzip.open(self.vcd_filename, "wt", compresslevel=6)
+        else:
+            self.file = open(self.vcd_filename, "w")
+
+        self.file.write("$timescale 1ps $end\n")
+        for s, code in self.codes.items():
+            self.file.write(f"$var wire {len(s)} {code} {names[s]} $end\n")
+        self.file.write("$enddefinitions $end\n$dumpvars\n")
+        for s in self.codes:
+            self._write_value(s, s.reset.value)
+        self.file.write("$end\n")
+
+        self.trace_time += time.perf_counter() - start
+
+    def _write_value(self, signal, value):
+        if value < 0:
+            value += 2**len(signal)
+        if len(signal) > 1:
+            self.file.write(f"b{value:b} {self.codes[signal]}\n")
+        else:
+            self.file.write(f"{value}{self.codes[signal]}\n")
+        self.values[signal] = value
+
+    def _sampled(self):
+        cycle       = self.t // self.period
+        start, stop = self.window
+        if cycle < start or (stop is not None and cycle >= stop):
+            return False
+        return (cycle - start) % self.decimate == 0
+
+    def _flush(self):
+        changes = [(s, v) for s, v in self.pending.items() if self.values.get(s) != v]
+        self.pending.clear()
+        if changes:
+            self.file.write(f"#{self.t}\n")
+            for s, v in changes:
+                self._write_value(s, v)
+
+    # VCDWriter interface ----------------------------------------------------------------------------
+
+    def set(self, signal, value):
+        if signal in self.codes:
+            self.pending[signal] = value
+
+    def delay(self, delay):
+        start = time.perf_counter()
+        if self.pending and self._sampled():
+            self._flush()
+        self.t += delay
+        self.trace_time += time.perf_counter() - start
+
+    def close(self):
+        start = time.perf_counter()
+        if self.pending and self._sampled():
+            self._flush()
+        self.file.close()
+        if self.filename.endswith(".fst"):
+            if shutil.which("vcd2fst") is None:
+                raise OSError("Unable to find vcd2fst (GTKWave), please make sure it is installed and in your PATH.")
+            subprocess.run(["vcd2fst", self.vcd_filename, self.filename], check=True, stdout=subprocess.DEVNULL)
+            os.remove(self.vcd_filename)
+        self.nbytes = os.path.getsize(self.filename)
+        self.trace_time += time.perf_counter() - start
+
+# Toggle counts ------------------------------------------------------------------------------------
+
+def toggle_counts(filename):
+    """{name: (width, bit toggles)} of the signals of a .vcd or .vcd.gz file (initial values excluded)."""
+    names  = {}
+    widths = {}
+    values = {}
+    counts = {}
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, "rt") as f:
+        for line in f:
+            if line.startswith("$var"):
+                _, _, width, code, name = line.split()[:5]
+                names[code]  = name
+                widths[code] = int(width)
+                counts[code] = 0
+                continue
+            if line.startswith("b"):
+                value, code = line[1:].split()
+                value = int(value, 2)
+            elif line[:1] in ["0", "1"]:
+                value, code = int(line[0]), line[1:].strip()
+            else:
+                continue
+            if code in values:
+                counts[code] += bin(values[code] ^ value).count("1")
+            values[code] = value
+    return {names[code]: (widths[code], counts[code]) for code in names}
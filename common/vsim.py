@@ -0,0 +1,157 @@
+#
+# Verilator backend for Migen testbenches.
+#
+# The DUT is converted to Verilog, compiled with Verilator into a shared library
+# with a tiny C API (set/get port, tick) and driven through ctypes by the same
+# generator testbenches used with run_simulation:
+#
+#   yield              -> one sys clock cycle
+#   yield sig.eq(v)    -> drive an input port (sampled on the next rising edge)
+#   v = (yield sig)    -> read a port
+#
+# Only the ports given in `ios` are visible to the testbench.
+
+import os
+import re
+import ctypes
+import hashlib
+import shutil
+import subprocess
+
+from migen import *
+from migen.fhdl import verilog
+from migen.fhdl.structure import _Assign
+
+# C++ wrapper --------------------------------------------------------------------------------------
+
+_wrapper = """
+#include <cstdint>
+#include "verilated.h"
+#include "V{name}.h"
+
+static V{name} *top;
+
+double sc_time_stamp() {{ return 0; }}
+
+extern "C" {{
+
+void vsim_init(void) {{
+    top = new V{name};
+{init}
+    top->eval();
+}}
+
+void vsim_final(void) {{
+    top->final();
+    delete top;
+}}
+
+void vsim_set(int id, uint64_t value) {{
+    switch (id) {{
+{setters}
+    }}
+}}
+
+uint64_t vsim_get(int id) {{
+    switch (id) {{
+{getters}
+    }}
+    return 0;
+}}
+
+void vsim_tick(uint64_t n) {{
+    for (uint64_t i = 0; i < n; i++) {{
+{tick}
+    }}
+}}
+
+}}
+"""
+
+# VerilatorSim -------------------------------------------------------------------------------------
+
+class VerilatorSim:
+    def __init__(self, dut, ios, name="top", build_dir="vsim"):
+        self.ios  = list(ios)
+        conv      = verilog.convert(dut, ios=set(self.ios), name=name)
+        self.ids  = {sig: i for i, sig in enumerate(self.ios)}
+        self.ports = [conv.ns.get_name(sig) for sig in self.ios]
+        for sig in self.ios:
+            assert len(sig) <= 64, "Only ports up to 64 bits are supported."
+
+        setters = "\n".join(f"    case {i}: top->{port} = value; break;" for i, port in enumerate(self.ports))
+        getters = "\n".join(f"    case {i}: return top->{port};"        for i, port in enumerate(self.ports))
+        # Purely combinatorial designs have no sys clock/reset ports.
+        init, tick = [], ["        top->eval();"]
+        for port in ["sys_clk", "sys_rst"]:
+            if re.search(rf"\binput\s+(wire\s+)?{port}\b", conv.main_source):
+                init.append(f"    top->{port} = 0;")
+        if init and init[0].startswith("    top->sys_clk"):
+            tick = [
+                "        top->sys_clk = 1;", "        top->eval();",
+                "        top->sys_clk = 0;", "        top->eval();",
+            ]
+        wrapper = _wrapper.format(name=name, setters=setters, getters=getters,
+            init="\n".join(init), tick="\n".join(tick))
+
+        # Compiled models are kept per Verilog/wrapper hash.
+        digest = hashlib.sha256((conv.main_source + wrapper).encode()).hexdigest()[:16]
+        self.build_dir = os.path.join(build_dir, digest)
+        self.library   = os.path.join(self.build_dir, "obj", "libvsim.so")
+        if not os.path.exists(self.library):
+            self._compile(name, conv.main_source, wrapper)
+
+        self.lib = ctypes.CDLL(os.path.abspath(self.library))
+        self.lib.vsim_set.argtypes  = [ctypes.c_int, ctypes.c_uint64]
+        self.lib.vsim_get.argtypes  = [ctypes.c_int]
+        self.lib.vsim_get.restype   = ctypes.c_uint64
+        self.lib.vsim_tick.argtypes = [ctypes.c_uint64]
+        self.cycles = 0
+
+    def _compile(self, name, source, wrapper):
+        if shutil.which("verilator") is None:
+            raise OSError("Unable to find Verilator, please make sure it is installed and in your PATH.")
+        os.makedirs(self.build_dir, exist_ok=True)
+        with open(os.path.join(self.build_dir, f"{name}.v"), "w") as f:
+            f.write(source)
+        with open(os.path.join(self.build_dir, "vsim.cpp"), "w") as f:
+            f.write(wrapper)
+        subprocess.run([
+            "verilator", "--cc", f"{name}.v", "--top-module", name,
+            "--exe", "vsim.cpp", "--build", "--Mdir", "obj", "-o", "libvsim.so",
+            "-O3", "-Wno-fatal",
+            "-CFLAGS", "-fPIC -O2",
+            "-LDFLAGS", "-shared",
+        ], cwd=self.build_dir, check=True, stdout=subprocess.DEVNULL)
+
+    def set(self, sig, value):
+        self.lib.vsim_set(self.ids[sig], value)
+
+    def get(self, sig):
+        return self.lib.vsim_get(self.ids[sig])
+
+    def tick(self, n=1):
+        self.lib.vsim_tick(n)
+        self.cycles += n
+
+    def run(self, generator):
+        self.lib.vsim_init()
+        reply = None
+        try:
+            while True:
+                try:
+                    cmd = generator.send(reply)
+                except StopIteration:
+                    break
+                reply = None
+                if cmd is None:
+                    self.tick()
+                elif isinstance(cmd, _Assign):
+                    value = cmd.r.value if isinstance(cmd.r, Constant) else int(cmd.r)
+                    self.set(cmd.l, value)
+                elif isinstance(cmd, Signal):
+                    reply = self.get(cmd)
+                else:
+                    raise NotImplementedError(f"Unsupported testbench command: {cmd}")
+        finally:
+            self.lib.vsim_final()
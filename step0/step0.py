@@ -4,8 +4,9 @@ import sys
 import os
 
 from migen import *
-from litex.build.io import CRG
-from litex_boards.platforms import qmtech_ep4ce15_starter_kit
+
+# litex and the helpers in common/ are imported by the subcommand that needs them
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
 
 # Blinker -------------------------------------------------------------------------------------------
 
@@ -18,8 +19,8 @@ class Blink(Module):
 
         ###
 
-        # Internal signal
-        counter = Signal(25)
+        # Internal signal, only bits up to "bit" are used
+        counter = Signal(bit + 1)
 
         # This is the actual counter. It is incremented each clock cycle.
         # Because it's not just only wires, it needs some memory (registers)
@@ -40,6 +41,7 @@ class Tuto(Module):
         led0 = platform.request("led", 0)
 
         # Creates a "sys" clock domain and generates a startup reset
+        from litex.build.io import CRG
         crg = CRG(clk)
         self.submodules.crg = crg
 
@@ -50,29 +52,38 @@ class Tuto(Module):
 
 # Test -------------------------------------------------------------------------------------------
 
-def bench():
+def bench(cycles=10000):
     loop = 0
-    while (loop < 10000):
+    while (loop < cycles):
         yield
         loop = loop + 1
 
 def main():
 
+    if "sim" in sys.argv[1:]:
+        from sim import simulate, sim_options
+        # --fast: compile Blink with Verilator instead of Migen's Python simulator
+        # --trace/--window/--decimate/--vcd: what is recorded and where (see common/sim.py)
+        blink = Blink(3)
+        simulate(blink, bench(), ios={blink.out}, **sim_options(sys.argv[1:]))
+        exit()
+
+    from litex_boards.platforms import qmtech_ep4ce15_starter_kit
+
     # Instance of our platform (which is in litex_boards.platforms)
     platform = qmtech_ep4ce15_starter_kit.Platform()
-    design = Tuto(platform)
 
+    # Loading only needs the programmer, not the design
     if "load" in sys.argv[1:]:
         prog = platform.create_programmer()
         prog.load_bitstream(os.path.join("gateware", "top.sof"))
         exit()
 
-    if "sim" in sys.argv[1:]:
-        blink = Blink(3)
-        run_simulation(blink, bench(), vcd_name="sim.vcd")
-        exit()
+    from buildcache import cached_build
+    design = Tuto(platform)
 
-    platform.build(design, build_dir="gateware")
+    # Skips Quartus when the generated sources match gateware/buildcache.json
+    cached_build(platform, design, build_dir="gateware")
 
 if __name__ == "__main__":
     main()
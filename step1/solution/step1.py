@@ -4,8 +4,9 @@ import sys
 import os
 
 from migen import *
-from litex.build.io import CRG
-from litex_boards.platforms import qmtech_ep4ce15_starter_kit
+
+# litex and the helpers in common/ are imported by the subcommand that needs them
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
 
 # Blinker -------------------------------------------------------------------------------------------
 
@@ -63,6 +64,7 @@ class SevenSegmentsController(Module):
         #----------------------------------------------------------------------------
         refresh_time  = 2 # 2 ms
         refresh_count = int(((refresh_time * 1e6) / period_ns))
+        self.refresh_count = refresh_count
 
         print(f"Clock frequency = {int(1e9/period_ns)}Hz")
         print(f"Need {refresh_count} clocks period to wait for {refresh_time} ms")
@@ -83,7 +85,8 @@ class SevenSegmentsController(Module):
         #  digit[2]                         │         │
         #           ────────────────────────┘         └───────────
 
-        count = Signal(32)
+        # Just wide enough to count up to refresh_count
+        count = Signal(max=refresh_count + 1)
 
         self.sync += [
             count.eq(count + 1),
@@ -149,6 +152,7 @@ class Step1(Module):
         seven_seg = platform.request("seven_seg_ctl", 0)
 
         # Creates a "sys" clock domain and generates a startup reset
+        from litex.build.io import CRG
         crg = CRG(clk)
         self.submodules.crg = crg
 
@@ -164,32 +168,61 @@ class Step1(Module):
 
 # Test -------------------------------------------------------------------------------------------
 
-def bench(dut):
+def bench(dut, cycles=10000):
     loop = 0
     # This is how we access signals from the simulation -> "yield"
     yield dut.value.eq(0x123)
-    while (loop < 10000):
+    while (loop < cycles):
         yield
         loop = loop + 1
 
+def bench_real_clock(dut, rotations=2):
+    # Waits from a digit change to the next: the simulator skips the idle
+    # cycles where only count changes (see common/simsnap.py)
+    from simsnap import FastForward
+    yield dut.value.eq(0x123)
+    for step in range(3*rotations):
+        yield FastForward(dut.refresh_count + 1)
+        print(f"step {step}: digit {(yield dut.digit):03b}, abcdefg {(yield dut.abcdefg):07b}")
+
 def main():
 
     if "sim" in sys.argv[1:]:
-        # Gives a slower clock period to facilitate simulation
-        dut = SevenSegmentsController(10e3)
-        run_simulation(dut, bench(dut), vcd_name="sim.vcd")
+        from sim import simulate, sim_options
+        # e.g. ./step1.py sim --trace digit,abcdefg --window 0:5000 --vcd sim.vcd.gz
+        options = sim_options(sys.argv[1:])
+        if "--real-clock" in sys.argv[1:]:
+            # The real 50 MHz clock, jumping from a digit change to the next
+            dut = SevenSegmentsController(1e9/50e6)
+            simulate(dut, bench_real_clock(dut), ios={dut.digit, dut.value, dut.abcdefg}, **options)
+        elif options["fast"]:
+            # Verilator is fast enough to use the real 50 MHz clock: run a full
+            # refresh period (each of the 3 digits for refresh_count + 1 cycles)
+            dut = SevenSegmentsController(1e9/50e6)
+            cycles = 3*(dut.refresh_count + 1)
+            simulate(dut, bench(dut, cycles), ios={dut.digit, dut.value, dut.abcdefg}, **options)
+        else:
+            # Gives a slower clock period to facilitate simulation
+            dut = SevenSegmentsController(10e3)
+            simulate(dut, bench(dut), **options)
         exit()
 
+    from litex_boards.platforms import qmtech_ep4ce15_starter_kit
+
     # Instance of our platform (which is in litex_boards.platforms)
     platform = qmtech_ep4ce15_starter_kit.Platform()
-    design = Step1(platform)
 
+    # Loading only needs the programmer, not the design
     if "load" in sys.argv[1:]:
         prog = platform.create_programmer()
         prog.load_bitstream(os.path.join("gateware", "top.sof"))
         exit()
 
-    platform.build(design, build_dir="gateware")
+    from buildcache import cached_build
+    design = Step1(platform)
+
+    # Skips Quartus when the generated sources match gateware/buildcache.json
+    cached_build(platform, design, build_dir="gateware")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,169 @@
+#
+# Asynchronous CSR access through litex_server.
+#
+# AsyncClient keeps a pool of connections to litex_server that any number of
+# coroutines can share:
+#  - each access goes to the connection with the fewest outstanding reads,
+#  - reads are pipelined: up to `max_in_flight` read records per connection are
+#    outstanding, replies are matched in order,
+#  - every access has a timeout (`timeout`, or per call); a read that timed out
+#    keeps its in-flight slot until its reply arrives and is dropped.
+# Writes are not acknowledged (as with BatchClient): they complete once sent.
+# A connection that fails fails its outstanding reads and is opened again by
+# the next access. litex_server serves 4 connections at once: the default pool
+# leaves two to other clients (litex_cli, test.py's RemoteClient).
+# Accesses on different connections are not ordered with respect to each other,
+# use connections=1 when a read must see a previous write.
+#
+#   async with AsyncClient(connections=2) as client:
+#       await client.write(addr, 0x123)
+#       values = await asyncio.gather(*[client.read(addr) for _ in range(64)])
+
+import socket
+import asyncio
+import collections
+
+from etherbone import Record, encode_packet, recv_record_async, MAX_COUNT
+
+# Connection ---------------------------------------------------------------------------------------
+
+class _Connection:
+    def __init__(self, host, port, max_in_flight):
+        self.host      = host
+        self.port      = port
+        self.reader    = None
+        self.writer    = None
+        self.task      = None
+        self.pending   = collections.deque()  # Futures of the outstanding read records, in order.
+        self.slots     = asyncio.Semaphore(max_in_flight)
+        self._lock     = asyncio.Lock()
+
+    async def open(self):
+        """Opens the connection, or opens it again if it was lost."""
+        async with self._lock:
+            if self.task is not None and not self.task.done():
+                return
+            await self.close()
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            await self.reader.read(128)  # Server info, sent on connect.
+            self.task = asyncio.create_task(self._receive())
+
+    async def close(self):
+        if self.writer is None:
+            return
+        self.task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        self.writer = None
+        self._fail(ConnectionError("Connection closed"))
+
+    def _fail(self, exc):
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(exc)
+            self.slots.release()
+
+    async def _receive(self):
+        try:
+            while True:
+                record = await recv_record_async(self.reader)
+                future = self.pending.popleft()
+                self.slots.release()
+                if not future.done():  # Dropped if the read timed out.
+                    future.set_result(record.writes)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError) as e:
+            # Lost (or out of sync): the next access opens it again.
+            self.writer.close()
+            self._fail(ConnectionError(f"Etherbone connection lost: {e}"))
+
+    async def write(self, record):
+        await self.open()
+        self.writer.write(encode_packet([record]))
+        await self.writer.drain()
+
+    async def read(self, record):
+        await self.open()
+        await self.slots.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(encode_packet([record]))
+        datas = await future
+        assert len(datas) == len(record.reads)
+        return datas
+
+# AsyncClient --------------------------------------------------------------------------------------
+
+class AsyncClient:
+    def __init__(self, host="localhost", port=1234, base_address=0,
+        connections   = 2,
+        max_in_flight = 16,
+        timeout       = 1.0):
+        self.host          = host
+        self.port          = port
+        self.base_address  = base_address
+        self.max_in_flight = max_in_flight
+        self.timeout       = timeout
+        self.max_words     = MAX_COUNT  # Words per record.
+        self.pool          = [None]*connections
+        self._opening      = None
+
+    async def open(self):
+        if self._opening is None:
+            self._opening = asyncio.ensure_future(self._open())
+        await self._opening
+
+    async def _open(self):
+        for i in range(len(self.pool)):
+            connection = _Connection(self.host, self.port, self.max_in_flight)
+            await connection.open()
+            self.pool[i] = connection
+
+    async def close(self):
+        if self._opening is None:
+            return
+        await self._opening
+        for connection in self.pool:
+            await connection.close()
+        self._opening = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # Accesses ---------------------------------------------------------------------------------------
+
+    def _connection(self):
+        return min(self.pool, key=lambda c: len(c.pending))
+
+    async def _with_timeout(self, coroutine, timeout):
+        await self.open()
+        return await asyncio.wait_for(coroutine, self.timeout if timeout is None else timeout)
+
+    async def write(self, addr, data, timeout=None):
+        """Write `data` (a value or a list, to incrementing addresses) at `addr`."""
+        datas = data if isinstance(data, list) else [data]
+        addr  = self.base_address + addr
+        async def write():
+            connection = self._connection()
+            for i in range(0, len(datas), self.max_words):
+                await connection.write(Record(writes=datas[i:i + self.max_words], base_addr=addr + 4*i))
+        await self._with_timeout(write(), timeout)
+
+    async def read(self, addr, length=1, timeout=None):
+        """Read `length` words from `addr`, returns a value or, if length > 1, a list."""
+        addrs = [self.base_address + addr + 4*i for i in range(length)]
+        async def read():
+            connection = self._connection()
+            records    = [Record(reads=addrs[i:i + self.max_words]) for i in range(0, length, self.max_words)]
+            replies    = await asyncio.gather(*[connection.read(r) for r in records])
+            return [data for reply in replies for data in reply]
+        datas = await self._with_timeout(read(), timeout)
+        return datas if length > 1 else datas[0]
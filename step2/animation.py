@@ -0,0 +1,237 @@
+#
+# Host display driver: fixed-rate updates of the seven segment display.
+#
+# Display runs a scheduler thread writing at most one frame per period (rate
+# frames/s) to the SoC, through a RemoteClient (or anything with its read/write):
+#  - show(value) can be called at any rate, from any thread: values arriving
+#    faster than the frame rate are coalesced, only the latest one is written
+#    on the next frame,
+#  - play(frames) plays an animation (scroll(), counter()...), one frame per
+#    period, until it ends or show()/play() replaces it,
+#  - frames equal to the displayed one are not written,
+#  - when a write takes longer than a period, the animation frames of the
+#    missed periods are dropped (animations stay on time).
+# stats() counts written, coalesced, unchanged and dropped frames.
+#
+# A value is an int (hex digits, digit[0] is the most significant nibble) or a
+# list of framebuffer bytes (framebuffer.py: hex digits or raw() patterns). On
+# the value CSR, only hex digits can be shown; with --framebuffer, each frame
+# is one burst write and a flip.
+#
+#   with Display(wb, csrmap.load("csr.csv"), rate=30) as display:
+#       display.play(scroll("HELLO"), loop=True)
+#       time.sleep(5)
+#       display.show(bcd(42))
+
+import time
+import threading
+
+from framebuffer import raw, pack
+
+# Frames -------------------------------------------------------------------------------------------
+
+# Character -> segments (active high, segment A is bit 0), see framebuffer.raw().
+FONT = {
+    "0": 0x3f, "1": 0x06, "2": 0x5b, "3": 0x4f, "4": 0x66, "5": 0x6d, "6": 0x7d, "7": 0x07,
+    "8": 0x7f, "9": 0x6f, "A": 0x77, "B": 0x7c, "C": 0x39, "D": 0x5e, "E": 0x79, "F": 0x71,
+    "G": 0x3d, "H": 0x76, "I": 0x30, "J": 0x1e, "L": 0x38, "N": 0x54, "O": 0x5c, "P": 0x73,
+    "R": 0x50, "S": 0x6d, "T": 0x78, "U": 0x3e, "Y": 0x6e, "-": 0x40, "_": 0x08, " ": 0x00,
+}
+
+def text(string):
+    """Framebuffer bytes of `string`: hex digits decoded by the controller, other characters raw."""
+    frame = []
+    for c in string.upper():
+        if c in "0123456789ABCDEF":
+            frame.append(int(c, 16))
+        elif c in FONT:
+            frame.append(raw(~FONT[c] & 0x7f))  # The display is active low.
+        else:
+            raise ValueError(f"No seven segment pattern for {c!r}")
+    return frame
+
+def bcd(n, ndigits=3):
+    """Value showing `n` in decimal."""
+    return int(f"{n % 10**ndigits:0{ndigits}d}", 16)
+
+# Animations ---------------------------------------------------------------------------------------
+
+def scroll(string, ndigits=3, hold=4):
+    """Frames of `string` scrolling right to left, each position shown for `hold` frames."""
+    frame = text(" "*ndigits + string + " "*ndigits)
+    for i in range(len(frame) - ndigits + 1):
+        for _ in range(hold):
+            yield frame[i:i + ndigits]
+
+def counter(start=0, step=1, hold=1, ndigits=3, decimal=False):
+    """Counting frames, each value shown for `hold` frames."""
+    n = start
+    while True:
+        for _ in range(hold):
+            yield bcd(n, ndigits) if decimal else n % 16**ndigits
+        n += step
+
+# Display ------------------------------------------------------------------------------------------
+
+class Display:
+    def __init__(self, bus, csrs, rate=30, ndigits=3):
+        self.bus          = bus
+        self.period       = 1/rate
+        self.ndigits      = ndigits
+        self._framebuffer = "seven_seg_fb" in csrs.memories
+        if self._framebuffer:
+            self._base    = csrs.memories["seven_seg_fb"][0]
+            self._flip    = csrs.handle(bus, "seven_seg_ctrl_framebuffer_flip")
+            self._pending = csrs.handle(bus, "seven_seg_ctrl_framebuffer_pending")
+            self._write   = self._write_framebuffer
+        else:
+            self._value = csrs.handle(bus, "seven_seg_ctrl_value")
+            self._write = self._write_value
+
+        self._lock      = threading.Lock()
+        self._stop      = threading.Event()
+        self._latest    = None  # Frame from show(), not written yet.
+        self._animation = None
+        self._shown     = None
+        self._thread    = None
+        self._error     = None
+        self._stats     = dict(frames=0, written=0, coalesced=0, unchanged=0, dropped=0)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Writes the value passed to show() last, if not written yet, then stops the scheduler."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._check()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    # API ------------------------------------------------------------------------------------------
+
+    def show(self, value):
+        """Displays `value` on the next frame (int or framebuffer bytes); stops any animation."""
+        self._check()
+        frame = self._frame(value)
+        with self._lock:
+            if self._latest is not None:
+                self._stats["coalesced"] += 1
+            self._latest    = frame
+            self._animation = None
+
+    def play(self, frames, loop=False):
+        """Displays the frames of `frames`, one per period (loop: replays a finite sequence)."""
+        self._check()
+        if loop:
+            frames = list(frames)
+            def looped():
+                while True:
+                    yield from frames
+            frames = looped()
+        with self._lock:
+            self._latest    = None
+            self._animation = iter(frames)
+
+    @property
+    def playing(self):
+        return self._animation is not None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    # Scheduler ------------------------------------------------------------------------------------
+
+    def _frame(self, value):
+        """Value CSR content or framebuffer bytes of `value`."""
+        if isinstance(value, int):
+            if not 0 <= value < 16**self.ndigits:
+                raise ValueError(f"{value:#x} does not fit in {self.ndigits} digits")
+            if not self._framebuffer:
+                return value
+            return [(value >> 4*(self.ndigits - 1 - i)) & 0xf for i in range(self.ndigits)]
+        value = list(value)
+        if len(value) != self.ndigits:
+            raise ValueError(f"Frame of {len(value)} digits, the display has {self.ndigits}")
+        if not self._framebuffer:
+            if any(b > 0xf for b in value):
+                raise ValueError("Raw segment patterns need the framebuffer (--framebuffer)")
+            return sum(b << 4*(self.ndigits - 1 - i) for i, b in enumerate(value))
+        return value
+
+    def _write_value(self, frame):
+        self._value.write(frame)
+
+    def _write_framebuffer(self, frame):
+        # The back page may only be written once the previous flip happened.
+        while self._pending.read():
+            pass
+        self.bus.write(self._base, pack(frame))
+        self._flip.write(1)
+
+    def _next(self):
+        """Frame of this period, or None if there is nothing new."""
+        with self._lock:
+            if self._latest is not None:
+                frame, self._latest = self._latest, None
+                return frame
+            animation = self._animation
+        if animation is not None:
+            value = next(animation, None)
+            if value is not None:
+                return self._frame(value)
+            with self._lock:
+                if self._animation is animation:
+                    self._animation = None
+        return None
+
+    def _run(self):
+        deadline = time.perf_counter()
+        try:
+            while True:
+                stopping = self._stop.is_set()
+                frame    = self._next()
+                if frame is not None:
+                    written = frame != self._shown
+                    if written:
+                        self._write(frame)
+                        self._shown = frame
+                    with self._lock:
+                        self._stats["frames"]    += 1
+                        self._stats["written"]   += written
+                        self._stats["unchanged"] += not written
+                if stopping:
+                    break
+
+                # Fixed rate: next deadline on the period grid, animation frames of missed ones dropped.
+                deadline += self.period
+                late      = time.perf_counter() - deadline
+                if late > 0:
+                    missed    = int(late/self.period) + 1
+                    deadline += missed*self.period
+                    with self._lock:
+                        animation = self._animation
+                    for _ in range(missed if animation is not None else 0):
+                        if next(animation, None) is None:
+                            break
+                        with self._lock:
+                            self._stats["dropped"] += 1
+                self._stop.wait(deadline - time.perf_counter())
+        except Exception as e:
+            self._error = e
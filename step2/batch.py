@@ -0,0 +1,131 @@
+#
+# Batched, pipelined CSR access through litex_server.
+#
+# Accesses are queued and merged into as few Etherbone records as litex_server
+# allows:
+#  - consecutive writes to incrementing addresses become one burst record,
+#  - consecutive reads (any addresses) become one read record,
+#  - writes to the same address (CSR updates, FIFOs) stay one record each:
+#    litex_server writes the datas of a record to incrementing addresses.
+# litex_server takes one record per packet: records are sent as back to back
+# packets, several per send(). Write records are not acknowledged; at most
+# `max_in_flight` read records are outstanding before the client waits for a
+# reply. Reads are returned in order.
+
+import socket
+
+from etherbone import Record, encode_packet, recv_record, recv_server_info, MAX_COUNT
+
+# BatchClient --------------------------------------------------------------------------------------
+
+class BatchClient:
+    def __init__(self, host="localhost", port=1234, base_address=0,
+        batch_size    = 256,
+        max_in_flight = 16,
+        max_send      = 4096):  # Bytes of packets per send().
+        self.host          = host
+        self.port          = port
+        self.base_address  = base_address
+        self.batch_size    = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_send      = max_send
+        self.socket        = None
+        self._queue        = []  # ("w", addr, data) / ("r", addr).
+        self._in_flight    = []  # Number of reads expected by each outstanding read record.
+        self._results      = []
+
+    def open(self):
+        if self.socket is not None:
+            return
+        self.socket = socket.create_connection((self.host, self.port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        recv_server_info(self.socket)
+
+    def close(self):
+        if self.socket is None:
+            return
+        self.flush()
+        self.socket.close()
+        self.socket = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Queue ------------------------------------------------------------------------------------------
+
+    def write(self, addr, data):
+        datas = data if isinstance(data, list) else [data]
+        for i, d in enumerate(datas):
+            self._queue.append(("w", self.base_address + addr + 4*i, d))
+        self._maybe_send()
+
+    def read(self, addr, length=1):
+        for i in range(length):
+            self._queue.append(("r", self.base_address + addr + 4*i))
+        self._maybe_send()
+
+    def flush(self):
+        """Send everything queued, wait for all reads and return their values in order."""
+        self._send()
+        while self._in_flight:
+            self._receive()
+        results, self._results = self._results, []
+        return results
+
+    # Transport --------------------------------------------------------------------------------------
+
+    def _maybe_send(self):
+        if len(self._queue) >= self.batch_size:
+            self._send()
+
+    def _records(self):
+        records = []
+        for op in self._queue:
+            last = records[-1] if records else None
+            if op[0] == "w":
+                _, addr, data = op
+                if last is not None and not last.reads and len(last.writes) < MAX_COUNT:
+                    if addr == last.base_addr + 4*len(last.writes):
+                        last.writes.append(data)
+                        continue
+                records.append(Record(writes=[data], base_addr=addr))
+            else:
+                _, addr = op
+                if last is not None and not last.writes and len(last.reads) < MAX_COUNT:
+                    last.reads.append(addr)
+                    continue
+                records.append(Record(reads=[addr]))
+        self._queue = []
+        return records
+
+    def _send(self):
+        if not self._queue:
+            return
+        self.open()
+        data = b""
+        for record in self._records():
+            packet = encode_packet([record])
+            if data and len(data) + len(packet) > self.max_send:
+                self.socket.sendall(data)
+                data = b""
+            data += packet
+            if record.reads:
+                # Bound the number of outstanding read records.
+                while len(self._in_flight) >= self.max_in_flight:
+                    if data:
+                        self.socket.sendall(data)
+                        data = b""
+                    self._receive()
+                self._in_flight.append(len(record.reads))
+        if data:
+            self.socket.sendall(data)
+
+    def _receive(self):
+        count  = self._in_flight.pop(0)
+        record = recv_record(self.socket)
+        assert len(record.writes) == count
+        self._results.extend(record.writes)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+#
+# Latency and throughput of AsyncClient against the local litex_server stand-in.
+#
+# 1, 8 and 64 coroutines share one client and each issue reads one after the
+# other; reads are checked against the stand-in's memory. Also checks that a
+# read timing out does not disturb the following ones and that a lost
+# connection is opened again.
+#
+# ./bench_aio.py [--latency 0.001] [--ops 2048] [--connections 2]
+
+import time
+import asyncio
+import argparse
+import statistics
+
+from etherbone import EtherboneServer
+from aioclient import AsyncClient
+
+CSR_BASE = 0xf0000000
+
+async def caller(client, index, ops, latencies):
+    addr = CSR_BASE + 4*index
+    for _ in range(ops):
+        start = time.perf_counter()
+        value = await client.read(addr)
+        latencies.append(time.perf_counter() - start)
+        assert value == index, f"Read {value:#x} at {addr:#x}, expected {index:#x}"
+
+async def bench(port, callers, ops, connections):
+    latencies = []
+    async with AsyncClient(port=port, connections=connections) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[caller(client, i, ops//callers, latencies) for i in range(callers)])
+        elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100)
+    return len(latencies)/elapsed, percentiles[49], percentiles[89], percentiles[98]
+
+async def check_timeout(port, latency):
+    async with AsyncClient(port=port, connections=1) as client:
+        try:
+            await client.read(CSR_BASE, timeout=latency/10)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("Read did not time out")
+        # The late reply is dropped, not returned to the next read.
+        assert await client.read(CSR_BASE + 4) == 1
+
+async def check_reconnect(port):
+    async with AsyncClient(port=port, connections=1) as client:
+        assert await client.read(CSR_BASE + 4) == 1
+        client.pool[0].writer.transport.abort()
+        await asyncio.sleep(0.1)
+        assert await client.read(CSR_BASE + 8) == 2
+
+def main():
+    parser = argparse.ArgumentParser(description="AsyncClient latency and throughput.")
+    parser.add_argument("--latency",     default=1e-3, type=float, help="Stand-in latency per record (s).")
+    parser.add_argument("--ops",         default=2048, type=int,   help="Reads per run.")
+    parser.add_argument("--connections", default=2,    type=int,   help="Pooled connections (litex_server serves 4).")
+    args = parser.parse_args()
+
+    mem = {CSR_BASE + 4*i: i for i in range(64)}
+    with EtherboneServer(latency=args.latency, mem=mem) as server:
+        print(f"Stand-in latency: {args.latency*1e3:.3f} ms/record, {args.ops} reads, {args.connections} connections")
+        for callers in [1, 8, 64]:
+            rate, p50, p90, p99 = asyncio.run(bench(server.port, callers, args.ops, args.connections))
+            print(f"{callers:3d} callers: {rate:10.0f} ops/s  p50 {p50*1e3:8.3f} ms  p90 {p90*1e3:8.3f} ms  p99 {p99*1e3:8.3f} ms")
+        if args.latency:
+            asyncio.run(check_timeout(server.port, args.latency))
+            print("Timeout: ok")
+        asyncio.run(check_reconnect(server.port))
+        print("Reconnect: ok")
+
+if __name__ == "__main__":
+    main()
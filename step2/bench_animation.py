@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+#
+# Display (animation.py) rate control and coalescing, against a fake RemoteClient.
+#
+# - coalesce:  show() called at several kHz: at most one write per frame, the
+#              last value is the one displayed,
+# - unchanged: the same value shown repeatedly is written once,
+# - slow bus:  writes slower than the frame period: frames are dropped and the
+#              counter animation stays on time,
+# - scroll:    text scrolled through the framebuffer (--framebuffer), frame by frame.
+#
+# ./bench_animation.py [--rate 30] [--duration 1]
+
+import sys
+import time
+import argparse
+import threading
+
+from animation import Display, scroll, counter
+from framebuffer import pack
+import csrmap
+
+VALUE_ADDR = 0xf0001800
+FB_BASE    = 0x90000000
+
+# Fake RemoteClient --------------------------------------------------------------------------------
+
+class FakeRemoteClient:
+    """Memory-backed RemoteClient stand-in: `latency` s per access, writes logged with their time."""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.mem     = {}
+        self.writes  = []  # (time, addr, data).
+        self.lock    = threading.Lock()
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, addr, length=None):
+        time.sleep(self.latency)
+        with self.lock:
+            datas = [self.mem.get(addr + 4*i, 0) for i in range(length or 1)]
+        return datas if length is not None else datas[0]
+
+    def write(self, addr, data):
+        time.sleep(self.latency)
+        with self.lock:
+            for i, d in enumerate(data if isinstance(data, list) else [data]):
+                self.mem[addr + 4*i] = d
+            self.writes.append((time.perf_counter(), addr, data))
+
+def fake_csrs(framebuffer=False):
+    registers = {"seven_seg_ctrl_value": [VALUE_ADDR, 1, "rw"]}
+    memories  = {}
+    if framebuffer:
+        registers["seven_seg_ctrl_framebuffer_flip"]    = [VALUE_ADDR + 4, 1, "rw"]
+        registers["seven_seg_ctrl_framebuffer_pending"] = [VALUE_ADDR + 8, 1, "ro"]
+        memories["seven_seg_fb"] = [FB_BASE, 4, "io"]
+    return csrmap.CSRMap({"bases": {}, "registers": registers, "constants": {}, "memories": memories})
+
+# Scenarios ----------------------------------------------------------------------------------------
+
+def run_coalesce(rate, duration, errors):
+    bus   = FakeRemoteClient()
+    calls = 0
+    with Display(bus, fake_csrs(), rate=rate) as display:
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            display.show(calls % 4096)
+            calls += 1
+            time.sleep(0.0002)
+    stats = display.stats()
+    times = [t for t, _, _ in bus.writes]
+    # Writes are on the period grid, give or take the scheduling jitter: at most 11 in 10 periods.
+    burst = max([sum(1 for u in times if t <= u < t + 10/rate) for t in times] or [0])
+    if len(bus.writes) > duration*rate + 2:
+        errors.append(f"coalesce: {len(bus.writes)} writes in {duration}s at {rate} frames/s")
+    if burst > 11:
+        errors.append(f"coalesce: {burst} writes in 10 frame periods")
+    if bus.mem[VALUE_ADDR] != (calls - 1) % 4096:
+        errors.append(f"coalesce: displays {bus.mem[VALUE_ADDR]:#x}, last shown {(calls - 1) % 4096:#x}")
+    if stats["coalesced"] + stats["frames"] != calls:
+        errors.append(f"coalesce: {stats['coalesced']} coalesced + {stats['frames']} frames != {calls} calls")
+    print(f"coalesce:  {calls} show() calls, {stats['written']} writes, {stats['coalesced']} coalesced")
+
+def run_unchanged(rate, duration, errors):
+    bus = FakeRemoteClient()
+    with Display(bus, fake_csrs(), rate=rate) as display:
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            display.show(0x123)
+            time.sleep(0.25/rate)
+    stats = display.stats()
+    if len(bus.writes) != 1:
+        errors.append(f"unchanged: {len(bus.writes)} writes of the same value")
+    print(f"unchanged: {stats['frames']} frames, {stats['written']} written, {stats['unchanged']} unchanged")
+
+def run_slow_bus(rate, duration, errors):
+    latency = 1.5/rate
+    bus     = FakeRemoteClient(latency=latency)
+    display = Display(bus, fake_csrs(), rate=rate)
+    display.play(counter())
+    start = time.perf_counter()
+    display.start()
+    time.sleep(duration)
+    display.stop()
+    elapsed = time.perf_counter() - start
+    stats   = display.stats()
+    # Every frame written or dropped: the counter is the number of periods elapsed.
+    expected = elapsed*rate
+    shown    = bus.mem[VALUE_ADDR]
+    if stats["dropped"] == 0:
+        errors.append("slow bus: no frame dropped")
+    if abs(shown - expected) > 3:
+        errors.append(f"slow bus: counter at {shown} after {expected:.1f} periods")
+    print(f"slow bus:  {latency*1e3:.0f} ms/write, {stats['written']} written, {stats['dropped']} dropped, "
+          f"counter {shown} after {expected:.1f} periods")
+
+def run_scroll(rate, errors):
+    bus      = FakeRemoteClient()
+    message  = "HELLO 42"
+    expected = [pack(frame) for frame in scroll(message, hold=1)]
+    with Display(bus, fake_csrs(framebuffer=True), rate=rate) as display:
+        display.play(scroll(message, hold=1))
+        while display.playing:
+            time.sleep(0.01)
+    frames = [data for _, addr, data in bus.writes if addr == FB_BASE]
+    flips  = [data for _, addr, data in bus.writes if addr == VALUE_ADDR + 4]
+    # Consecutive identical frames (spaces) are written once; frames dropped on a late period are not.
+    dropped = display.stats()["dropped"]
+    unique  = [f for i, f in enumerate(expected) if i == 0 or f != expected[i - 1]]
+    rest    = iter(unique)
+    if not all(frame in rest for frame in frames) or len(frames) + dropped < len(unique):
+        errors.append("scroll: frames written out of order or missing")
+    if len(flips) != len(frames):
+        errors.append(f"scroll: {len(frames)} frames written, {len(flips)} flips")
+    print(f"scroll:    '{message}', {len(frames)} frames, {dropped} dropped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Display rate control and coalescing (fake RemoteClient).")
+    parser.add_argument("--rate",     default=30, type=float, help="Frames/s.")
+    parser.add_argument("--duration", default=1,  type=float, help="Duration of each timed scenario (s).")
+    args = parser.parse_args()
+
+    errors = []
+    run_coalesce(args.rate, args.duration, errors)
+    run_unchanged(args.rate, args.duration, errors)
+    run_slow_bus(args.rate, args.duration, errors)
+    run_scroll(50, errors)
+    for error in errors:
+        print("  " + error)
+    if errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
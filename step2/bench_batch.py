@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+#
+# CSR write throughput of BatchClient against the local litex_server stand-in.
+#
+# Two access patterns: repeated writes to one CSR (each one record, as
+# litex_server writes the datas of a record to incrementing addresses) and
+# writes to incrementing addresses (memory, framebuffer: burst records). Each
+# run reads the written values back and checks the addresses the stand-in saw.
+#
+# ./bench_batch.py [--latency 0.001] [--writes 2048]
+
+import argparse
+import time
+
+from etherbone import EtherboneServer
+from batch import BatchClient
+
+CSR_ADDR = 0xf0001800
+MEM_ADDR = 0x10000000
+
+def bench(server, batch_size, writes, burst):
+    addrs = [MEM_ADDR + 4*i if burst else CSR_ADDR for i in range(writes)]
+    server.writes.clear()
+    with BatchClient(port=server.port, batch_size=batch_size) as client:
+        start = time.perf_counter()
+        for i, addr in enumerate(addrs):
+            client.write(addr, i & 0xfff)
+            if batch_size == 1:
+                client.flush()
+        # Read back as a barrier: the server has handled every write once it answers.
+        client.read(addrs[-1])
+        last = client.flush()[-1]
+        elapsed = time.perf_counter() - start
+    assert last == (writes - 1) & 0xfff, f"Read {last:#x} at {addrs[-1]:#x}"
+    assert [addr for addr, _ in server.writes] == addrs, "Writes landed at other addresses"
+    return writes/elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="BatchClient CSR write throughput.")
+    parser.add_argument("--latency", default=1e-3, type=float, help="Stand-in latency per record (s).")
+    parser.add_argument("--writes",  default=2048, type=int,   help="Writes per batch size.")
+    args = parser.parse_args()
+
+    with EtherboneServer(latency=args.latency) as server:
+        print(f"Stand-in latency: {args.latency*1e3:.3f} ms/record, {args.writes} writes")
+        for burst in [False, True]:
+            for batch_size in [1, 16, 256]:
+                rate = bench(server, batch_size, args.writes, burst)
+                print(f"{'burst' if burst else 'csr':5s} batch {batch_size:4d}: {rate:12.0f} writes/s")
+
+if __name__ == "__main__":
+    main()
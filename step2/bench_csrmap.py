@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+#
+# Register resolution overhead: wb.regs (LiteX RemoteClient) vs csrmap handles.
+#
+# Both paths write to a bus whose read/write do nothing, so only the lookup and
+# address math are measured. Also times loading the map with and without its
+# cache, on a generated csr.csv.
+#
+# ./bench_csrmap.py [--accesses 200000] [--registers 256]
+
+import os
+import time
+import argparse
+import tempfile
+
+import csrmap
+
+# Helpers ------------------------------------------------------------------------------------------
+
+class NullBus:
+    def read(self, addr, length=None):
+        return 0 if length is None else [0]*length
+
+    def write(self, addr, datas):
+        pass
+
+def write_csr_csv(filename, registers):
+    with open(filename, "w") as f:
+        f.write("#" + "-"*80 + "\n# Auto-generated by LiteX\n#" + "-"*80 + "\n")
+        f.write("csr_base,seven_seg_ctrl,0xf0001800,,\n")
+        f.write("csr_register,seven_seg_ctrl_value,0xf0001800,1,rw\n")
+        for i in range(registers - 1):
+            f.write(f"csr_register,dummy{i//16}_reg{i%16},{0xf0002000 + 4*i:#010x},{1 + i%2},rw\n")
+        f.write("constant,config_clock_frequency,50000000,,\n")
+        f.write("constant,config_csr_data_width,32,,\n")
+        f.write("constant,config_bus_address_width,32,,\n")
+        f.write("memory_region,csr,0xf0000000,65536,io\n")
+
+def per_access(write, accesses):
+    start = time.perf_counter()
+    for i in range(accesses):
+        write(i)
+    return (time.perf_counter() - start)/accesses
+
+# Bench --------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="CSR register resolution overhead.")
+    parser.add_argument("--accesses",  default=200000, type=int, help="Writes per path.")
+    parser.add_argument("--registers", default=256,    type=int, help="Registers in the generated csr.csv.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "csr.csv")
+        write_csr_csv(filename, args.registers)
+
+        start = time.perf_counter()
+        csrs  = csrmap.load(filename)
+        cold  = time.perf_counter() - start
+        csrmap.clear()
+        start = time.perf_counter()
+        csrs  = csrmap.load(filename)
+        warm  = time.perf_counter() - start
+        start = time.perf_counter()
+        csrs  = csrmap.load(filename)
+        hot   = time.perf_counter() - start
+        print(f"load: {cold*1e3:.3f} ms parsed, {warm*1e3:.3f} ms from cache file, {hot*1e3:.3f} ms in memory")
+
+        bus = NullBus()
+        results = {"bus.write (floor)": per_access(lambda i: bus.write(0xf0001800, i), args.accesses)}
+        value = csrs.handle(bus, "seven_seg_ctrl_value")
+        results["csrmap handle"] = per_access(value.write, args.accesses)
+
+        try:
+            from litex import RemoteClient
+        except ImportError:
+            print("litex is not installed, skipping the wb.regs path")
+        else:
+            class NullClient(RemoteClient):
+                read  = NullBus.read
+                write = NullBus.write
+            wb = NullClient(csr_csv=filename)
+            results["wb.regs"] = per_access(lambda i: wb.regs.seven_seg_ctrl_value.write(i), args.accesses)
+
+    floor = results["bus.write (floor)"]
+    for name, t in results.items():
+        print(f"{name:20s}: {t*1e9:8.1f} ns/access ({(t - floor)*1e9:8.1f} ns over the bus call)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+#
+# JTAGbone bulk transfer throughput, word mode vs burst mode (jtagbone.py).
+#
+# Writes then reads back random blocks of 1 to 64 KiB through a SimTAP (JTAGPHY
+# + UARTBone model), checks the data and reports bytes/s from the modelled JTAG
+# time: --scan-overhead per DR scan (USB round trip of the cable) plus 10 bits
+# per frame at --tck.
+#
+# First checks transfers spanning several scans (small bursts scans, word mode
+# with commands filling a poll scan), with ready reading 0 in the first frame
+# of each scan as on the JTAGPHY, and that a byte refused by the target at the
+# end of a scan is reported.
+#
+# ./bench_jtagbone.py [--tck 6e6] [--scan-overhead 1e-3] [--sizes 1,4,16,64]
+
+import os
+import argparse
+
+from jtagbone import SimTAP, JTAGBone
+
+BASE = 0x40000000
+
+def run(burst, size, tck, scan_overhead):
+    tap  = SimTAP(tck=tck, scan_overhead=scan_overhead)
+    bone = JTAGBone(tap, burst=burst)
+    data = os.urandom(size)
+    results = []
+    for name, op in [("write", lambda: bone.mem_write(BASE, data)), ("read", lambda: bone.mem_read(BASE, size))]:
+        time, scans = tap.time, tap.scans
+        ret = op()
+        results.append((name, tap.time - time, tap.scans - scans))
+    assert ret == data, "JTAGbone read back mismatch"
+    return results
+
+def check_multi_scan():
+    data = os.urandom(1024)
+    for kwargs in [dict(burst=True, max_frames=64), dict(burst=False, tx_chunk=10, poll_frames=10)]:
+        tap  = SimTAP()
+        bone = JTAGBone(tap, **kwargs)
+        bone.mem_write(BASE, data)
+        assert bone.mem_read(BASE, len(data)) == data, f"JTAGbone read back mismatch ({kwargs})"
+        assert tap.scans > 2, tap.scans
+    # Last data frame of the first scan (63 bytes + the ready frame) refused.
+    bone = JTAGBone(SimTAP(drop=[62]), max_frames=64)
+    try:
+        bone.mem_write(BASE, data)
+    except IOError:
+        pass
+    else:
+        raise AssertionError("Byte dropped at the end of a scan not detected")
+    print("multi-scan transfers: ok")
+
+def main():
+    parser = argparse.ArgumentParser(description="JTAGbone bulk transfer throughput (modelled JTAG time).")
+    parser.add_argument("--tck",           default=6e6,        type=float, help="TCK frequency (Hz).")
+    parser.add_argument("--scan-overhead", default=1e-3,       type=float, help="Fixed cost of a DR scan (s).")
+    parser.add_argument("--sizes",         default="1,4,16,64",            help="Block sizes in KiB.")
+    args = parser.parse_args()
+
+    check_multi_scan()
+    for kib in [int(s) for s in args.sizes.split(",")]:
+        for burst in [False, True]:
+            for name, time, scans in run(burst, kib*1024, args.tck, args.scan_overhead):
+                print(f"{kib:3d} KiB {'burst' if burst else 'word ':5s} mem_{name:5s}: "
+                      f"{scans:6d} scans {time:8.3f} s {kib*1024/time/1e3:8.1f} KB/s")
+
+if __name__ == "__main__":
+    main()
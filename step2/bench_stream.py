@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+#
+# Sustained frame rate and underflows of the controller's streaming mode (simulation).
+#
+# The host is modelled as one transaction every `latency` cycles carrying up to
+# `burst` frames (never more than the FIFO has room for, as a script reading
+# seven_seg_ctrl_level would do). Playback runs at one frame every rate + 1
+# cycles; the bench checks frames come out in order and counts underflows.
+#
+# ./bench_stream.py --rate 99 --latency 500 --frames 200
+
+import os
+import sys
+import argparse
+
+from migen import *
+
+from controller import SevenSegmentsController
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from sim import simulate
+
+# Bench --------------------------------------------------------------------------------------------
+
+def bench(dut, frames, burst, latency, rate, depth, stats):
+    yield dut.rate.storage.eq(rate)
+    pushed  = 0
+    to_push = 0
+    wait    = 0
+    played  = []
+    while len(played) < frames:
+        # Host side: a transaction every `latency` cycles, one frame written per cycle.
+        if to_push == 0 and wait == 0 and pushed < frames:
+            to_push = min(burst, frames - pushed, depth - (yield dut.level.status))
+            wait    = latency
+            # Start playing once the first transaction is in.
+            yield dut.stream.storage.eq(1)
+        if to_push:
+            yield dut.fifo.r.eq(pushed & 0xfff)
+            yield dut.fifo.re.eq(1)
+            pushed  += 1
+            to_push -= 1
+        else:
+            yield dut.fifo.re.eq(0)
+        # Gateware side: frames popped at each playback tick.
+        if (yield dut.tick) and (yield dut.frames.readable):
+            played.append((yield dut.frames.dout))
+        yield
+        wait = max(wait - 1, 0)
+        stats["cycles"] += 1
+    stats["underflows"] = (yield dut.underflows.status)
+    assert played == [i & 0xfff for i in range(frames)], "Frames played out of order"
+
+# Run ----------------------------------------------------------------------------------------------
+
+def run(name, frames, burst, latency, rate, depth, sys_clk_freq, vcd_name):
+    dut   = SevenSegmentsController(1e9/sys_clk_freq, with_stream=True, fifo_depth=depth)
+    stats = {"cycles": 0, "underflows": 0}
+    simulate(dut, bench(dut, frames, burst, latency, rate, depth, stats), vcd_name=vcd_name)
+    fps    = frames*sys_clk_freq/stats["cycles"]
+    target = sys_clk_freq/(rate + 1)
+    print(f"{name:10s}: {fps:10.0f} frames/s sustained ({target:.0f} target), {stats['underflows']} underflows")
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming display playback (simulation).")
+    parser.add_argument("--frames",       default=200,  type=int,   help="Frames to play.")
+    parser.add_argument("--depth",        default=64,   type=int,   help="FIFO depth.")
+    parser.add_argument("--rate",         default=99,   type=int,   help="Playback period - 1 (cycles).")
+    parser.add_argument("--latency",      default=500,  type=int,   help="Cycles between host transactions.")
+    parser.add_argument("--sys-clk-freq", default=50e6, type=float, help="System clock frequency.")
+    parser.add_argument("--vcd",          default=None,             help="Trace file (.vcd, .vcd.gz or .fst).")
+    args = parser.parse_args()
+
+    # Today's path: one frame per host transaction.
+    run("single", args.frames, 1, args.latency, args.rate, args.depth, args.sys_clk_freq, args.vcd)
+    # Streaming: each transaction fills the free part of the FIFO.
+    run("burst",  args.frames, args.depth, args.latency, args.rate, args.depth, args.sys_clk_freq, args.vcd)
+
+if __name__ == "__main__":
+    main()
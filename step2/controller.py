@@ -1,6 +1,16 @@
+import os
+import sys
+
 from migen import *
+from migen.genlib.fifo import SyncFIFO
+from migen.genlib.cdc import BusSynchronizer
+
+from litex.soc.interconnect.csr import AutoCSR, CSR, CSRStatus, CSRStorage
+
+from framebuffer import Framebuffer
 
-from litex.soc.interconnect.csr import AutoCSR, CSRStorage
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from timer import Prescaler, Timer
 
 class SevenSegment(Module):
     def __init__(self):
@@ -32,11 +42,28 @@ class SevenSegment(Module):
 #-
 #- Inherit from AutoCSR
 #-
+#- The display logic runs in `clock_domain` (period_ns is the
+#- period of its clock), the CSRs stay in sys.
+#-
 #----------------------------------------------------------------
 class SevenSegmentsController(Module, AutoCSR):
-    def __init__(self, period_ns):
+    def __init__(self, period_ns, with_stream=False, fifo_depth=512, low_power=False, refresh_time=2,
+        clock_domain="sys", with_framebuffer=False):
+        if with_stream and clock_domain != "sys":
+            raise ValueError("Streaming is only supported with the display in the sys clock domain.")
+        if with_framebuffer and (with_stream or low_power or clock_domain != "sys"):
+            raise ValueError("The framebuffer replaces the value register of the default sys domain display.")
+
         self.digit   = digit   = Signal(3, reset = 1)
-        self.abcdefg = abcdefg = Signal(7)
+        # In low power mode abcdefg is a register: reset to the decode of 0.
+        self.abcdefg = abcdefg = Signal(7, reset = 0b1000000 if low_power else 0)
+
+        refresh_count = int(((refresh_time * 1e6) / period_ns))
+        self.refresh_count = refresh_count
+
+        if with_framebuffer:
+            self.add_framebuffer()
+            return
 
         #----------------------------------------------------------------
         #-
@@ -47,36 +74,202 @@ class SevenSegmentsController(Module, AutoCSR):
 
         ###
 
-        refresh_time  = 2
-        refresh_count = int(((refresh_time * 1e6) / period_ns))
+        #----------------------------------------------------------------
+        #-
+        #- Use the CSR value. !!! Use value.storage !!!
+        #-
+        #----------------------------------------------------------------
+        shown = value.storage
+        if with_stream:
+            # Streamed frames while "stream" is set, the value register otherwise.
+            frame = self.add_stream(period_ns, fifo_depth)
+            shown = Mux(self.stream.storage, frame, value.storage)
+        if clock_domain != "sys":
+            shown = self.add_cdc(shown, clock_domain)
 
-        count = Signal(32)
+        if low_power:
+            self.add_low_power(period_ns, refresh_time, shown, clock_domain)
+            return
 
-        self.sync += [
+        self.add_refresh(clock_domain)
+
+        segments_value = Signal(4)
+
+        cases = {
+            0x4: segments_value.eq(shown[0:4]),
+            0x2: segments_value.eq(shown[4:8]),
+            0x1: segments_value.eq(shown[8:12])
+        }
+        self.comb += Case(digit, cases)
+
+        self.submodules.sevensegment = segments = SevenSegment()
+
+        self.comb += [
+            segments.value.eq(segments_value),
+            abcdefg.eq(segments.abcdefg),
+        ]
+
+    #----------------------------------------------------------------
+    #-
+    #- Refresh: each digit is shown for refresh_count + 1 cycles of
+    #- `clock_domain`, then the next one. Returns the strobe of the
+    #- last cycle of a digit (the digit rotates on the next edge).
+    #-
+    #----------------------------------------------------------------
+    def add_refresh(self, clock_domain="sys"):
+        digit         = self.digit
+        refresh_count = self.refresh_count
+        sync          = getattr(self.sync, clock_domain)
+
+        # Just wide enough to count up to refresh_count
+        count  = Signal(max=refresh_count + 1)
+        rotate = Signal()
+
+        self.comb += rotate.eq(count == refresh_count)
+        sync += [
             count.eq(count + 1),
-            If (count == refresh_count,
+            If (rotate,
                 count.eq(0),
                 digit.eq(Cat(digit[2], digit[0:2]))
             )
         ]
+        return rotate
+
+    #----------------------------------------------------------------
+    #-
+    #- Low activity: the refresh timer counts the 1 us clock-enable of
+    #- a shared Johnson counter Prescaler (one flip-flop toggle per
+    #- cycle) instead of every clock, and abcdefg is a register only
+    #- loaded (clock-enable) when the digit or the shown value
+    #- changes. Between updates, only the prescaler toggles.
+    #-
+    #----------------------------------------------------------------
+    def add_low_power(self, period_ns, refresh_time, shown, clock_domain="sys"):
+        digit   = self.digit
+        abcdefg = self.abcdefg
+        sync    = getattr(self.sync, clock_domain)
+
+        prescaler = Prescaler(1e3, period_ns, johnson=True)
+        refresh   = Timer(refresh_time*1e6, period_ns, prescaler)
+        self.submodules.prescaler = ClockDomainsRenamer(clock_domain)(prescaler)
+        self.submodules.refresh   = ClockDomainsRenamer(clock_domain)(refresh)
 
+        # Digit and nibble of the next state: the update below loads them together.
+        next_digit     = Signal(3)
         segments_value = Signal(4)
+        shown_q        = Signal(12)
+        update         = Signal()
+
+        self.comb += [
+            next_digit.eq(Mux(refresh.tick, Cat(digit[2], digit[0:2]), digit)),
+            update.eq(refresh.tick | (shown != shown_q)),
+        ]
 
-        #----------------------------------------------------------------
-        #-
-        #- Use the CSR value. !!! Use value.storage !!!
-        #-
-        #----------------------------------------------------------------
         cases = {
-            0x4: segments_value.eq(value.storage[0:4]),
-            0x2: segments_value.eq(value.storage[4:8]),
-            0x1: segments_value.eq(value.storage[8:12])
+            0x4: segments_value.eq(shown[0:4]),
+            0x2: segments_value.eq(shown[4:8]),
+            0x1: segments_value.eq(shown[8:12])
         }
+        self.comb += Case(next_digit, cases)
+
+        self.submodules.sevensegment = segments = SevenSegment()
+        self.comb += segments.value.eq(segments_value)
+
+        sync += [
+            shown_q.eq(shown),
+            If (update,
+                digit.eq(next_digit),
+                abcdefg.eq(segments.abcdefg)
+            )
+        ]
+
+    #----------------------------------------------------------------
+    #-
+    #- Framebuffer (instead of the value register): each digit shows
+    #- its byte of the framebuffer's front page, a hex digit or a raw
+    #- segment pattern. Pages flip when the digits rotate back to
+    #- digit[0], so a frame never mixes two pages.
+    #-
+    #----------------------------------------------------------------
+    def add_framebuffer(self):
+        digit   = self.digit
+        abcdefg = self.abcdefg
+
+        self.submodules.framebuffer = framebuffer = Framebuffer(len(digit))
+
+        rotate = self.add_refresh()
+        self.comb += framebuffer.frame_start.eq(rotate & digit[2])
+
+        byte  = Signal(8)
+        cases = {1 << i: byte.eq(shown) for i, shown in enumerate(framebuffer.shown)}
         self.comb += Case(digit, cases)
 
         self.submodules.sevensegment = segments = SevenSegment()
 
         self.comb += [
-            segments.value.eq(segments_value),
-            abcdefg.eq(segments.abcdefg),
-        ]
\ No newline at end of file
+            segments.value.eq(byte[0:4]),
+            If (byte[7],
+                abcdefg.eq(byte[0:7])
+            ).Else(
+                abcdefg.eq(segments.abcdefg)
+            )
+        ]
+
+    #----------------------------------------------------------------
+    #-
+    #- Clock domain crossing of the shown value (sys -> display
+    #- domain): BusSynchronizer hands the 12 bits over with a
+    #- request/acknowledge, so the display never sees a mix of an
+    #- old and a new value.
+    #-
+    #----------------------------------------------------------------
+    def add_cdc(self, shown, clock_domain):
+        self.submodules.value_sync = value_sync = BusSynchronizer(len(shown), "sys", clock_domain)
+        self.comb += value_sync.i.eq(shown)
+        return value_sync.o
+
+    #----------------------------------------------------------------
+    #-
+    #- Streaming: values written to "fifo" are queued and one of them
+    #- is shown every rate.storage + 1 clock cycles while "stream" is
+    #- set (the value register is shown while it is not). A playback
+    #- tick with an empty FIFO counts an underflow.
+    #-
+    #----------------------------------------------------------------
+    def add_stream(self, period_ns, fifo_depth):
+        self.fifo       = CSR(12)
+        self.rate       = CSRStorage(bits_for(int(1e9/period_ns)))  # Up to 1 s per frame.
+        self.stream     = CSRStorage(1)
+        self.level      = CSRStatus(bits_for(fifo_depth))
+        self.underflows = CSRStatus(32)
+
+        self.submodules.frames = frames = SyncFIFO(12, fifo_depth)
+
+        frame = Signal(12)
+        count = Signal(len(self.rate.storage))
+        self.tick = tick = Signal()
+
+        self.comb += [
+            frames.din.eq(self.fifo.r),
+            frames.we.eq(self.fifo.re),
+            tick.eq(self.stream.storage & (count == self.rate.storage)),
+            frames.re.eq(tick),
+            self.level.status.eq(frames.level),
+        ]
+
+        self.sync += [
+            If (~self.stream.storage | tick,
+                count.eq(0)
+            ).Else(
+                count.eq(count + 1)
+            ),
+            If (tick,
+                If (frames.readable,
+                    frame.eq(frames.dout)
+                ).Else(
+                    self.underflows.status.eq(self.underflows.status + 1)
+                )
+            )
+        ]
+
+        return frame
@@ -0,0 +1,147 @@
+#
+# Cached CSR map for host scripts.
+#
+# load() parses csr.csv or csr.json (as written by --csr-csv/--csr-json) once:
+# the parsed map is stored in build/csrmap/ next to it (ignored by git, like
+# the other build outputs), under the file's SHA-256, and reused as long as the
+# file is unchanged, so rebuilding the SoC with the same CSRs does not
+# invalidate it. In a process, maps are also
+# kept in memory (clear() drops them).
+#
+# Handles resolve a register name once; their read/write only do the address
+# and word split math precomputed for the register size (32-bit CSR bus).
+#
+#   csrs  = csrmap.load("csr.csv")
+#   value = csrs.handle(wb, "seven_seg_ctrl_value")
+#   for i in range(20):
+#       value.write(i)
+
+import os
+import csv
+import json
+import hashlib
+
+CACHE_VERSION = 1
+
+# Parsing ------------------------------------------------------------------------------------------
+
+def _parse_csv(text):
+    csrmap = {"bases": {}, "registers": {}, "constants": {}, "memories": {}}
+    for row in csv.reader(line for line in text.splitlines() if line and not line.startswith("#")):
+        kind, name, value = row[0], row[1], row[2]
+        if kind == "csr_base":
+            csrmap["bases"][name] = int(value, 0)
+        elif kind == "csr_register":
+            csrmap["registers"][name] = [int(value, 0), int(row[3]), row[4]]
+        elif kind == "constant":
+            try:
+                csrmap["constants"][name] = int(value, 0)
+            except ValueError:
+                csrmap["constants"][name] = None if value == "None" else value
+        elif kind == "memory_region":
+            csrmap["memories"][name] = [int(value, 0), int(row[3]), row[4]]
+    return csrmap
+
+def _parse_json(text):
+    j = json.loads(text)
+    return {
+        "bases":     dict(j.get("csr_bases", {})),
+        "registers": {k: [v["addr"], v["size"], v["type"]] for k, v in j.get("csr_registers", {}).items()},
+        "constants": dict(j.get("constants", {})),
+        "memories":  {k: [v["base"], v["size"], v["type"]] for k, v in j.get("memories", {}).items()},
+    }
+
+# Register handle ----------------------------------------------------------------------------------
+
+class Handle:
+    __slots__ = ("name", "addr", "size", "mode", "read", "write")
+
+    def __init__(self, bus, name, addr, size, mode):
+        self.name = name
+        self.addr = addr
+        self.size = size
+        self.mode = mode
+        # Bind the bus methods now: an access is then one call, no lookups.
+        bus_read  = bus.read
+        bus_write = bus.write
+        if size == 1:
+            self.read  = lambda: bus_read(addr)
+            self.write = lambda value: bus_write(addr, value)
+        else:
+            # Multi-word CSRs: most significant word first.
+            shifts = [32*(size - 1 - i) for i in range(size)]
+            def read():
+                value = 0
+                for data in bus_read(addr, size):
+                    value = (value << 32) | data
+                return value
+            def write(value):
+                bus_write(addr, [(value >> shift) & 0xffffffff for shift in shifts])
+            self.read  = read
+            self.write = write
+
+    def __repr__(self):
+        return f"Handle({self.name}, {self.addr:#010x}, size={self.size}, {self.mode})"
+
+# CSRMap -------------------------------------------------------------------------------------------
+
+class CSRMap:
+    def __init__(self, csrmap):
+        self.bases     = csrmap["bases"]
+        self.registers = csrmap["registers"]
+        self.constants = csrmap["constants"]
+        self.memories  = csrmap["memories"]
+
+    def addr(self, name):
+        try:
+            return self.registers[name][0]
+        except KeyError:
+            raise KeyError(f"No CSR register named {name}") from None
+
+    def handle(self, bus, name):
+        addr = self.addr(name)
+        _, size, mode = self.registers[name]
+        return Handle(bus, name, addr, size, mode)
+
+    def handles(self, bus, prefix=""):
+        return {name: self.handle(bus, name) for name in self.registers if name.startswith(prefix)}
+
+# Load ---------------------------------------------------------------------------------------------
+
+_loaded = {}
+
+def clear():
+    """Forget the maps loaded by this process: the next load() reads the file or its cache again."""
+    _loaded.clear()
+
+def load(filename=None):
+    """Return the CSRMap of `filename` (default: csr.json or else csr.csv in the current directory)."""
+    if filename is None:
+        filename = "csr.json" if os.path.exists("csr.json") else "csr.csv"
+    with open(filename, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    key = os.path.abspath(filename)
+    if key in _loaded and _loaded[key][0] == digest:
+        return _loaded[key][1]
+
+    cache = os.path.join(os.path.dirname(key), "build", "csrmap", f"{digest}.json")
+    csrmap = None
+    if os.path.exists(cache):
+        with open(cache) as f:
+            try:
+                cached = json.load(f)
+            except ValueError:
+                cached = {}
+        if cached.get("version") == CACHE_VERSION and cached.get("hash") == digest:
+            csrmap = cached["map"]
+    if csrmap is None:
+        text   = data.decode()
+        csrmap = _parse_json(text) if filename.endswith(".json") else _parse_csv(text)
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        with open(cache, "w") as f:
+            json.dump({"version": CACHE_VERSION, "hash": digest, "map": csrmap}, f)
+
+    _loaded[key] = (digest, CSRMap(csrmap))
+    return _loaded[key][1]
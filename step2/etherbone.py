@@ -0,0 +1,208 @@
+#
+# Minimal Etherbone codec and a local litex_server stand-in.
+#
+# Wire format follows LiteX (big endian, 32-bit address and data):
+#
+#   packet : magic(16) | version/flags(8) | addr/port size(8) | padding(32)
+#   record : flags(8)  | byte_enable(8)   | wcount(8) | rcount(8)
+#            [base_addr(32)     + wcount * data(32)]
+#            [base_ret_addr(32) + rcount * addr(32)]
+#
+# A read record is answered with one packet holding one write record whose
+# datas are the read values.
+#
+# litex_server frames by packet: it reads one packet header and one record,
+# handles it, then reads the next packet, so each packet carries exactly one
+# record (several packets can be sent back to back). The datas of a write
+# record go to incrementing addresses, the WFF flag is ignored. On connect, it
+# sends its server info (<comm>:<ip>:<port>) before anything else.
+
+import socket
+import struct
+import threading
+import time
+
+ETHERBONE_MAGIC   = 0x4e6f
+ETHERBONE_VERSION = 1
+
+PACKET_HEADER = struct.Struct(">HBBI")
+RECORD_HEADER = struct.Struct(">BBBB")
+HEADERS_SIZE  = PACKET_HEADER.size + RECORD_HEADER.size  # litex_server reads both at once.
+
+# Record flags (Etherbone spec, MSB first: bca, rca, rff, -, cyc, wca, wff, -).
+FLAG_CYC = 0x08
+FLAG_WFF = 0x02  # All writes of the record go to base_addr (FIFO/CSR write).
+
+MAX_COUNT = 255
+
+# Packet -------------------------------------------------------------------------------------------
+
+class Record:
+    def __init__(self, writes=None, base_addr=0, reads=None, base_ret_addr=0, wff=False):
+        self.writes        = list(writes or [])
+        self.base_addr     = base_addr
+        self.reads         = list(reads or [])
+        self.base_ret_addr = base_ret_addr
+        self.wff           = wff
+
+    def __len__(self):
+        n = RECORD_HEADER.size
+        if self.writes:
+            n += 4 + 4*len(self.writes)
+        if self.reads:
+            n += 4 + 4*len(self.reads)
+        return n
+
+    def encode(self):
+        assert len(self.writes) <= MAX_COUNT and len(self.reads) <= MAX_COUNT
+        flags = FLAG_CYC | (FLAG_WFF if self.wff else 0)
+        data  = RECORD_HEADER.pack(flags, 0x0f, len(self.writes), len(self.reads))
+        if self.writes:
+            data += struct.pack(f">{1 + len(self.writes)}I", self.base_addr, *self.writes)
+        if self.reads:
+            data += struct.pack(f">{1 + len(self.reads)}I", self.base_ret_addr, *self.reads)
+        return data
+
+def encode_packet(records):
+    header = PACKET_HEADER.pack(ETHERBONE_MAGIC, ETHERBONE_VERSION << 4, 0x44, 0)
+    return header + b"".join(r.encode() for r in records)
+
+def _recv_exactly(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Etherbone connection closed")
+        buf += chunk
+    return bytes(buf)
+
+def _decode_headers(data):
+    """Record (without datas) and payload size from a packet header and a record header."""
+    magic = PACKET_HEADER.unpack_from(data)[0]
+    if magic != ETHERBONE_MAGIC:
+        raise ValueError(f"Bad Etherbone magic {magic:#06x} (one record per packet)")
+    flags, _, wcount, rcount = RECORD_HEADER.unpack_from(data, PACKET_HEADER.size)
+    record = Record(writes=[0]*wcount, reads=[0]*rcount, wff=bool(flags & FLAG_WFF))
+    return record, 4*((1 + wcount) if wcount else 0) + 4*((1 + rcount) if rcount else 0)
+
+def _decode_payload(record, data):
+    words = struct.unpack(f">{len(data)//4}I", data)
+    if record.writes:
+        record.base_addr, record.writes = words[0], list(words[1:1 + len(record.writes)])
+        words = words[1 + len(record.writes):]
+    if record.reads:
+        record.base_ret_addr, record.reads = words[0], list(words[1:])
+    return record
+
+def recv_record(sock):
+    """Read the next packet from a stream and return its (single) record."""
+    record, size = _decode_headers(_recv_exactly(sock, HEADERS_SIZE))
+    return _decode_payload(record, _recv_exactly(sock, size))
+
+async def recv_record_async(reader):
+    """recv_record() for an asyncio.StreamReader."""
+    record, size = _decode_headers(await reader.readexactly(HEADERS_SIZE))
+    return _decode_payload(record, await reader.readexactly(size))
+
+def recv_server_info(sock):
+    """Consume the server info litex_server sends on connect (as litex's RemoteClient does)."""
+    return sock.recv(128).decode(errors="replace")
+
+# litex_server stand-in ----------------------------------------------------------------------------
+
+class EtherboneServer:
+    """Memory-backed Etherbone server speaking the litex_server TCP protocol.
+
+    `latency` is added once per record to mimic the cost of one bridge
+    (JTAG/UART) transaction behind a real litex_server: as the bridge, records
+    are handled one at a time. Like litex_server, `threads` connections are
+    served at once (others wait to be accepted) and a packet holding more than
+    one record closes the connection.
+    """
+    def __init__(self, host="localhost", port=0, latency=0.0, mem=None, threads=4):
+        self.latency = latency
+        self.threads = threads
+        self.mem     = mem if mem is not None else {}
+        self.records = 0
+        self.writes  = []
+        self.lock    = threading.Lock()
+        self.socket  = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((host, port))
+        self.socket.listen(8)
+        self.host, self.port = self.socket.getsockname()[:2]
+
+    def start(self):
+        for _ in range(self.threads):
+            threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def write(self, addr, data):
+        self.mem[addr] = data
+
+    def read(self, addr):
+        return self.mem.get(addr, 0)
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self.socket.accept()
+            except OSError:
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._serve_client(client)
+
+    def _serve_client(self, client):
+        with client:
+            try:
+                client.sendall(f"EtherboneServer:{self.host}:{self.port}".encode())
+            except OSError:
+                return
+            while True:
+                try:
+                    record = recv_record(client)
+                except (ConnectionError, OSError, ValueError):
+                    return
+                with self.lock:
+                    if self.latency:
+                        time.sleep(self.latency)
+                    self.records += 1
+                    for i, data in enumerate(record.writes):
+                        self.write(record.base_addr + 4*i, data)
+                        self.writes.append((record.base_addr + 4*i, data))
+                    datas = [self.read(addr) for addr in record.reads]
+                if record.reads:
+                    reply = Record(writes=datas, base_addr=record.base_ret_addr)
+                    try:
+                        client.sendall(encode_packet([reply]))
+                    except OSError:
+                        return
+
+# Standalone ---------------------------------------------------------------------------------------
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Local litex_server stand-in (memory backed).")
+    parser.add_argument("--port",    default=1234, type=int,   help="TCP port.")
+    parser.add_argument("--latency", default=0.0,  type=float, help="Added latency per record (s).")
+    args = parser.parse_args()
+
+    server = EtherboneServer(port=args.port, latency=args.latency).start()
+    print(f"Etherbone stand-in listening on {server.host}:{server.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#
+# Double buffered framebuffer of the seven segment display (Wishbone slave).
+#
+# One byte per digit, byte i for digit[i] (digit[0] is the leftmost digit):
+#  - 0x80 | abcdefg: raw segment pattern, as driven on the pins,
+#  - otherwise:      hex digit of the low nibble (decoded by SevenSegment).
+# There are two pages of ndigits bytes. The Wishbone region maps the back page
+# (the one not displayed) from offset 0, 4 little endian bytes per word, so a
+# whole frame is written with one (burst) write. Writing flip requests a page
+# flip, applied at the start of the next display frame (when the digits rotate
+# back to digit[0]): every frame shows a single page, there is no tearing.
+# pending is set from the request to the flip, new frames should only be
+# written once it is cleared; front is the displayed page.
+#
+#   wb.write(csrs.memories["seven_seg_fb"][0], pack([0x1, 0x2, raw(0b0111111)]))
+#   wb.write(csrs.addr("seven_seg_ctrl_framebuffer_flip"), 1)
+
+from migen import *
+
+from litex.soc.interconnect import wishbone
+from litex.soc.interconnect.csr import AutoCSR, CSR, CSRStatus
+
+# Host helpers -------------------------------------------------------------------------------------
+
+def raw(abcdefg):
+    """Framebuffer byte of a raw segment pattern."""
+    return 0x80 | abcdefg
+
+def pack(digits):
+    """32-bit words of a frame of digit bytes (digit[0] first)."""
+    digits = list(digits) + [0]*(-len(digits) % 4)
+    return [sum(b << 8*i for i, b in enumerate(digits[w:w + 4])) for w in range(0, len(digits), 4)]
+
+# Framebuffer --------------------------------------------------------------------------------------
+
+class Framebuffer(Module, AutoCSR):
+    def __init__(self, ndigits=3):
+        self.bus         = bus = wishbone.Interface(data_width=32)
+        self.size        = 4*2**log2_int((ndigits + 3)//4, need_pow2=False)  # Bytes of the Wishbone region.
+        self.frame_start = Signal()              # From the display: the digits rotate back to digit[0].
+        self.shown       = [Signal(8, name=f"shown{i}") for i in range(ndigits)]  # Front page bytes.
+
+        self.flip    = CSR()
+        self.pending = CSRStatus()
+        self.front   = CSRStatus()
+
+        # # #
+
+        pages   = [[Signal(8, name=f"page{p}_{i}") for i in range(ndigits)] for p in range(2)]
+        front   = self.front.status
+        pending = self.pending.status
+        words   = self.size//4
+
+        # Flip.
+        self.sync += [
+            If(self.flip.re,
+                pending.eq(1)
+            ),
+            If(self.frame_start & pending,
+                front.eq(~front),
+                pending.eq(0)
+            )
+        ]
+        self.comb += [shown.eq(Mux(front, pages[1][i], pages[0][i])) for i, shown in enumerate(self.shown)]
+
+        # Wishbone, back page: single cycle accesses (two per burst beat).
+        adr  = bus.adr[:log2_int(words)] if words > 1 else Constant(0)
+        back = [Mux(front, pages[0][i], pages[1][i]) for i in range(ndigits)] + [Constant(0, 8)]*(4*words - ndigits)
+        self.comb += Case(adr, {w: bus.dat_r.eq(Cat(*back[4*w:4*w + 4])) for w in range(words)})
+        writes = []
+        for i in range(ndigits):
+            w, b = divmod(i, 4)
+            for p in range(2):
+                writes.append(If(bus.we & (adr == w) & bus.sel[b] & (front != p),
+                    pages[p][i].eq(bus.dat_w[8*b:8*b + 8])
+                ))
+        self.sync += [
+            bus.ack.eq(0),
+            If(bus.cyc & bus.stb & ~bus.ack,
+                bus.ack.eq(1),
+                *writes
+            )
+        ]
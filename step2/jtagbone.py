@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+#
+# Burst JTAGbone client with pluggable JTAG transports.
+#
+# add_jtagbone() is a UARTBone behind LiteX's JTAGPHY: each DR scan frame is
+# 10 bits, LSB first (see litex.soc.cores.jtag.JTAGPHY):
+#
+#   host -> target : ready(1) | data(8) | valid(1)
+#   target -> host : ready(1) | data(8) | valid(1)    (ready: previous frame's byte was accepted)
+#
+# The JTAGPHY FSM is reset on Capture-DR: ready reads 0 in the first frame of
+# every scan. The acceptance of a scan's last frame is never reported, so every
+# scan ends with a frame without data: each byte's ready bit is in its own scan.
+#
+# Through litex_server --jtag, every Wishbone access is its own UARTBone command,
+# sent by OpenOCD's jtagstream in scans of at least 128 frames carrying at most
+# 16 command bytes. In burst mode, JTAGBone instead concatenates UARTBone burst
+# commands (up to 255 words each) and sizes each DR scan to the bytes to send
+# and receive, so one scan carries many accesses. The gateware is unchanged.
+#
+# Transports implement scan(frames) -> frames:
+#  - OpenOCDTransport: drscan through OpenOCD's TCL server,
+#  - SimTAP:           JTAGPHY + UARTBone + memory model, with a time model
+#                      (per-scan overhead + TCK rate) for throughput estimates.
+#
+#   openocd -f openocd_cyclone4_blaster.cfg -c "tcl_port 6666; init; irscan 10m50.tap 0xc"
+#   ./jtagbone.py mem_read 0x40000000 4096
+
+import socket
+import struct
+import argparse
+import collections
+
+CMD_WRITE_BURST_INCR  = 0x01
+CMD_READ_BURST_INCR   = 0x02
+CMD_WRITE_BURST_FIXED = 0x03
+CMD_READ_BURST_FIXED  = 0x04
+
+MAX_BURST = 255
+
+# Frames -------------------------------------------------------------------------------------------
+
+def frame(data=None, ready=1):
+    if data is None:
+        return ready
+    return ready | (data << 1) | (1 << 9)
+
+def frame_data(f):
+    """Byte carried by a target frame, or None."""
+    return (f >> 1) & 0xff if f & (1 << 9) else None
+
+# Transports ---------------------------------------------------------------------------------------
+
+class OpenOCDTransport:
+    """DR scans through OpenOCD's TCL server (IR already set to the JTAGbone chain)."""
+    def __init__(self, host="localhost", port=6666, tap="10m50.tap", endstate="-endstate DRPAUSE"):
+        self.tap      = tap
+        self.endstate = endstate
+        self.socket   = socket.create_connection((host, port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.buffer   = b""
+
+    def command(self, cmd):
+        self.socket.sendall(cmd.encode() + b"\x1a")
+        while b"\x1a" not in self.buffer:
+            chunk = self.socket.recv(65536)
+            if not chunk:
+                raise ConnectionError("OpenOCD connection closed")
+            self.buffer += chunk
+        reply, _, self.buffer = self.buffer.partition(b"\x1a")
+        return reply.decode()
+
+    def scan(self, frames):
+        fields = " ".join(f"10 0x{f:03x}" for f in frames)
+        reply  = self.command(f"drscan {self.tap} {fields} {self.endstate}")
+        return [int(x, 16) for x in reply.split()]
+
+    def close(self):
+        self.socket.close()
+
+class SimTAP:
+    """JTAGPHY + UARTBone model over a word addressed memory (dict).
+
+    The SoC is much faster than TCK: commands complete as soon as their last byte
+    is received and replies are sent from the next frame on. As on the JTAGPHY,
+    ready is 0 in the first frame of a scan (FSM reset on capture). The received
+    bytes whose index is in `drop` are refused (overflow). `time` accumulates
+    scan_overhead per scan plus 10 bits per frame at `tck` Hz.
+    """
+    def __init__(self, mem=None, tck=6e6, scan_overhead=1e-3, drop=()):
+        self.mem           = mem if mem is not None else {}
+        self.tck           = tck
+        self.scan_overhead = scan_overhead
+        self.drop          = set(drop)
+        self.received      = 0  # Data frames received (accepted or not).
+        self.time          = 0.0
+        self.scans         = 0
+        self.frames        = 0
+        self._rx           = bytearray()
+        self._tx           = collections.deque()
+
+    def scan(self, frames):
+        out   = []
+        ready = 0  # Reset on capture.
+        for f in frames:
+            o = ready
+            if self._tx and (f & 1):
+                o = frame(self._tx.popleft(), ready)
+            ready = 1
+            if f & (1 << 9):
+                if self.received in self.drop:
+                    ready = 0
+                else:
+                    self._rx.append((f >> 1) & 0xff)
+                    self._execute()
+                self.received += 1
+            out.append(o)
+        self.scans  += 1
+        self.frames += len(frames)
+        self.time   += self.scan_overhead + 10*len(frames)/self.tck
+        return out
+
+    def _execute(self):
+        rx = self._rx
+        if len(rx) < 6:
+            return
+        cmd, length = rx[0], rx[1]
+        addr = int.from_bytes(rx[2:6], "big")
+        step = 1 if cmd in [CMD_WRITE_BURST_INCR, CMD_READ_BURST_INCR] else 0
+        if cmd in [CMD_WRITE_BURST_INCR, CMD_WRITE_BURST_FIXED]:
+            if len(rx) < 6 + 4*length:
+                return
+            for i, data in enumerate(struct.unpack(f">{length}I", rx[6:6 + 4*length])):
+                self.mem[addr + step*i] = data
+            del rx[:6 + 4*length]
+        elif cmd in [CMD_READ_BURST_INCR, CMD_READ_BURST_FIXED]:
+            for i in range(length):
+                self._tx.extend(self.mem.get(addr + step*i, 0).to_bytes(4, "big"))
+            del rx[:6]
+        else:
+            raise ValueError(f"Unknown UARTBone command {cmd:#x}")
+
+# JTAGBone -----------------------------------------------------------------------------------------
+
+class JTAGBone:
+    """Wishbone access over a JTAG transport.
+
+    burst=True packs burst commands into scans of up to max_frames frames.
+    burst=False reproduces the litex_server --jtag path: one command per word,
+    at most tx_chunk command bytes per scan, scans of at least poll_frames frames.
+    """
+    def __init__(self, transport, burst=True, max_frames=4096, tx_chunk=16, poll_frames=128):
+        self.transport   = transport
+        self.burst       = burst
+        self.max_frames  = max_frames
+        self.tx_chunk    = tx_chunk
+        self.poll_frames = poll_frames
+
+    def _xfer(self, tx, rx_count):
+        """Send the `tx` bytes and return the next `rx_count` received bytes."""
+        tx = memoryview(bytes(tx))
+        rx = bytearray()
+        while len(tx) or len(rx) < rx_count:
+            # The last frame carries no data: it returns the ready bit of the last byte.
+            if self.burst:
+                n_tx = min(len(tx), self.max_frames - 1)
+                n    = min(max(n_tx + 1, rx_count - len(rx)), self.max_frames)
+            else:
+                n_tx = min(len(tx), self.tx_chunk)
+                n    = max(n_tx + 1, self.poll_frames)
+            frames = [frame(b) for b in tx[:n_tx]] + [frame()]*(n - n_tx)
+            tx     = tx[n_tx:]
+            reply  = self.transport.scan(frames)
+            # A frame's ready bit tells whether the previous frame's byte (same scan) was accepted.
+            sent = [bool(f & (1 << 9)) for f in frames[:-1]]
+            if any(s and not (r & 1) for s, r in zip(sent, reply[1:])):
+                raise IOError("JTAGbone overflow: a command byte was dropped by the target.")
+            rx += bytes(d for d in map(frame_data, reply) if d is not None)
+        if len(rx) > rx_count:
+            raise IOError(f"JTAGbone: {len(rx) - rx_count} unexpected bytes received.")
+        return bytes(rx)
+
+    @staticmethod
+    def _command(cmd, addr, length, datas=[]):
+        return struct.pack(f">BBI{len(datas)}I", cmd, length, addr//4, *datas)
+
+    def read(self, addr, length=1):
+        """Read `length` words at `addr` (bytes), returns a list."""
+        if self.burst:
+            tx = b"".join(self._command(CMD_READ_BURST_INCR, addr + 4*i, min(MAX_BURST, length - i))
+                for i in range(0, length, MAX_BURST))
+            rx = self._xfer(tx, 4*length)
+        else:
+            rx = b"".join(self._xfer(self._command(CMD_READ_BURST_INCR, addr + 4*i, 1), 4)
+                for i in range(length))
+        return list(struct.unpack(f">{length}I", rx))
+
+    def write(self, addr, datas):
+        """Write the `datas` words at `addr` (bytes)."""
+        datas = datas if isinstance(datas, list) else [datas]
+        if self.burst:
+            tx = b"".join(self._command(CMD_WRITE_BURST_INCR, addr + 4*i, len(datas[i:i + MAX_BURST]), datas[i:i + MAX_BURST])
+                for i in range(0, len(datas), MAX_BURST))
+            self._xfer(tx, 0)
+        else:
+            for i, data in enumerate(datas):
+                self._xfer(self._command(CMD_WRITE_BURST_INCR, addr + 4*i, 1, [data]), 0)
+
+    def mem_read(self, addr, size):
+        words = self.read(addr, (size + 3)//4)
+        return struct.pack(f">{len(words)}I", *words)[:size]
+
+    def mem_write(self, addr, data):
+        data = bytes(data) + bytes(-len(data) % 4)
+        self.write(addr, list(struct.unpack(f">{len(data)//4}I", data)))
+
+# Command line -------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst JTAGbone access through OpenOCD's TCL server.")
+    parser.add_argument("--host",    default="localhost")
+    parser.add_argument("--port",    default=6666, type=int, help="OpenOCD TCL port.")
+    parser.add_argument("--tap",     default="10m50.tap",    help="TAP name (see openocd_cyclone4_blaster.cfg).")
+    parser.add_argument("--no-burst", action="store_true",   help="One command per word (litex_server --jtag behaviour).")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    read = sub.add_parser("mem_read")
+    read.add_argument("addr", type=lambda x: int(x, 0))
+    read.add_argument("size", type=lambda x: int(x, 0))
+    write = sub.add_parser("mem_write")
+    write.add_argument("addr",  type=lambda x: int(x, 0))
+    write.add_argument("value", type=lambda x: int(x, 0))
+    write.add_argument("count", type=lambda x: int(x, 0), nargs="?", default=1)
+    args = parser.parse_args()
+
+    transport = OpenOCDTransport(args.host, args.port, tap=args.tap)
+    bone      = JTAGBone(transport, burst=not args.no_burst)
+    if args.cmd == "mem_read":
+        data = bone.mem_read(args.addr, args.size)
+        for i in range(0, len(data), 16):
+            print(f"{args.addr + i:08x}  " + " ".join(f"{b:02x}" for b in data[i:i + 16]))
+    else:
+        bone.write(args.addr, [args.value]*args.count)
+    transport.close()
+
+if __name__ == "__main__":
+    main()
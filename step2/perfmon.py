@@ -0,0 +1,101 @@
+#
+# Bus performance counters.
+#
+# PerfMonitor passively watches the Wishbone bus masters and the CSR bridge of
+# a SoC and counts, in 32-bit counters:
+#  - wishbone_reads/writes: completed (acked) accesses of all masters,
+#  - stall_cycles:          cycles where a master waits for an ack,
+#  - csr_reads/writes:      accesses through the CSR bridge,
+#  - <name>_reads/writes:   accesses to the CSR bank of each listed peripheral.
+# Writing control.snapshot copies all the counters to their CSRs at once (so
+# they are read coherently), control.reset clears them.
+#
+#   self.perfmon = PerfMonitor(["seven_seg_ctrl"], soc=self)
+
+from functools import reduce
+from operator import or_
+
+from migen import *
+
+from litex.soc.interconnect.csr import AutoCSR, CSRField, CSRStatus, CSRStorage
+
+# PerfMonitor --------------------------------------------------------------------------------------
+
+class PerfMonitor(Module, AutoCSR):
+    def __init__(self, peripherals=[], soc=None, width=32):
+        self.soc             = soc
+        self.autocsr_exclude = {"soc"}
+        self.peripherals     = peripherals
+        self.control         = CSRStorage(fields=[
+            CSRField("snapshot", pulse=True, description="Copy the counters to their CSRs."),
+            CSRField("reset",    pulse=True, description="Clear the counters."),
+        ])
+
+        # Events, driven by connect() (Wishbone ones: number of masters acked this cycle).
+        self.wishbone_read  = Signal(8)
+        self.wishbone_write = Signal(8)
+        self.stall          = Signal()
+        self.csr_read       = Signal()
+        self.csr_write      = Signal()
+        self.bank_read      = {name: Signal() for name in peripherals}
+        self.bank_write     = {name: Signal() for name in peripherals}
+
+        # # #
+
+        events = [
+            ("wishbone_reads",  self.wishbone_read),
+            ("wishbone_writes", self.wishbone_write),
+            ("stall_cycles",    self.stall),
+            ("csr_reads",       self.csr_read),
+            ("csr_writes",      self.csr_write),
+        ]
+        for name in peripherals:
+            events += [(f"{name}_reads", self.bank_read[name]), (f"{name}_writes", self.bank_write[name])]
+
+        self.counters = {}
+        for name, event in events:
+            counter = Signal(width, name=name)
+            status  = CSRStatus(width, name=name)
+            setattr(self, name, status)
+            self.counters[name] = counter
+            self.sync += [
+                If(self.control.fields.reset,
+                    counter.eq(0)
+                ).Else(
+                    counter.eq(counter + event)
+                ),
+                If(self.control.fields.snapshot,
+                    status.status.eq(counter)
+                )
+            ]
+
+    def connect(self, masters, csr_bus, locs, csr_address_width=14, paging=0x800):
+        """Watch `masters` (Wishbone interfaces) and the Wishbone side of the CSR bridge.
+
+        `locs` gives the CSR bank location of each peripheral."""
+        masters = list(masters)
+        def access(bus):
+            return bus.cyc & bus.stb & bus.ack
+        self.comb += [
+            self.wishbone_read.eq( sum((access(m) & ~m.we) for m in masters)),
+            self.wishbone_write.eq(sum((access(m) &  m.we) for m in masters)),
+            self.stall.eq(reduce(or_, [m.cyc & m.stb & ~m.ack for m in masters], 0)),
+            self.csr_read.eq( access(csr_bus) & ~csr_bus.we),
+            self.csr_write.eq(access(csr_bus) &  csr_bus.we),
+        ]
+        shift = 0 if getattr(csr_bus, "addressing", "word") == "word" else log2_int(len(csr_bus.dat_w)//8)
+        bank  = csr_bus.adr[shift + log2_int(paging//4):shift + csr_address_width]
+        for name in self.peripherals:
+            self.comb += [
+                self.bank_read[name].eq( self.csr_read  & (bank == locs[name])),
+                self.bank_write[name].eq(self.csr_write & (bank == locs[name])),
+            ]
+
+    def do_finalize(self):
+        # The CSR bridge and all bus masters only exist once the SoC is finalizing.
+        if self.soc is not None:
+            soc = self.soc
+            self.connect(soc.bus.masters.values(), soc.csr_bridge.wishbone,
+                locs              = {name: soc.csr.locs[name] for name in self.peripherals},
+                csr_address_width = soc.csr.address_width,
+                paging            = soc.csr.paging)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+#
+# Polls the PerfMonitor counters (--with-perfmon) through litex_server.
+#
+# At a fixed rate, takes a snapshot, reads all the perfmon_* counters and
+# prints the events per second since the previous sample (and optionally
+# appends them to a CSV file). Sampling is scheduled on absolute times, so a
+# slow read does not make the rate drift.
+#
+# ./sample_perfmon.py --rate 10 --duration 5 --csv perfmon.csv
+
+import csv
+import time
+import argparse
+
+from litex import RemoteClient
+
+import csrmap
+
+def main():
+    parser = argparse.ArgumentParser(description="PerfMonitor sampler.")
+    parser.add_argument("--csr-csv",  default="csr.csv",  help="CSR map (csr.csv or csr.json).")
+    parser.add_argument("--rate",     default=10.0, type=float, help="Samples per second.")
+    parser.add_argument("--duration", default=None, type=float, help="Stop after this many seconds.")
+    parser.add_argument("--csv",      default=None,             help="Append samples to this CSV file.")
+    args = parser.parse_args()
+
+    csrs     = csrmap.load(args.csr_csv)
+    wb       = RemoteClient(csr_csv=args.csr_csv)
+    wb.open()
+    control  = csrs.handle(wb, "perfmon_control")
+    counters = {name[len("perfmon_"):]: handle for name, handle in csrs.handles(wb, "perfmon_").items()
+        if name != "perfmon_control"}
+
+    def sample():
+        control.write(0b01)  # Snapshot.
+        return time.monotonic(), {name: handle.read() for name, handle in counters.items()}
+
+    writer = None
+    if args.csv is not None:
+        f = open(args.csv, "a", newline="")
+        writer = csv.writer(f)
+        writer.writerow(["time"] + list(counters))
+
+    period = 1/args.rate
+    last  = sample()
+    start = last[0]
+    n = 0
+    try:
+        while args.duration is None or (n + 1)*period <= args.duration:
+            n += 1
+            time.sleep(max(start + n*period - time.monotonic(), 0))
+            t, values = sample()
+            dt    = t - last[0]
+            rates = {name: ((values[name] - last[1][name]) & 0xffffffff)/dt for name in counters}
+            print(f"{t - start:8.3f}s " + " ".join(f"{name}={rate:.0f}/s" for name, rate in rates.items()))
+            if writer is not None:
+                writer.writerow([f"{t - start:.6f}"] + [values[name] for name in counters])
+            last = (t, values)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            f.close()
+        wb.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+#
+# Clock domain crossing of SevenSegmentsController's value (simulation).
+#
+# The controller runs in a "disp" domain unrelated to sys (faster and slower
+# periods). Random values are written to the value CSR in sys, sometimes on
+# consecutive cycles, faster than the crossing can carry them. In the display
+# domain, the synchronized value must:
+#  - only take values that were written, in the order they were written (no
+#    mix of the bits of an old and a new value, values may be skipped),
+#  - end on the last written value,
+# and the digits must show its nibbles. Reports the worst write to display
+# domain latency.
+#
+# ./sim_cdc.py [--disp-period 7 37 100] [--writes 200] [--low-power]
+
+import os
+import sys
+import random
+import argparse
+
+from migen import *
+from migen.sim import passive
+
+from controller import SevenSegmentsController
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from sim import simulate
+from display import SEGMENTS
+
+SYS_PERIOD = 10
+DECODE     = {abcdefg: nibble for nibble, abcdefg in enumerate(SEGMENTS)}
+
+# Bench --------------------------------------------------------------------------------------------
+
+# Both sides timestamp with the same sys cycle counter (`now`, added to the DUT).
+
+def writer(dut, writes, seed, log):
+    rng = random.Random(seed)
+    for _ in range(writes):
+        value = rng.randrange(2**12)
+        yield dut.value.storage.eq(value)
+        log.append(((yield dut.now), value))
+        # Mostly back-to-back or short gaps, sometimes long enough for the value to get through.
+        for _ in range(rng.choice([1, 1, 2, 3, 10, 50, 200])):
+            yield
+    # Let the last value settle.
+    for _ in range(1000):
+        yield
+
+@passive
+def reader(dut, log, errors):
+    while True:
+        t     = yield dut.now
+        value = yield dut.value_sync.o
+        # Displayed digit shows its nibble of the synchronized value (a cycle later in low power mode).
+        digit, abcdefg = (yield dut.digit), (yield dut.abcdefg)
+        shift = {0b100: 0, 0b010: 4, 0b001: 8}[digit]
+        if log and log[-1][1] == value and DECODE.get(abcdefg) != (value >> shift) & 0xf:
+            errors.append(f"t={t}: digit {digit:03b} shows {abcdefg:07b} for value {value:03x}")
+        if not log or log[-1][1] != value:
+            log.append((t, value))
+        yield
+
+def check_crossing(written, seen, errors):
+    """Seen values (after the reset value) are a subsequence of the written ones, returns the worst latency (ns)."""
+    values  = [v for _, v in written]
+    i       = 0
+    latency = 0
+    for t, value in seen[1:]:
+        while i < len(values) and values[i] != value:
+            i += 1
+        if i == len(values):
+            errors.append(f"t={t}: value {value:03x} was not written (or out of order)")
+            break
+        latency = max(latency, (t - written[i][0])*SYS_PERIOD)
+    if seen[-1][1] != values[-1]:
+        errors.append(f"last value {seen[-1][1]:03x} != last written {values[-1]:03x}")
+    return latency
+
+def run(period, args):
+    # 5 us refresh: the digits rotate during the run.
+    dut = SevenSegmentsController(period, low_power=args.low_power, refresh_time=5e-3, clock_domain="disp")
+    dut.now = Signal(32)
+    dut.sync += dut.now.eq(dut.now + 1)
+    written, seen, errors = [], [], []
+    simulate(dut,
+        {"sys": writer(dut, args.writes, args.seed, written), "disp": reader(dut, seen, errors)},
+        clocks   = {"sys": SYS_PERIOD, "disp": period},
+        vcd_name = None)
+
+    latency = check_crossing(written, seen, errors)
+    print(f"disp {period:5g} ns: {len(written)} writes, {len(seen) - 1} values crossed, "
+          f"worst latency {latency} ns, {'ok' if not errors else 'FAIL'}")
+    for error in errors[:10]:
+        print("  " + error)
+    return not errors
+
+def main():
+    parser = argparse.ArgumentParser(description="SevenSegmentsController value CDC (simulation).")
+    parser.add_argument("--disp-period", default=[7, 37, 100], type=float, nargs="+", help="Display clock periods (ns).")
+    parser.add_argument("--writes",      default=200, type=int,                       help="Value writes.")
+    parser.add_argument("--seed",        default=0,   type=int,                       help="Random seed.")
+    parser.add_argument("--low-power",   action="store_true",                         help="Low activity controller.")
+    args = parser.parse_args()
+
+    ok = all([run(period, args) for period in args.disp_period])
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
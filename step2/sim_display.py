@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+#
+# Virtual 3-digit display and CSR latency for the simulated SoC (sim_soc.py).
+#
+# Draws the segments the controller drives (display_segments CSR) in the
+# terminal, and with --bench measures the host-visible latency of
+# seven_seg_ctrl_value writes (write + read back) through litex_server.
+#
+# ./sim_display.py               # Display, Ctrl-C to stop.
+# ./sim_display.py --bench 200   # Latency percentiles, then exit.
+
+import sys
+import time
+import argparse
+import statistics
+
+from litex import RemoteClient
+
+import csrmap
+
+# Display ------------------------------------------------------------------------------------------
+
+def draw(segments):
+    """Three text lines for the 21-bit display_segments value (segments are active low)."""
+    lines = ["", "", ""]
+    for i in range(3):
+        abcdefg = ~(segments >> 7*i) & 0x7f
+        a, b, c, d, e, f, g = [(abcdefg >> n) & 1 for n in range(7)]  # Segment A is bit 0.
+        lines[0] += " " + ("_" if a else " ") + "  "
+        lines[1] += ("|" if f else " ") + ("_" if g else " ") + ("|" if b else " ") + " "
+        lines[2] += ("|" if e else " ") + ("_" if d else " ") + ("|" if c else " ") + " "
+    return lines
+
+# Bench --------------------------------------------------------------------------------------------
+
+def bench(value, n):
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        value.write(i & 0xfff)
+        assert value.read() == i & 0xfff
+        latencies.append(time.perf_counter() - start)
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"seven_seg_ctrl_value write + read back, {n} accesses: "
+          f"p50 {percentiles[49]*1e3:.3f} ms  p90 {percentiles[89]*1e3:.3f} ms  p99 {percentiles[98]*1e3:.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtual display of the simulated SoC.")
+    parser.add_argument("--csr-csv", default="csr.csv",            help="CSR map (csr.csv or csr.json).")
+    parser.add_argument("--rate",    default=10.0,  type=float,    help="Display refreshes per second.")
+    parser.add_argument("--bench",   default=None,  type=int,      help="Measure CSR latency over N accesses and exit.")
+    args = parser.parse_args()
+
+    csrs = csrmap.load(args.csr_csv)
+    wb   = RemoteClient(csr_csv=args.csr_csv)
+    wb.open()
+
+    try:
+        if args.bench:
+            bench(csrs.handle(wb, "seven_seg_ctrl_value"), args.bench)
+            return
+        segments = csrs.handle(wb, "display_segments")
+        first    = True
+        while True:
+            if not first:
+                sys.stdout.write("\x1b[3F")  # Back to the first line of the display.
+            sys.stdout.write("\n".join(draw(segments.read())) + "\n")
+            sys.stdout.flush()
+            first = False
+            time.sleep(1/args.rate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        wb.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+#
+# Framebuffer burst writes and page flip timing (simulation).
+#
+# Burst: Wishbone incrementing bursts to an 8 digit Framebuffer (2 words per
+# frame) must read back from the back page and show on the front page after a
+# flip.
+#
+# Flip: random frames (hex digits and raw segment patterns) are written to
+# SevenSegmentsController(with_framebuffer=True) with a burst while the display
+# keeps rotating, then flipped at a random time, waiting for pending to clear.
+# The displayed page may only change when the digits rotate back to digit[0],
+# every displayed frame must be one of the written frames (no digits of two
+# frames) and they must all be shown, in order. Reports the worst flip latency.
+#
+# ./sim_framebuffer.py [--frames 20] [--seed 0]
+
+import os
+import sys
+import random
+import argparse
+
+from migen import *
+from migen.sim import passive
+
+from controller import SevenSegmentsController
+from framebuffer import Framebuffer, raw, pack
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from sim import simulate
+from display import SEGMENTS
+
+# Wishbone -----------------------------------------------------------------------------------------
+
+def wb_burst_write(bus, adr, words):
+    yield bus.cyc.eq(1)
+    yield bus.stb.eq(1)
+    yield bus.we.eq(1)
+    yield bus.sel.eq(0xf)
+    for i, word in enumerate(words):
+        yield bus.adr.eq(adr + i)
+        yield bus.dat_w.eq(word)
+        yield bus.cti.eq(0b111 if i == len(words) - 1 else 0b010)  # End of burst / incrementing.
+        yield
+        while not (yield bus.ack):
+            yield
+    yield bus.cyc.eq(0)
+    yield bus.stb.eq(0)
+    yield bus.we.eq(0)
+    yield bus.cti.eq(0)
+    yield
+
+def wb_read(bus, adr):
+    yield bus.cyc.eq(1)
+    yield bus.stb.eq(1)
+    yield bus.adr.eq(adr)
+    yield
+    while not (yield bus.ack):
+        yield
+    data = yield bus.dat_r
+    yield bus.cyc.eq(0)
+    yield bus.stb.eq(0)
+    yield
+    return data
+
+def flip(framebuffer):
+    # Pulse driven directly: without a CSR bank, CSR's own logic is not simulated.
+    yield framebuffer.flip.re.eq(1)
+    yield
+    yield framebuffer.flip.re.eq(0)
+    yield
+
+# Burst --------------------------------------------------------------------------------------------
+
+def burst_bench(dut, errors, frames=4, seed=0):
+    rng = random.Random(seed)
+    for _ in range(frames):
+        digits = [rng.randrange(256) for _ in dut.shown]
+        words  = pack(digits)
+        yield from wb_burst_write(dut.bus, 0, words)
+        readback = []
+        for w in range(len(words)):
+            readback.append((yield from wb_read(dut.bus, w)))
+        if readback != words:
+            errors.append(f"read back {readback}, wrote {words}")
+        yield from flip(dut)
+        yield dut.frame_start.eq(1)
+        yield
+        yield dut.frame_start.eq(0)
+        yield
+        shown = []
+        for s in dut.shown:
+            shown.append((yield s))
+        if shown != digits:
+            errors.append(f"front page {shown}, wrote {digits}")
+
+# Flip ---------------------------------------------------------------------------------------------
+
+def segments(byte):
+    return byte & 0x7f if byte & 0x80 else SEGMENTS[byte & 0xf]
+
+def make_frames(n, seed):
+    rng    = random.Random(seed)
+    frames = [[0, 0, 0]]  # Reset content of both pages.
+    for _ in range(n):
+        frames.append([raw(rng.randrange(128)) if rng.random() < 0.3 else rng.randrange(16) for _ in range(3)])
+    return frames
+
+def writer(dut, frames, flips):
+    framebuffer = dut.framebuffer
+    rng         = random.Random(len(frames))
+    for frame in frames[1:]:
+        # Written anywhere in a frame, flipped a bit later.
+        for _ in range(rng.randrange(3*(dut.refresh_count + 1))):
+            yield
+        yield from wb_burst_write(framebuffer.bus, 0, pack(frame))
+        for _ in range(rng.randrange(50)):
+            yield
+        request = yield dut.now
+        yield from flip(framebuffer)
+        while (yield framebuffer.pending.status):
+            yield
+        flips.append((request, (yield dut.now)))
+    # Let the last frame be displayed entirely.
+    for _ in range(6*(dut.refresh_count + 1)):
+        yield
+
+@passive
+def monitor(dut, log):
+    while True:
+        log.append(((yield dut.now), (yield dut.digit), (yield dut.abcdefg), (yield dut.framebuffer.front.status)))
+        yield
+
+def check_frames(log, frames, flips, frame_cycles, errors):
+    """Returns (frames displayed, worst flip latency in cycles)."""
+    expected = [tuple(segments(b) for b in frame) for frame in frames]
+    starts   = [i for i in range(1, len(log)) if log[i][1] == 0b001 and log[i - 1][1] == 0b100]
+    for i in range(1, len(log)):
+        if log[i][3] != log[i - 1][3] and i not in starts:
+            errors.append(f"t={log[i][0]}: page flipped on digit {log[i][1]:03b}")
+    shown = []
+    for a, b in zip(starts, starts[1:]):
+        patterns = {}
+        for _, digit, abcdefg, _ in log[a:b]:
+            patterns.setdefault(digit.bit_length() - 1, set()).add(abcdefg)
+        frame = tuple(min(patterns[i]) if len(patterns.get(i, ())) == 1 else None for i in range(3))
+        if frame not in expected:
+            errors.append(f"t={log[a][0]}: displayed frame {patterns} was not written (torn)")
+        elif not shown or shown[-1] != frame:
+            shown.append(frame)
+    # The reset content is only shown until the first flip: maybe not a whole frame. Consecutive
+    # written frames may be identical: compare without repeats.
+    if shown[:1] == expected[:1]:
+        shown = shown[1:]
+    written = [f for i, f in enumerate(expected) if i > 0 and f != expected[i - 1]]
+    if shown != written:
+        errors.append(f"displayed {len(shown)} frames, expected the {len(written)} written ones in order")
+    latency = max([done - request for request, done in flips] or [0])
+    if latency > frame_cycles + 2:
+        errors.append(f"flip latency {latency} cycles, more than a frame ({frame_cycles} cycles)")
+    return len(shown), latency
+
+def run_flips(args):
+    dut = SevenSegmentsController(100, refresh_time=0.02, with_framebuffer=True)
+    dut.now = Signal(32)
+    dut.sync += dut.now.eq(dut.now + 1)
+    frames, flips, log, errors = make_frames(args.frames, args.seed), [], [], []
+    simulate(dut, [writer(dut, frames, flips), monitor(dut, log)], vcd_name=None)
+    frame_cycles = 3*(dut.refresh_count + 1)
+    n, latency   = check_frames(log, frames, flips, frame_cycles, errors)
+    print(f"flip: {len(frames) - 1} frames written, {n} displayed, worst flip latency {latency} cycles "
+          f"(frame: {frame_cycles} cycles), {'ok' if not errors else 'FAIL'}")
+    return errors
+
+def run_burst(args):
+    dut    = Framebuffer(8)
+    errors = []
+    simulate(dut, burst_bench(dut, errors, seed=args.seed), vcd_name=None)
+    print(f"burst: 8 digits, {len(pack(dut.shown))} word bursts, {'ok' if not errors else 'FAIL'}")
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Framebuffer burst writes and flip timing (simulation).")
+    parser.add_argument("--frames", default=20, type=int, help="Frames written.")
+    parser.add_argument("--seed",   default=0,  type=int, help="Random seed.")
+    args = parser.parse_args()
+
+    errors = run_burst(args) + run_flips(args)
+    for error in errors[:10]:
+        print("  " + error)
+    if errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
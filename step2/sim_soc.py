@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+#
+# step2 BaseSoC simulated with Verilator (litex_sim flow), no board needed.
+#
+# The SoC is step2.py's BaseSoC (same SevenSegmentsController, same CSR map) on
+# a simulation platform, with an Etherbone bridge (UARTBone) served on a local
+# TCP port instead of JTAG. The host tools then work unchanged through
+# litex_server:
+#
+#   ./sim_soc.py --csr-csv csr.csv                     # Builds and runs the simulation.
+#   litex_server --uart --uart-port socket://localhost:2430
+#   ./test.py / litex_cli --regs
+#   ./sim_display.py                                   # Virtual display, CSR latency.
+#
+# The simulated clock is 1 MHz, so the display refresh period stays 2 ms of
+# simulated time.
+
+from migen import *
+
+from litex.build.generic_platform import Pins, Subsignal
+from litex.build.sim import SimPlatform
+from litex.build.sim.config import SimConfig
+
+from litex.soc.cores.uart import RS232PHYModel, UARTBone
+from litex.soc.interconnect.csr import AutoCSR, CSRStatus
+from litex.soc.integration.builder import *
+
+from step2 import BaseSoC
+
+# IOs ----------------------------------------------------------------------------------------------
+
+_io = [
+    ("sys_clk", 0, Pins(1)),
+    ("sys_rst", 0, Pins(1)),
+
+    # Etherbone bridge, connected to a TCP port by the serial2tcp module.
+    ("serial", 0,
+        Subsignal("source_valid", Pins(1)),
+        Subsignal("source_ready", Pins(1)),
+        Subsignal("source_data",  Pins(8)),
+        Subsignal("sink_valid",   Pins(1)),
+        Subsignal("sink_ready",   Pins(1)),
+        Subsignal("sink_data",    Pins(8)),
+    ),
+
+    ("seven_seg_ctl", 0,
+        Subsignal("dig",      Pins(3)),
+        Subsignal("segments", Pins(7)),
+    ),
+]
+
+class Platform(SimPlatform):
+    def __init__(self):
+        SimPlatform.__init__(self, "SIM", _io)
+
+# Display probe ------------------------------------------------------------------------------------
+
+class DisplayProbe(Module, AutoCSR):
+    """Segments last driven for each digit, so the host can draw the display."""
+    def __init__(self, controller):
+        self.segments = CSRStatus(21, description="ABCDEFG of digit[i] in bits 7*i to 7*i + 6.")
+
+        # # #
+
+        for i in range(3):
+            self.sync += If(controller.digit[i],
+                self.segments.status[7*i:7*(i + 1)].eq(controller.abcdefg)
+            )
+
+# SimSoC -------------------------------------------------------------------------------------------
+
+class SimSoC(BaseSoC):
+    def __init__(self, sys_clk_freq=1e6, port=2430, **kwargs):
+        BaseSoC.__init__(self, sys_clk_freq, platform=Platform(), **kwargs)
+
+        self.sim_config = SimConfig()
+        self.sim_config.add_clocker("sys_clk", freq_hz=int(sys_clk_freq))
+
+        # Etherbone over TCP -----------------------------------------------------------------------
+        self.submodules.uartbone_phy = uartbone_phy = RS232PHYModel(self.platform.request("serial"))
+        self.submodules.uartbone     = uartbone     = UARTBone(uartbone_phy, clk_freq=sys_clk_freq,
+            address_width = self.bus.address_width)
+        self.bus.add_master(name="uartbone", master=uartbone.wishbone)
+        self.sim_config.add_module("serial2tcp", "serial", args={"port": port})
+
+        # Virtual display --------------------------------------------------------------------------
+        self.submodules.display = DisplayProbe(self.seven_seg_ctrl)
+
+# Build --------------------------------------------------------------------------------------------
+
+def main():
+    from litex.build.parser import LiteXArgumentParser
+    parser = LiteXArgumentParser(platform=SimPlatform, description="step2 BaseSoC simulation.")
+    parser.add_target_argument("--port",         default=2430, type=int, help="Etherbone (UARTBone) TCP port.")
+    parser.add_target_argument("--with-stream",  action="store_true",    help="Enable FIFO-backed display streaming.")
+    parser.add_target_argument("--with-perfmon", action="store_true",    help="Enable bus performance counters.")
+    # No CPU: the host drives the bus. --cpu-type vexriscv also needs a RISC-V toolchain for the BIOS.
+    parser.set_defaults(cpu_type="None", uart_name="stub", csr_csv="csr.csv")
+    args = parser.parse_args()
+
+    soc = SimSoC(
+        port         = args.port,
+        with_stream  = args.with_stream,
+        with_perfmon = args.with_perfmon,
+        **parser.soc_argdict
+    )
+
+    builder = Builder(soc, **parser.builder_argdict)
+    builder.build(sim_config=soc.sim_config, interactive=False, **parser.toolchain_argdict)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+#
+# Switching activity of SevenSegmentsController, default vs low_power (simulation).
+#
+# Both controllers show the same sequence of values (a new one every --every
+# cycles) for --cycles cycles. Each run is traced to a VCD and the bit toggles
+# of every signal are counted from it (vcd.toggle_counts), then compared per
+# signal and in total (clock and reset excluded). The displayed sequence of
+# (digit, abcdefg) must be the same for both designs.
+#
+# The clock is 50 MHz (1 us prescaler of 50 cycles) but the refresh time is
+# shortened to --refresh-time 0.1 ms (5000 cycles) to keep the run short.
+#
+# ./sim_toggles.py [--cycles 30000] [--every 5000]
+
+import os
+import sys
+import argparse
+
+from migen import *
+
+from controller import SevenSegmentsController
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from sim import simulate
+from vcd import toggle_counts
+
+# Bench --------------------------------------------------------------------------------------------
+
+def bench(dut, cycles, every, shown):
+    for cycle in range(cycles):
+        if cycle % every == every//2:
+            yield dut.value.storage.eq((0x123*(cycle//every + 1)) & 0xfff)
+        state = ((yield dut.digit), (yield dut.abcdefg))
+        if not shown or shown[-1] != state:
+            shown.append(state)
+        yield
+
+def run(low_power, args):
+    dut      = SevenSegmentsController(args.period_ns, low_power=low_power, refresh_time=args.refresh_time)
+    vcd_name = f"toggles_{'low_power' if low_power else 'default'}.vcd"
+    shown    = []
+    simulate(dut, bench(dut, args.cycles, args.every, shown), vcd_name=vcd_name)
+    counts = toggle_counts(vcd_name)
+    for name in ["sys_clk", "sys_rst"]:
+        counts.pop(name, None)
+    return counts, shown
+
+def main():
+    parser = argparse.ArgumentParser(description="Controller switching activity, default vs low_power.")
+    parser.add_argument("--cycles",       default=30000, type=int,   help="Simulated cycles.")
+    parser.add_argument("--every",        default=5000,  type=int,   help="Cycles between value changes.")
+    parser.add_argument("--period-ns",    default=20,    type=float, help="Clock period.")
+    parser.add_argument("--refresh-time", default=0.1,   type=float, help="Digit refresh time (ms).")
+    args = parser.parse_args()
+
+    default,   default_shown   = run(False, args)
+    low_power, low_power_shown = run(True,  args)
+
+    print(f"{'signal':32s} {'bits':>4s} {'default':>9s} {'low_power':>9s}")
+    for name in sorted(set(default) | set(low_power)):
+        width = (default.get(name) or low_power.get(name))[0]
+        a     = default[name][1]   if name in default   else "-"
+        b     = low_power[name][1] if name in low_power else "-"
+        print(f"{name:32s} {width:4d} {a:>9} {b:>9}")
+    total_default   = sum(n for _, n in default.values())
+    total_low_power = sum(n for _, n in low_power.values())
+    print(f"{'total':32s} {'':4s} {total_default:9d} {total_low_power:9d} "
+          f"({total_low_power/total_default:.1%} of default)")
+
+    if default_shown != low_power_shown:
+        print("Displayed sequences differ!")
+        sys.exit(1)
+    print(f"Displayed sequences match ({len(default_shown)} states).")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@
 # Copyright (c) 2022 Franck Jullien <franck.jullien@collshade.fr>
 # SPDX-License-Identifier: BSD-2-Clause
 
+import os
+import sys
+
 from migen import *
 
 from litex.gen import LiteXModule
@@ -13,17 +16,26 @@ from litex.gen import LiteXModule
 from litex_boards.platforms import qmtech_ep4ce15_starter_kit
 
 from litex.soc.cores.clock import CycloneIVPLL
+from litex.soc.integration.soc import SoCRegion
 from litex.soc.integration.soc_core import *
 from litex.soc.integration.builder import *
 
 from controller import SevenSegmentsController
+from perfmon import PerfMonitor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from buildcache import cached_build
+from swcache import cached_software
 
 # CRG ----------------------------------------------------------------------------------------------
 
 class _CRG(LiteXModule):
-    def __init__(self, platform, sys_clk_freq):
+    def __init__(self, platform, sys_clk_freq, domains={}):
         self.rst    = Signal()
         self.cd_sys = ClockDomain()
+        # Extra generated domains, {name: freq}: cd_<name>.
+        for name in domains:
+            setattr(self, f"cd_{name}", ClockDomain(name))
 
         # # #
 
@@ -35,18 +47,29 @@ class _CRG(LiteXModule):
         self.comb += pll.reset.eq(self.rst)
         pll.register_clkin(clk50, 50e6)
         pll.create_clkout(self.cd_sys,    sys_clk_freq)
+        for name, freq in domains.items():
+            pll.create_clkout(getattr(self, f"cd_{name}"), freq)
 
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCCore):
+    mem_map = {**SoCCore.mem_map, **{
+        "seven_seg_fb": 0x90000000,  # --framebuffer, in the CPUs' IO region.
+    }}
+
     def __init__(self, sys_clk_freq=50e6,
-        with_jtaguart   = False,
-	with_jtagbone   = False,
+        with_jtaguart    = False,
+        with_stream      = False,
+        with_perfmon     = False,
+        with_low_power   = False,
+        disp_clk_freq    = None,
+        with_framebuffer = False,
+	with_jtagbone    = False,
         **kwargs):
         platform = qmtech_ep4ce15_starter_kit.Platform()
 
         # CRG --------------------------------------------------------------------------------------
-        self.crg = _CRG(platform, sys_clk_freq)
+        self.crg = _CRG(platform, sys_clk_freq, {} if disp_clk_freq is None else {"disp": disp_clk_freq})
 
         # SoCCore ----------------------------------------------------------------------------------
         if with_jtagbone:
@@ -65,9 +88,25 @@ class BaseSoC(SoCCore):
 
         seven_seg = platform.request("seven_seg_ctl", 0)
 
-        # Instance of our display controller
-        self.submodules.seven_seg_ctrl = seven_seg_ctrl = SevenSegmentsController(1e9/sys_clk_freq)
+        # Instance of our display controller (in the disp domain if there is one)
+        self.submodules.seven_seg_ctrl = seven_seg_ctrl = SevenSegmentsController(
+            1e9/(disp_clk_freq or sys_clk_freq),
+            with_stream      = with_stream,
+            low_power        = with_low_power,
+            clock_domain     = "sys" if disp_clk_freq is None else "disp",
+            with_framebuffer = with_framebuffer)
+        if disp_clk_freq is not None:
+            # Only crossed by the controller's BusSynchronizer, in both directions.
+            platform.toolchain.additional_sdc_commands.append(
+                "set_clock_groups -asynchronous -group [get_clocks {sys_clk}] -group [get_clocks {disp_clk}]")
         self.add_csr("seven_segment")
+        if with_framebuffer:
+            # Back page of the display framebuffer, written by the host or the CPU (uncached).
+            framebuffer = seven_seg_ctrl.framebuffer
+            self.bus.add_slave("seven_seg_fb", framebuffer.bus, SoCRegion(
+                origin = self.mem_map["seven_seg_fb"],
+                size   = framebuffer.size,
+                cached = False))
 
         # Here you must assign signals/values our controller's interfaces
         self.comb += [
@@ -75,6 +114,10 @@ class BaseSoC(SoCCore):
             seven_seg.segments.eq(seven_seg_ctrl.abcdefg),
         ]
 
+        # Performance counters ---------------------------------------------------------------------
+        if with_perfmon:
+            self.submodules.perfmon = PerfMonitor(["seven_seg_ctrl"], soc=self)
+
 # Build --------------------------------------------------------------------------------------------
 
 def main():
@@ -82,19 +125,42 @@ def main():
     parser = LiteXArgumentParser(platform=qmtech_ep4ce15_starter_kit.Platform, description="LiteX SoC on QMTECH EP4CE15")
     parser.add_target_argument("--sys-clk-freq",  default=50e6, type=float, help="System clock frequency.")
     parser.add_target_argument("--with-jtaguart", action="store_true",      help="Enable JTAGUart support.")
+    parser.add_target_argument("--with-stream",   action="store_true",      help="Enable FIFO-backed display streaming.")
+    parser.add_target_argument("--with-perfmon",  action="store_true",      help="Enable bus performance counters.")
+    parser.add_target_argument("--low-power",     action="store_true",      help="Low switching activity display controller.")
+    parser.add_target_argument("--disp-clk-freq", default=None, type=float, help="Run the display controller in its own clock domain.")
+    parser.add_target_argument("--framebuffer",   action="store_true",      help="Double buffered display framebuffer instead of the value CSR.")
+    parser.add_target_argument("--swcache-size",  default=256,  type=float, help="Software cache size cap (MiB, cache in $SWCACHE_DIR).")
+    parser.add_target_argument("--no-swcache",    action="store_true",      help="Always recompile the BIOS and software libraries.")
     parser.add_target_argument("--with-jtagbone", action="store_true",      help="Enable JTAGbone support.")
     args = parser.parse_args()
 
     soc = BaseSoC(
         sys_clk_freq           = args.sys_clk_freq,
         with_jtaguart          = args.with_jtaguart,
+        with_stream            = args.with_stream,
+        with_perfmon           = args.with_perfmon,
+        with_low_power         = args.low_power,
+        disp_clk_freq          = args.disp_clk_freq,
+        with_framebuffer       = args.framebuffer,
 	with_jtagbone          = args.with_jtagbone,
         **parser.soc_argdict
     )
 
     builder = Builder(soc, **parser.builder_argdict)
+    if not args.no_swcache:
+        # BIOS/libraries compiled only when their sources, headers or toolchain changed
+        cached_software(builder, max_size=int(args.swcache_size*2**20))
     if args.build:
-        builder.build(**parser.toolchain_argdict)
+        # Skips Quartus when the generated sources (Verilog, BIOS image...) match buildcache.json
+        bitstream = builder.get_bitstream_filename(mode="sram")
+        cached_build(soc.platform, soc,
+            build_dir  = builder.gateware_dir,
+            build_name = os.path.splitext(os.path.basename(bitstream))[0],
+            bitstream  = bitstream,
+            settings   = {k: v for k, v in vars(args).items() if k not in ["build", "load", "swcache_size", "no_swcache"]},
+            generate   = lambda: builder.build(run=False, **parser.toolchain_argdict),
+        )
 
     if args.load:
         prog = soc.platform.create_programmer()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+#
+# Build farm for sweeping BaseSoC (step2_bis) variants.
+#
+# Every point of the sys_clk_freq x JTAGUart x JTAGbone x display clock matrix
+# (--disp-clk-freq 0: display in sys, else in its own domain) is elaborated and
+# built in its own directory by a pool of worker processes. Fmax, resource usage
+# and build time are collected from the Quartus reports into one CSV. The BIOS
+# and software libraries are compiled once for all the variants (swcache.py).
+# Points that cannot be built (JTAGUart with JTAGbone: both use the JTAG user
+# chain) are not built, they are reported and written to the CSV as skipped.
+#
+# ./sweep.py --sys-clk-freq 50e6 75e6 100e6 --jtaguart 0 1 --jobs 2
+# ./sweep.py --sys-clk-freq 100e6 125e6 150e6 --disp-clk-freq 0 10e6   # sys Fmax per display clocking.
+# ./sweep.py --no-toolchain   # Generation and orchestration only.
+
+import os
+import re
+import csv
+import sys
+import time
+import argparse
+import itertools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from buildcache import cached_build, run_toolchain
+from swcache import cached_software
+
+# Variants -----------------------------------------------------------------------------------------
+
+def variants(sys_clk_freqs, jtaguart=[False], jtagbone=[False], disp_clk_freqs=[None]):
+    for freq, uart, bone, disp in itertools.product(sys_clk_freqs, jtaguart, jtagbone, disp_clk_freqs):
+        yield dict(sys_clk_freq=freq, with_jtaguart=uart, with_jtagbone=bone, disp_clk_freq=disp)
+
+def skip_reason(variant):
+    """Why `variant` cannot be built, None if it can."""
+    if variant["with_jtaguart"] and variant["with_jtagbone"]:
+        return "JTAGUart and JTAGbone both use the JTAG user chain"
+    return None
+
+def variant_name(variant):
+    name = f"{variant['sys_clk_freq']/1e6:g}mhz"
+    if variant["with_jtaguart"]:
+        name += "_jtaguart"
+    if variant["with_jtagbone"]:
+        name += "_jtagbone"
+    if variant.get("disp_clk_freq"):
+        name += f"_disp{variant['disp_clk_freq']/1e6:g}mhz"
+    return name
+
+# Reports ------------------------------------------------------------------------------------------
+
+_fmax_re     = re.compile(r";\s*([\d.]+)\s*MHz\s*;\s*([\d.]+)\s*MHz\s*;\s*([^;\s]+)")
+_resource_re = re.compile(r"^(Total logic elements|Total registers|Total memory bits|Total PLLs|"
+                          r"Embedded Multiplier 9-bit elements)\s*:\s*([\d,]+)", re.M)
+
+def parse_reports(build_dir, build_name):
+    report = {}
+    sta = os.path.join(build_dir, f"{build_name}.sta.rpt")
+    if os.path.exists(sta):
+        with open(sta) as f:
+            fmaxs = {}
+            for _, restricted, clock in _fmax_re.findall(f.read()):
+                if "altera_reserved_tck" not in clock:
+                    fmaxs[clock] = min(float(restricted), fmaxs.get(clock, float("inf")))
+        if fmaxs:
+            # Every clock as fmax_<clock>_mhz, the sys one also as fmax_mhz (timing_met).
+            for clock, fmax in sorted(fmaxs.items()):
+                report[f"fmax_{clock}_mhz"] = fmax
+            report["fmax_mhz"] = fmaxs.get("sys_clk")
+            if "sys_clk" not in fmaxs:
+                report["warning"] = f"no sys_clk Fmax in {os.path.basename(sta)} (clocks: {', '.join(sorted(fmaxs))})"
+    fit = os.path.join(build_dir, f"{build_name}.fit.summary")
+    if os.path.exists(fit):
+        with open(fit) as f:
+            for key, value in _resource_re.findall(f.read()):
+                report[key.lower().replace(" ", "_").replace("-", "_")] = int(value.replace(",", ""))
+    return report
+
+# Worker -------------------------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _redirect_output(filename):
+    # Worker output (including the toolchain's) goes to the variant's log.
+    # LiteX's SoCError sets sys.stderr to None: restore the file objects too.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved        = os.dup(1), os.dup(2)
+    saved_stdout = sys.stdout
+    saved_stderr = sys.stderr
+    with open(filename, "w") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout, sys.stderr = saved_stdout, saved_stderr
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+
+def no_toolchain(build_dir, build_name):
+    pass
+
+def build_variant(variant, output_dir, toolchain=run_toolchain, soc_kwargs={}):
+    from litex.soc.integration.builder import Builder
+    from step2_bis import BaseSoC
+
+    name       = variant_name(variant)
+    output_dir = os.path.join(output_dir, name)
+    os.makedirs(output_dir, exist_ok=True)
+    result = dict(name=name, **variant, status="ok")
+    start  = time.perf_counter()
+    with _redirect_output(os.path.join(output_dir, "sweep.log")):
+        try:
+            soc       = BaseSoC(**variant, **soc_kwargs)
+            builder   = Builder(soc, output_dir=output_dir)
+            swcache   = cached_software(builder)  # Shared by the variants.
+            bitstream = builder.get_bitstream_filename(mode="sram")
+            build_name = os.path.splitext(os.path.basename(bitstream))[0]
+            result["cached"] = cached_build(soc.platform, soc,
+                build_dir  = builder.gateware_dir,
+                build_name = build_name,
+                bitstream  = bitstream,
+                settings   = dict(variant, **soc_kwargs),
+                generate   = lambda: builder.build(run=False),
+                toolchain  = toolchain,
+            )
+            result["software_hits"] = len(swcache.hits)
+            result.update(parse_reports(builder.gateware_dir, build_name))
+        except Exception as e:
+            result["status"] = f"error: {e}"
+    result["build_time_s"] = round(time.perf_counter() - start, 2)
+    if result.get("fmax_mhz") is not None:
+        result["timing_met"] = result["fmax_mhz"] >= variant["sys_clk_freq"]/1e6
+    return result
+
+# Sweep --------------------------------------------------------------------------------------------
+
+def sweep(variants, output_dir="build/sweep", jobs=2, toolchain=run_toolchain, soc_kwargs={}):
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = []
+        for variant in variants:
+            reason = skip_reason(variant)
+            if reason is not None:
+                result = dict(name=variant_name(variant), **variant, status="skipped", reason=reason)
+                print(f"{result['name']:24s} skipped: {reason}")
+                results.append(result)
+                continue
+            futures.append(pool.submit(build_variant, variant, output_dir, toolchain, soc_kwargs))
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"{result['name']:24s} {result['status']:8s} {result['build_time_s']:8.1f}s "
+                  f"Fmax={result.get('fmax_mhz') or '-'}")
+            if "warning" in result:
+                print(f"{'':24s} warning: {result['warning']}")
+            results.append(result)
+    return sorted(results, key=lambda r: (r["sys_clk_freq"], r["name"]))
+
+def write_csv(results, filename):
+    fields = []
+    for result in results:
+        fields += [k for k in result if k not in fields]
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep BaseSoC variants on QMTECH EP4CE15.")
+    parser.add_argument("--sys-clk-freq", default=[50e6, 75e6, 100e6], type=float, nargs="+", help="System clock frequencies.")
+    parser.add_argument("--jtaguart",     default=[0], type=int, nargs="+", choices=[0, 1],   help="JTAGUart variants.")
+    parser.add_argument("--jtagbone",     default=[0], type=int, nargs="+", choices=[0, 1],   help="JTAGbone variants.")
+    parser.add_argument("--disp-clk-freq", default=[0], type=float, nargs="+",                  help="Display clock domain frequencies (0: sys).")
+    parser.add_argument("--cpu-type",     default=None,                                         help="CPU type (SoCCore default if not set).")
+    parser.add_argument("--jobs",         default=2,   type=int,                                help="Concurrent builds.")
+    parser.add_argument("--output-dir",   default="build/sweep",                                help="Per-variant build directories root.")
+    parser.add_argument("--csv",          default="sweep.csv",                                  help="Results file.")
+    parser.add_argument("--no-toolchain", action="store_true",                                  help="Only generate the build files.")
+    args = parser.parse_args()
+
+    soc_kwargs = {}
+    if args.cpu_type is not None:
+        soc_kwargs["cpu_type"] = args.cpu_type
+
+    results = sweep(
+        variants(args.sys_clk_freq, [bool(x) for x in args.jtaguart], [bool(x) for x in args.jtagbone],
+            [f or None for f in args.disp_clk_freq]),
+        output_dir = args.output_dir,
+        jobs       = args.jobs,
+        toolchain  = no_toolchain if args.no_toolchain else run_toolchain,
+        soc_kwargs = soc_kwargs,
+    )
+    write_csv(results, args.csv)
+    skipped = sum(r["status"] == "skipped" for r in results)
+    print(f"{len(results)} variants written to {args.csv}" + (f" ({skipped} skipped)" if skipped else ""))
+
+if __name__ == "__main__":
+    main()
@@ -5,26 +5,76 @@ import time
 
 from litex import RemoteClient
 
+from batch import BatchClient
+from animation import Display, scroll, bcd
+from framebuffer import raw, pack
+import csrmap
+
 wb = RemoteClient()
 wb.open()
 
 # # #
 
-mems = [x for x in dir(wb.mems) if not x.startswith("__")]
-print(mems)
+# Register map from csr.csv, parsed once and cached next to it
+csrs = csrmap.load("csr.csv")
+print(list(csrs.memories))
+print(list(csrs.registers))
+
+# Framebuffer (--framebuffer): one burst write per frame to the back page, then a flip
+if "seven_seg_fb" in csrs.memories:
+	base    = csrs.memories["seven_seg_fb"][0]
+	flip    = csrs.handle(wb, "seven_seg_ctrl_framebuffer_flip")
+	pending = csrs.handle(wb, "seven_seg_ctrl_framebuffer_pending")
+	for frame in [[0x1, 0x2, 0x3], [raw(0b0111111), 0xa, raw(0b0111111)], [0xc, 0xa, 0xf]]:
+		while pending.read():
+			pass
+		wb.write(base, pack(frame))
+		flip.write(1)
+		time.sleep(1)
+else:
+	# Access the WB bus
+	wb.write(csrs.addr("seven_seg_ctrl_value"), 0x101)
 
-mems = [x for x in dir(wb.mems.csr) if not x.startswith("__")]
-print(mems)
+	time.sleep(5)
 
-# Access the WB bus
-wb.write(wb.mems.csr.base + 0x1800, 0x101)
+	# Access a specific register, resolved once
+	value = csrs.handle(wb, "seven_seg_ctrl_value")
+	for i in range(20):
+		value.write(i)
 
-time.sleep(5)
+	# Same accesses, queued and sent back to back (one record each, reads pipelined)
+	with BatchClient() as batch:
+		for i in range(20):
+			batch.write(value.addr, i)
+		batch.read(value.addr)
+		print(batch.flush())
 
-# Access a specific register
-for i in range(20):
-	wb.regs.seven_seg_ctrl_value.write(i)
+# Streaming (--with-stream): queue frames, played back at 10 frames/s
+if "seven_seg_ctrl_fifo" in csrs.registers:
+	stream = csrs.handle(wb, "seven_seg_ctrl_stream")
+	csrs.handle(wb, "seven_seg_ctrl_rate").write(int(50e6/10) - 1)
+	# Frames queued and sent back to back, one FIFO write each; the level read waits for them
+	with BatchClient() as batch:
+		for i in range(100):
+			batch.write(csrs.addr("seven_seg_ctrl_fifo"), i)
+		batch.read(csrs.addr("seven_seg_ctrl_level"))
+		print(batch.flush())
+	stream.write(1)
+	time.sleep(10)
+	print(csrs.handle(wb, "seven_seg_ctrl_underflows").read())
+	# Back to the value register
+	stream.write(0)
 
+# Paced display updates (animation.py): 30 frames/s, faster updates coalesced
+with Display(wb, csrs, rate=30) as display:
+	if "seven_seg_fb" in csrs.memories:
+		display.play(scroll("HELLO"))
+		while display.playing:
+			time.sleep(0.1)
+	for i in range(1000):
+		display.show(bcd(i))
+		time.sleep(0.001)
+print(display.stats())
 
 # # #
 
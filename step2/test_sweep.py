@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+#
+# Sweep orchestration (sweep.py) with a stubbed Quartus (no FPGA toolchain).
+#
+# The variants are generated by the worker processes (BaseSoC without CPU: no
+# cross compiler needed) and "built" by a stub toolchain writing the bitstream
+# and the Timing Analyzer/Fitter reports sweep.py parses:
+#  - every buildable variant built in its own directory, Fmax and resources
+#    collected, timing_met set from the requested sys_clk_freq,
+#  - no sys Fmax (and a warning) when the reports have no sys_clk clock,
+#  - JTAGUart + JTAGbone variants skipped, reported and written to the CSV,
+#  - same sweep again: every variant a build cache hit.
+#
+# ./test_sweep.py
+
+import io
+import os
+import csv
+import sys
+import tempfile
+import contextlib
+
+from sweep import variants, sweep, write_csv, parse_reports
+
+# Helpers ------------------------------------------------------------------------------------------
+
+STA_RPT = """\
++--------------------------------------------------------------------------------+
+; Slow 1200mV 85C Model Fmax Summary                                             ;
++------------+-----------------+---------------------+----------------------------+
+; Fmax       ; Restricted Fmax ; Clock Name          ; Note                       ;
++------------+-----------------+---------------------+----------------------------+
+; 84.32 MHz  ; 84.32 MHz       ; sys_clk             ;                            ;
+; 120.5 MHz  ; 120.5 MHz       ; altera_reserved_tck ;                            ;
++------------+-----------------+---------------------+----------------------------+
++--------------------------------------------------------------------------------+
+; Slow 1200mV 0C Model Fmax Summary                                              ;
++------------+-----------------+---------------------+----------------------------+
+; 92.1 MHz   ; 92.1 MHz        ; sys_clk             ;                            ;
++------------+-----------------+---------------------+----------------------------+
+"""
+
+FIT_SUMMARY = """\
+Fitter Status : Successful - Sat Jan 01 00:00:00 2000
+Family : Cyclone IV E
+Device : EP4CE15F23C8
+Total logic elements : 3,421 / 15,408 ( 22 % )
+Total registers : 2187
+Total memory bits : 65,536 / 516,096 ( 13 % )
+Embedded Multiplier 9-bit elements : 4 / 112 ( 4 % )
+Total PLLs : 1 / 4 ( 25 % )
+"""
+
+def stub_toolchain(build_dir, build_name):
+    # Module level: the worker processes get it by reference.
+    for ext, content in [(".sof", "bitstream\n"), (".sta.rpt", STA_RPT), (".fit.summary", FIT_SUMMARY)]:
+        with open(os.path.join(build_dir, build_name + ext), "w") as f:
+            f.write(content)
+
+def run_sweep(output_dir):
+    """(results, sweep output) of 50/100 MHz x JTAGUart x JTAGbone, without CPU."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        results = sweep(variants([50e6, 100e6], [False, True], [False, True]),
+            output_dir = output_dir,
+            jobs       = 2,
+            toolchain  = stub_toolchain,
+            soc_kwargs = dict(cpu_type=None),
+        )
+    return results, output.getvalue()
+
+# Tests --------------------------------------------------------------------------------------------
+
+def test_parse_reports():
+    with tempfile.TemporaryDirectory() as d:
+        stub_toolchain(d, "top")
+        report = parse_reports(d, "top")
+        assert report["fmax_mhz"] == report["fmax_sys_clk_mhz"] == 84.32, report  # Worst corner, JTAG clock ignored.
+        assert "fmax_altera_reserved_tck_mhz" not in report and "warning" not in report, report
+        assert report["total_logic_elements"] == 3421 and report["total_memory_bits"] == 65536, report
+        assert report["embedded_multiplier_9_bit_elements"] == 4 and report["total_plls"] == 1, report
+
+def test_parse_reports_without_sys_clk():
+    # Other net names (derive_pll_clocks -use_net_name): no sys Fmax rather than another domain's.
+    with tempfile.TemporaryDirectory() as d:
+        with open(os.path.join(d, "top.sta.rpt"), "w") as f:
+            f.write("; 84.32 MHz  ; 84.32 MHz       ; crg|pll|clk[0]      ;  ;\n"
+                    "; 150.0 MHz  ; 150.0 MHz       ; disp_clk            ;  ;\n")
+        report = parse_reports(d, "top")
+        assert report["fmax_mhz"] is None and "no sys_clk Fmax" in report["warning"], report
+        assert report["fmax_disp_clk_mhz"] == 150.0 and report["fmax_crg|pll|clk[0]_mhz"] == 84.32, report
+
+def test_sweep():
+    with tempfile.TemporaryDirectory() as d:
+        results, output = run_sweep(os.path.join(d, "sweep"))
+        built   = [r for r in results if r["status"] != "skipped"]
+        skipped = [r for r in results if r["status"] == "skipped"]
+        assert [r["name"] for r in skipped] == ["50mhz_jtaguart_jtagbone", "100mhz_jtaguart_jtagbone"], skipped
+        for r in skipped:
+            assert "JTAG user chain" in r["reason"] and f"{r['name']:24s} skipped:" in output, output
+            assert not os.path.exists(os.path.join(d, "sweep", r["name"])), "Skipped variant built"
+        assert len(built) == 6 and all(r["status"] == "ok" for r in built), [(r["name"], r["status"]) for r in built]
+        for r in built:
+            assert not r["cached"] and r["fmax_mhz"] == 84.32 and r["total_logic_elements"] == 3421, r
+            assert r["timing_met"] == (r["sys_clk_freq"] == 50e6), r
+            assert os.path.exists(os.path.join(d, "sweep", r["name"], "sweep.log")), r["name"]
+
+        write_csv(results, os.path.join(d, "sweep.csv"))
+        with open(os.path.join(d, "sweep.csv")) as f:
+            rows = list(csv.DictReader(f))
+        assert [row["name"] for row in rows] == [r["name"] for r in results]
+        assert {row["status"] for row in rows} == {"ok", "skipped"}
+        assert all(row["fmax_mhz"] == "84.32" for row in rows if row["status"] == "ok"), rows
+
+def test_sweep_cached():
+    with tempfile.TemporaryDirectory() as d:
+        run_sweep(os.path.join(d, "sweep"))
+        results, _ = run_sweep(os.path.join(d, "sweep"))
+        built = [r for r in results if r["status"] != "skipped"]
+        assert len(built) == 6 and all(r["cached"] for r in built), [(r["name"], r.get("cached")) for r in built]
+
+# Run ----------------------------------------------------------------------------------------------
+
+def main():
+    failed = 0
+    for name, test in [(k, v) for k, v in globals().items() if k.startswith("test_")]:
+        try:
+            test()
+            print(f"{name}: ok")
+        except AssertionError as e:
+            print(f"{name}: FAIL {e}")
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()